@@ -0,0 +1,157 @@
+"""
+Hot/cold split: tickets closed more than `archive.after_days` ago move, with
+their messages and file rows, from the live tables into the archived_* tables.
+The live tables and their indexes stay proportional to open work, while reads
+(ticket page, messages, the closed tab, downloads) still find archived tickets,
+see app.routers.tickets. Reopening an archived ticket moves it back.
+
+Rows keep their ids. SQLite hands out max(id) + 1 for new rows, so a ticket
+that owns the highest id of any live table is never archived — otherwise a new
+row could reuse an id that already exists in the archive.
+
+The job works in batches of `archive.batch_size` tickets, one short transaction
+each, so the app's writers only ever wait for one batch.
+
+Usage (cron or a systemd timer, e.g. nightly):
+    python -m app.archive [--days 90] [--batch-size 200]
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Table, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+from app.database import SessionLocal, init_db
+from app.models import (
+    ArchivedMessage,
+    ArchivedMessageFile,
+    ArchivedTicket,
+    ArchivedTicketFile,
+    Message,
+    MessageFile,
+    Ticket,
+    TicketFile,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_PAUSE = 0.05  # seconds between batches, lets queued writers in
+
+LIVE = (Ticket.__table__, TicketFile.__table__, Message.__table__, MessageFile.__table__)
+ARCHIVE = (
+    ArchivedTicket.__table__,
+    ArchivedTicketFile.__table__,
+    ArchivedMessage.__table__,
+    ArchivedMessageFile.__table__,
+)
+
+
+def _move(db: Session, source: tuple[Table, ...], target: tuple[Table, ...], ticket_ids) -> None:
+    """Copy the tickets' rows from one table set to the other, then delete the originals."""
+    tickets, ticket_files, messages, message_files = source
+    where = (
+        tickets.c.id.in_(ticket_ids),
+        ticket_files.c.ticket_id.in_(ticket_ids),
+        messages.c.ticket_id.in_(ticket_ids),
+        message_files.c.message_id.in_(
+            select(messages.c.id).where(messages.c.ticket_id.in_(ticket_ids))
+        ),
+    )
+    # Parents first on insert, children first on delete.
+    for src, dst, condition in zip(source, target, where):
+        shared = [c for c in src.columns if c.name in dst.c]  # archived_at exists on one side only
+        db.execute(insert(dst).from_select([c.name for c in shared], select(*shared).where(condition)))
+    for src, condition in reversed(list(zip(source, where))):
+        db.execute(delete(src).where(condition))
+
+
+def _pinned_tickets():
+    """Tickets owning the highest id of a live table (see module docstring)."""
+    newest_message = select(func.max(Message.id)).scalar_subquery()
+    newest_message_file = select(func.max(MessageFile.id)).scalar_subquery()
+    return (
+        select(func.max(Ticket.id))
+        .union(
+            select(TicketFile.ticket_id).where(
+                TicketFile.id == select(func.max(TicketFile.id)).scalar_subquery()
+            ),
+            select(Message.ticket_id).where(Message.id == newest_message),
+            select(Message.ticket_id)
+            .join(MessageFile, MessageFile.message_id == Message.id)
+            .where(MessageFile.id == newest_message_file),
+        )
+    )
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Archive up to batch_size tickets closed before cutoff; returns how many."""
+    ticket_ids = list(db.scalars(
+        select(Ticket.id)
+        .where(
+            Ticket.status == "closed",
+            Ticket.updated_at < cutoff,
+            Ticket.id.not_in(_pinned_tickets()),
+        )
+        .order_by(Ticket.updated_at)
+        .limit(batch_size)
+    ))
+    if ticket_ids:
+        _move(db, LIVE, ARCHIVE, ticket_ids)
+        db.execute(
+            update(ArchivedTicket)
+            .where(ArchivedTicket.id.in_(ticket_ids))
+            .values(archived_at=datetime.now(timezone.utc))
+        )
+    db.commit()
+    return len(ticket_ids)
+
+
+def archive_closed_tickets(
+    db: Session,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    pause: float = BATCH_PAUSE,
+) -> int:
+    """Archive every ticket closed more than older_than_days ago; returns the total."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    total = 0
+    while True:
+        moved = archive_batch(db, cutoff, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+        time.sleep(pause)
+
+
+def restore_ticket(db: Session, ticket_id: int) -> bool:
+    """
+    Move an archived ticket back to the live tables inside the caller's
+    transaction; returns False if it isn't archived.
+    """
+    found = db.scalar(select(ArchivedTicket.id).where(ArchivedTicket.id == ticket_id))
+    if found is None:
+        return False
+    _move(db, ARCHIVE, LIVE, [ticket_id])
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive tickets closed long ago")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help="archive tickets closed more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE,
+                        help="tickets moved per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    init_db()
+    with SessionLocal() as db:
+        total = archive_closed_tickets(db, args.days, args.batch_size)
+    logger.info("Archived %d tickets closed more than %d days ago", total, args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ from urllib.parse import parse_qsl
 
 from jose import JWTError, jwt
 
-from app.config import ADMIN_IDS, ALGORITHM, JWT_EXPIRE_HOURS, SECRET_KEY, SUPPORT_IDS
+from app.config import ALGORITHM, JWT_EXPIRE_HOURS, SECRET_KEY, roles
 
 
 def _validate_telegram_init_data(init_data: str, bot_token: str) -> dict:
@@ -46,11 +46,7 @@ def _validate_telegram_init_data(init_data: str, bot_token: str) -> dict:
 
 
 def determine_role(telegram_id: int) -> str:
-    if telegram_id in ADMIN_IDS:
-        return "admin"
-    if telegram_id in SUPPORT_IDS:
-        return "support"
-    return "author"
+    return roles().role_of(telegram_id)
 
 
 def create_jwt(user_id: int, telegram_id: int, role: str) -> str:
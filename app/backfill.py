@@ -0,0 +1,111 @@
+"""
+Fill the denormalized last-message columns of tickets — last_message_at,
+last_message_preview and message_count — from their messages.
+
+The app keeps them up to date as messages are sent (see
+app.routers.tickets._note_messages); this job fills them in for tickets whose
+messages predate the columns, live and archived alike. It recomputes every
+ticket from its messages, so it is safe to run again at any time, e.g. to
+repair counts after messages were edited by hand.
+
+Tickets are processed in id order, `--batch-size` per short transaction. Each
+batch updates the counts first and clears the last-message columns: that
+takes SQLite's write lock, so no message can be added to the batch's tickets
+between the count and the preview read. Tickets with messages then get their
+last one back; tickets without keep 0 and NULLs. updated_at is left alone,
+the queue order doesn't change.
+
+Usage, once after upgrading (init_db adds the columns):
+    python -m app.backfill [--batch-size 500]
+"""
+import argparse
+import logging
+import time
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, init_db
+from app.models import ArchivedMessage, ArchivedTicket, Message, Ticket, message_preview
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+BATCH_PAUSE = 0.05  # seconds between batches, lets queued writers in
+
+PAIRS = ((Ticket, Message), (ArchivedTicket, ArchivedMessage))
+
+
+def backfill_batch(db: Session, entity, message, after_id: int, batch_size: int) -> list[int]:
+    """Fill up to batch_size tickets with ids above after_id; returns their ids."""
+    ticket_ids = list(db.scalars(
+        select(entity.id).where(entity.id > after_id).order_by(entity.id).limit(batch_size)
+    ))
+    if not ticket_ids:
+        return ticket_ids
+
+    tickets = entity.__table__
+    db.execute(
+        update(tickets)
+        .where(tickets.c.id.in_(ticket_ids))
+        .values(
+            message_count=select(func.count(message.id))
+            .where(message.ticket_id == tickets.c.id)
+            .scalar_subquery(),
+            last_message_at=None,
+            last_message_preview=None,
+            updated_at=tickets.c.updated_at,  # not a change to the ticket itself
+        )
+    )
+    last_ids = select(func.max(message.id)).where(message.ticket_id.in_(ticket_ids)).group_by(message.ticket_id)
+    rows = [
+        {"_id": ticket_id, "_at": created_at, "_preview": message_preview(text)}
+        for ticket_id, created_at, text in db.execute(
+            select(message.ticket_id, message.created_at, message.text).where(message.id.in_(last_ids))
+        )
+    ]
+    if rows:
+        db.execute(
+            update(tickets)
+            .where(tickets.c.id == bindparam("_id"))
+            .values(
+                last_message_at=bindparam("_at"),
+                last_message_preview=bindparam("_preview"),
+                updated_at=tickets.c.updated_at,
+            ),
+            rows,
+        )
+    db.commit()
+    return ticket_ids
+
+
+def backfill_last_messages(db: Session, batch_size: int = BATCH_SIZE, pause: float = BATCH_PAUSE) -> int:
+    """Recompute the last-message columns of every ticket; returns how many were processed."""
+    total = 0
+    for entity, message in PAIRS:
+        after_id = 0
+        while True:
+            ticket_ids = backfill_batch(db, entity, message, after_id, batch_size)
+            total += len(ticket_ids)
+            if len(ticket_ids) < batch_size:
+                break
+            after_id = ticket_ids[-1]
+            time.sleep(pause)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill ticket last-message columns from messages")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="tickets updated per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    init_db()
+    with SessionLocal() as db:
+        total = backfill_last_messages(db, args.batch_size)
+    logger.info("Backfilled last-message columns of %d tickets", total)
+
+
+if __name__ == "__main__":
+    main()
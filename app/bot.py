@@ -2,14 +2,18 @@
 Telegram bot notifications.
 All functions are async and safe to call via asyncio.create_task().
 Errors are swallowed so bot failures never break the main API.
+
+python-telegram-bot (and the httpx stack under it) is imported on the first
+notification rather than at startup; the Bot client is then reused.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-
-from app.config import ADMIN_IDS, SUPPORT_IDS
+from app.config import roles
+from app.metrics import TELEGRAM_LATENCY, TELEGRAM_SENDS
 
 logger = logging.getLogger(__name__)
 
@@ -23,17 +27,28 @@ _STATUS_LABELS = {
 }
 
 
+_bot = None
+_bot_loop = None
+
+
 def _get_bot():
-    from telegram import Bot
-    from app.config import BOT_TOKEN
-    return Bot(token=BOT_TOKEN)
+    # The Bot's HTTP connection pool belongs to the event loop it was first
+    # used on, so a new loop (tests, a restarted server) gets a new client.
+    global _bot, _bot_loop
+    loop = asyncio.get_running_loop()
+    if _bot is None or _bot_loop is not loop:
+        from telegram import Bot
+        from app.config import BOT_TOKEN
+        _bot, _bot_loop = Bot(token=BOT_TOKEN), loop
+    return _bot
 
 
-def _support_recipients() -> list[int]:
-    return list(set(ADMIN_IDS + SUPPORT_IDS))
+def _support_recipients() -> tuple[int, ...]:
+    return roles().recipients
 
 
 async def _send(chat_id: int, text: str, reply_markup=None) -> None:
+    start = time.perf_counter()
     try:
         bot = _get_bot()
         await bot.send_message(
@@ -43,7 +58,12 @@ async def _send(chat_id: int, text: str, reply_markup=None) -> None:
             reply_markup=reply_markup,
         )
     except Exception as exc:
+        TELEGRAM_SENDS.labels("error").inc()
         logger.warning("Bot send failed to %s: %s", chat_id, exc)
+    else:
+        TELEGRAM_SENDS.labels("ok").inc()
+    finally:
+        TELEGRAM_LATENCY.observe(time.perf_counter() - start)
 
 
 async def notify_new_ticket(ticket, author) -> None:
@@ -114,3 +134,13 @@ async def notify_new_message(ticket, message, sender) -> None:
         )
         for uid in _support_recipients():
             await _send(uid, text)
+
+
+async def notify_batch(notifications: list[tuple]) -> None:
+    """Run (notify_func, *args) calls from a single background task, e.g. after /tickets/bulk."""
+    for func, *args in notifications:
+        try:
+            await func(*args)
+        except Exception:
+            # One broken notification mustn't drop the rest of the batch.
+            logger.exception("Notification %s failed", func.__name__)
@@ -0,0 +1,135 @@
+"""
+Single-flight coalescing for hot, caller-independent reads.
+
+When dozens of agents open the "all" tab at once, every request would run the
+same queries and serialize the same JSON. SingleFlight.do() lets the first
+request (the leader) compute the result while identical concurrent requests
+wait for it and reuse it. With the optional `coalescing.ttl_ms` the result is
+also reused for that long after it's computed.
+
+Every commit that writes tickets, messages or files — through the ORM or an
+INSERT/UPDATE/DELETE on their tables run on a session — invalidates all flights, so nothing
+read before a write is handed out after it. Writes from other processes
+(app.archive, other workers) are only bounded by the TTL, so keep it small.
+
+Endpoints are sync and run in the threadpool, hence threading primitives.
+"""
+import threading
+import time
+from itertools import chain
+from typing import Callable, Hashable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import COALESCE_TTL
+from app.metrics import COALESCED_REQUESTS
+from app.models import (
+    ArchivedTicket,
+    Message,
+    MessageFile,
+    Ticket,
+    TicketFile,
+)
+
+T = TypeVar("T")
+
+WATCHED_MODELS = (Ticket, TicketFile, Message, MessageFile, ArchivedTicket)
+WATCHED_TABLES = {model.__tablename__ for model in WATCHED_MODELS}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "finished", "generation")
+
+    def __init__(self, generation: int) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.finished = 0.0
+        self.generation = generation
+
+
+class SingleFlight:
+    def __init__(self, name: str, ttl: float = COALESCE_TTL) -> None:
+        self.name = name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._generation = 0
+        _flights.append(self)
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """fn() once per key among concurrent callers (and within the TTL)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and time.monotonic() - call.finished > self.ttl:
+                call = None
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(self._generation)
+
+        if not leader:
+            call.done.wait()
+            COALESCED_REQUESTS.labels(self.name, "shared").inc()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        COALESCED_REQUESTS.labels(self.name, "computed").inc()
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            call.finished = time.monotonic()
+            with self._lock:
+                # Failures and results without a TTL aren't kept; neither is
+                # anything computed across an invalidation.
+                stale = call.error is not None or not self.ttl or call.generation != self._generation
+                if stale and self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._calls.clear()
+
+
+_flights: list[SingleFlight] = []
+
+
+def invalidate_all() -> None:
+    for flight in _flights:
+        flight.invalidate()
+
+
+# ── Invalidation on writes ────────────────────────────────────────────────────
+
+@event.listens_for(Session, "after_flush")
+def _note_flush(session: Session, flush_context) -> None:
+    changed = chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(obj, WATCHED_MODELS) for obj in changed):
+        session.info["coalesce_dirty"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement(state: ORMExecuteState) -> None:
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    if getattr(table, "name", None) in WATCHED_TABLES:
+        state.session.info["coalesce_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop("coalesce_dirty", False):
+        invalidate_all()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop("coalesce_dirty", None)
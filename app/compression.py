@@ -0,0 +1,132 @@
+"""
+Response compression (Brotli / gzip) negotiated via Accept-Encoding.
+
+CompressionMiddleware compresses single-chunk API responses (JSON) above
+COMPRESS_MIN_SIZE. Passed through untouched, whatever their size:
+- file downloads — anything with Accept-Ranges (every FileResponse) or
+  Content-Disposition: range requests and the strong ETag refer to the
+  stored bytes, so a gzipped copy would break resumed downloads;
+- streaming responses;
+- responses that already carry Content-Encoding (precompressed static
+  assets, see app.static).
+
+Every response of a compressible type gets Vary: Accept-Encoding, compressed
+or not: the same URL may be compressed for another client or once it grows
+past the threshold, and a shared cache must not hand one variant to all.
+Bodies of OFFLOAD_MIN_SIZE and up are compressed on a worker thread so the
+event loop keeps serving other requests meanwhile.
+"""
+import gzip
+
+import anyio.to_thread
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import COMPRESS_MIN_SIZE
+
+# Preferred first when the client accepts several with equal q-value.
+ENCODINGS = ("br", "gzip")
+OFFLOAD_MIN_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Pick the best supported coding from an Accept-Encoding header."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+
+    best, best_q = None, 0.0
+    for coding in ENCODINGS:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def is_compressible(content_type: str | None) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str, *, best: bool = False) -> bytes:
+    """Compress with a fast level for live responses, max level for build time."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if best else 4)
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+
+def _vary_on_encoding(headers: MutableHeaders) -> None:
+    if "accept-encoding" not in headers.get("vary", "").lower():
+        headers.add_vary_header("Accept-Encoding")
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Message | None = None
+        decided = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, decided
+            if decided:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if is_compressible(headers.get("content-type")):
+                    _vary_on_encoding(headers)
+                if encoding is None:
+                    decided = True
+                    await send(message)
+                    return
+                start = message  # held back until the body shows whether to compress
+                return
+
+            decided = True
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or "accept-ranges" in headers
+                or "content-disposition" in headers
+                or not is_compressible(headers.get("content-type"))
+                or len(body) < self.minimum_size
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= OFFLOAD_MIN_SIZE:
+                compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
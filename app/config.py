@@ -1,8 +1,26 @@
-import secrets
+"""
+Application settings from config.yaml.
 
-import yaml
+Importing this module only reads and parses the file: nothing is written and
+no directories are created (the upload directory is created on startup, see
+app.main). This keeps imports cheap and safe for tools and test collection.
+
+Roles can be changed without a restart: reload_config() re-reads the file and
+swaps the Roles snapshot returned by roles() (see app.reload for the SIGHUP
+handler and mtime watcher). Everything else is read once at import.
+"""
+import hashlib
+import hmac
+from dataclasses import dataclass
 from pathlib import Path
 
+import yaml
+
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _Loader
+
 _CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
 
 
@@ -14,34 +32,125 @@ def load_config() -> dict:
             "or run setup_config.sh to generate it interactively."
         )
     with open(_CONFIG_PATH, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_Loader)
 
 
-def _ensure_secret_key(config: dict) -> str:
+def _secret_key(config: dict) -> str:
+    # An empty secret_key falls back to a key derived from the bot token, so
+    # every worker and restart agrees on it without writing to config.yaml.
     key = config.get("secret_key") or ""
     if key:
         return key
-    key = secrets.token_hex(24)
-    config["secret_key"] = key
-    with open(_CONFIG_PATH, "w", encoding="utf-8") as f:
-        yaml.dump(config, f, allow_unicode=True, default_flow_style=False)
-    return key
+    return hmac.new(b"support-webapp-jwt", config["bot_token"].encode(), hashlib.sha256).hexdigest()
+
+
+@dataclass(frozen=True)
+class Roles:
+    """Immutable snapshot of the roles section; replaced as a whole on reload."""
+    admins: frozenset[int]
+    support: frozenset[int]
+    recipients: tuple[int, ...]  # admins and support, deduplicated, for broadcasts
+
+    @classmethod
+    def build(cls, admins=(), support=()) -> "Roles":
+        admins, support = frozenset(admins), frozenset(support)
+        return cls(admins, support, tuple(sorted(admins | support)))
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Roles":
+        section = config.get("roles") or {}
+        return cls.build(section.get("admins") or (), section.get("support") or ())
+
+    def role_of(self, telegram_id: int) -> str:
+        if telegram_id in self.admins:
+            return "admin"
+        if telegram_id in self.support:
+            return "support"
+        return "author"
+
+
+def _mtime_ns() -> int:
+    try:
+        return _CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        return 0
 
 
+_loaded_mtime_ns = _mtime_ns()
 _config = load_config()
 
 BOT_TOKEN: str = _config["bot_token"]
-SECRET_KEY: str = _ensure_secret_key(_config)
-ADMIN_IDS: list[int] = _config["roles"].get("admins", [])
-SUPPORT_IDS: list[int] = _config["roles"].get("support", [])
+SECRET_KEY: str = _secret_key(_config)
+_roles = Roles.from_config(_config)
+
+# Optional `sql_debug` section, see app.sqltrace.
+_sql_debug: dict = _config.get("sql_debug") or {}
+SQL_DEBUG: bool = bool(_sql_debug.get("enabled", False))
+SLOW_QUERY_MS: float = float(_sql_debug.get("slow_query_ms", 100))
+N_PLUS_ONE_THRESHOLD: int = int(_sql_debug.get("n_plus_one_threshold", 5))
+
+# Optional `archive` section, see app.archive.
+_archive: dict = _config.get("archive") or {}
+ARCHIVE_AFTER_DAYS: int = int(_archive.get("after_days", 90))
+ARCHIVE_BATCH_SIZE: int = int(_archive.get("batch_size", 200))
+
+# Optional `file_serving` section: who streams attachment bytes, see
+# app.routers.files. "app" sends them from Python; "x-accel" (nginx) and
+# "x-sendfile" (Apache, lighttpd) only check access and let the proxy send them.
+_file_serving: dict = _config.get("file_serving") or {}
+FILE_SERVING_MODE: str = _file_serving.get("mode", "app")
+if FILE_SERVING_MODE not in ("app", "x-accel", "x-sendfile"):
+    raise ValueError(f"file_serving.mode must be app, x-accel or x-sendfile, not {FILE_SERVING_MODE!r}")
+X_ACCEL_LOCATION: str = _file_serving.get("internal_location", "/protected-uploads/")
+
+# Optional `rate_limits` section, see app.ratelimit.
+RATE_LIMITS: dict = _config.get("rate_limits") or {}
+
+# Optional `coalescing` section, see app.coalesce: how long a coalesced result
+# is reused after it's computed. 0 shares only between concurrent requests.
+_coalescing: dict = _config.get("coalescing") or {}
+COALESCE_TTL: float = float(_coalescing.get("ttl_ms", 0)) / 1000
+
+# Optional `queue_index` section, see app.queue_index: how often the in-memory
+# support queue is rebuilt from the database to pick up other processes' writes.
+_queue_index: dict = _config.get("queue_index") or {}
+QUEUE_INDEX_RESYNC: float = float(_queue_index.get("resync_seconds", 60))
+
+
+def roles() -> Roles:
+    return _roles
+
+
+def reload_config(force: bool = False) -> Roles | None:
+    """
+    Re-read config.yaml if it changed since the last load and swap in the new
+    Roles snapshot. Returns the new snapshot, or None if nothing changed.
+    A broken file raises and leaves the current snapshot in place.
+    """
+    global _roles, _loaded_mtime_ns
+    mtime_ns = _mtime_ns()
+    if not force and mtime_ns == _loaded_mtime_ns:
+        return None
+    new_roles = Roles.from_config(load_config())
+    _loaded_mtime_ns = mtime_ns
+    if new_roles == _roles:
+        return None
+    _roles = new_roles
+    return new_roles
+
 
 ALGORITHM = "HS256"
 JWT_EXPIRE_HOURS = 24
 
+# Signed attachment URLs (app.storage): valid for FILE_URL_TTL, and the same URL
+# is handed out for FILE_URL_WINDOW so browsers and proxies can cache it.
+FILE_URL_TTL = 24 * 3600  # seconds
+FILE_URL_WINDOW = 3600  # seconds
+
 UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+COMPRESS_MIN_SIZE = 1024  # bytes; smaller bodies aren't worth compressing
 FORBIDDEN_EXTENSIONS = {
     ".exe", ".bat", ".cmd", ".sh", ".msi",
     ".ps1", ".vbs", ".app", ".bin", ".dll", ".com",
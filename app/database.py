@@ -1,7 +1,9 @@
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import Connection, create_engine, inspect, text
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.schema import CreateColumn
 
 DB_PATH = Path(__file__).parent.parent / "support.db"
 DATABASE_URL = f"sqlite:///{DB_PATH}"
@@ -20,9 +22,34 @@ class Base(DeclarativeBase):
 def init_db() -> None:
     from app import models  # noqa: F401 — registers models
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        upgrade_schema(conn)
+
+
+def upgrade_schema(conn: Connection) -> None:
+    """
+    Add the columns and indexes create_all skips because their table already
+    exists. New columns must be nullable or have a server_default; derived
+    values are filled in by app.backfill.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+def get_db(request: Request):
+    # POST /batch runs its sequential sub-requests on the batch's own session.
+    shared = getattr(request.state, "db", None)
+    if shared is not None:
+        yield shared
+        return
 
-
-def get_db():
     db = SessionLocal()
     try:
         yield db
@@ -1,4 +1,4 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
@@ -10,19 +10,24 @@ bearer_scheme = HTTPBearer()
 
 
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     db: Session = Depends(get_db),
 ) -> User:
-    token = credentials.credentials
-    try:
-        payload = decode_jwt(token)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-        )
+    # Sub-requests of POST /batch reuse the user id the batch already resolved
+    # and load the user on their own session.
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is None:
+        token = credentials.credentials
+        try:
+            payload = decode_jwt(token)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+            )
+        user_id = int(payload["sub"])
 
-    user_id = int(payload["sub"])
     user = db.get(User, user_id)
     if not user:
         raise HTTPException(
@@ -1,24 +1,68 @@
-from contextlib import asynccontextmanager
-from pathlib import Path
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, ORJSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from app.database import init_db
-from app.routers import files, messages, tickets, users
+from app import storage
+from app.compression import CompressionMiddleware
+from app.config import RATE_LIMITS, SQL_DEBUG, UPLOAD_DIR
+from app.database import SessionLocal, init_db
+from app.metrics import MetricsMiddleware, mark_process_dead
+from app.queue_index import support_queue
+from app.ratelimit import RateLimitMiddleware
+from app.reload import (
+    install_sighup_handler,
+    remove_sighup_handler,
+    sync_roles_on_startup,
+    watch_config,
+)
+from app.routers import batch, bootstrap, files, messages, metrics, tickets, users
+from app.sqltrace import SQLTraceMiddleware
+from app.static import FRONTEND_DIR, PrecompressedStaticFiles, build_static
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    with SessionLocal() as db:
+        support_queue.load(db)
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    if FRONTEND_DIR.exists():
+        try:
+            frontend_files.use_directory(build_static())
+        except OSError as exc:
+            # Read-only checkout: serve the sources without fingerprints.
+            logger.warning("Static build skipped: %s", exc)
+
+    sync_roles_on_startup()
+    loop = asyncio.get_running_loop()
+    install_sighup_handler(loop)
+    watcher = asyncio.create_task(watch_config())
     yield
+    watcher.cancel()
+    with suppress(asyncio.CancelledError):
+        await watcher
+    remove_sighup_handler(loop)
+    mark_process_dead()
 
 
-app = FastAPI(title="Support WebApp", version="1.0.0", lifespan=lifespan)
+app = FastAPI(
+    title="Support WebApp",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
+# Innermost of the middlewares below, so 429s still get CORS headers and show
+# up in the metrics.
+if RATE_LIMITS:
+    app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -26,6 +70,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+if SQL_DEBUG:
+    app.add_middleware(SQLTraceMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(StarletteHTTPException)
@@ -33,7 +81,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     if exc.status_code == 404:
         path = request.url.path
         # Known API prefixes where legitimate 404s can occur
-        if path.startswith(("/tickets", "/files", "/auth")):
+        if path.startswith(("/tickets", "/files", storage.SIGNED_PREFIX, "/auth")):
             return JSONResponse(status_code=404, content={"detail": exc.detail})
         # Path outside all known routes — treat as access denied (e.g. path traversal)
         return JSONResponse(status_code=403, content={"detail": "Access denied"})
@@ -45,8 +93,11 @@ app.include_router(users.router)
 app.include_router(tickets.router)
 app.include_router(messages.router)
 app.include_router(files.router)
+app.include_router(bootstrap.router)
+app.include_router(batch.router)
+app.include_router(metrics.router)
 
-# Serve frontend static files
-_frontend_dir = Path(__file__).parent.parent / "frontend"
-if _frontend_dir.exists():
-    app.mount("/", StaticFiles(directory=str(_frontend_dir), html=True), name="frontend")
+# Serve frontend static files (switched to the fingerprinted build in lifespan)
+frontend_files = PrecompressedStaticFiles(directory=FRONTEND_DIR, html=True, check_dir=False)
+if FRONTEND_DIR.exists():
+    app.mount("/", frontend_files, name="frontend")
@@ -0,0 +1,195 @@
+"""
+Prometheus metrics, exposed at GET /metrics.
+
+MetricsMiddleware times every HTTP request and labels it by the route template
+(/tickets/{ticket_id}, not /tickets/42) so label cardinality stays bounded.
+Database queries are counted per request by SQLAlchemy engine events into a
+RequestStats object carried in a ContextVar; the threadpool that runs sync
+endpoints copies the context, so the same object is updated there.
+
+With several uvicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory: every worker then writes its samples there and /metrics
+aggregates them (see prometheus_client multiprocess mode).
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+import anyio.to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time until the response is sent",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled", multiprocess_mode="livesum"
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request", "SQL statements executed per request",
+    ["route"], buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME = Histogram(
+    "db_query_duration_seconds_per_request", "Total SQL time per request",
+    ["route"], buckets=LATENCY_BUCKETS,
+)
+THREADPOOL_BUSY = Gauge(
+    "threadpool_busy_threads", "Worker threads running sync endpoints",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_LIMIT = Gauge(
+    "threadpool_max_threads", "Threadpool capacity", multiprocess_mode="livesum"
+)
+UPLOAD_BYTES = Counter("upload_bytes_total", "Bytes of accepted uploads", ["kind"])
+TELEGRAM_SENDS = Counter("telegram_send_total", "Bot API sendMessage calls", ["result"])
+TELEGRAM_LATENCY = Histogram(
+    "telegram_send_duration_seconds", "Bot API sendMessage latency", buckets=LATENCY_BUCKETS
+)
+RATE_LIMIT_REJECTED = Counter(
+    "ratelimit_rejected_total", "Requests answered 429 by app.ratelimit", ["route"]
+)
+RATE_LIMIT_BUCKETS = Gauge(
+    "ratelimit_buckets", "Token buckets held in memory", multiprocess_mode="livesum"
+)
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total",
+    "Coalesced reads by app.coalesce: computed by this request or shared from another",
+    ["flight", "result"],
+)
+
+
+class RequestStats:
+    """Per-request database counters, filled in by the engine event hooks."""
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> RequestStats | None:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+@contextmanager
+def track_queries() -> Iterator[RequestStats]:
+    """Count the database queries of the enclosed code into fresh RequestStats."""
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mount (the static frontend) leaves app_root_path but no route behind.
+    return "static" if "app_root_path" in scope else "unmatched"
+
+
+def observe_request(scope: Scope, status_code: int, elapsed: float, stats: RequestStats) -> None:
+    """Record a served request under its route; also used for /batch sub-requests."""
+    route = route_label(scope)
+    method = scope["method"]
+    HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+    HTTP_LATENCY.labels(method, route).observe(elapsed)
+    DB_QUERIES.labels(route).observe(stats.queries)
+    DB_TIME.labels(route).observe(stats.db_seconds)
+
+
+def _observe_threadpool() -> None:
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_LIMIT.set(limiter.total_tokens)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        elapsed = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, elapsed
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif not message.get("more_body", False):
+                # Background tasks run after this point; they aren't request latency.
+                elapsed = time.perf_counter() - start
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        _observe_threadpool()
+        try:
+            with track_queries() as stats:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            if elapsed is None:
+                elapsed = time.perf_counter() - start
+            observe_request(scope, status_code, elapsed, stats)
+            _observe_threadpool()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -14,10 +14,19 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
 
+PREVIEW_LENGTH = 100  # characters of Ticket.last_message_preview
+
+
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def message_preview(text: str) -> str:
+    """Single-line snippet of a message for Ticket.last_message_preview."""
+    text = " ".join(text.split())
+    return text if len(text) <= PREVIEW_LENGTH else text[:PREVIEW_LENGTH - 1] + "…"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -56,6 +65,11 @@ class Ticket(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=_now, onupdate=_now
     )
+    # Denormalized from messages for the list screen; kept up to date where
+    # messages are added (see _note_messages), filled in by app.backfill.
+    last_message_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_message_preview: Mapped[str | None] = mapped_column(String, nullable=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     author: Mapped["User"] = relationship(
         "User", foreign_keys=[author_id], back_populates="authored_tickets"
@@ -86,7 +100,9 @@ class Message(Base):
     __tablename__ = "messages"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    ticket_id: Mapped[int] = mapped_column(Integer, ForeignKey("tickets.id"), nullable=False)
+    ticket_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("tickets.id"), nullable=False, index=True
+    )
     sender_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey("users.id"), nullable=True
     )
@@ -109,3 +125,90 @@ class MessageFile(Base):
     filesize: Mapped[int] = mapped_column(Integer, nullable=False)
 
     message: Mapped["Message"] = relationship("Message", back_populates="files")
+
+
+class TicketRead(Base):
+    """The last message of a ticket a user has seen, see app.reads."""
+
+    __tablename__ = "ticket_reads"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    # No foreign key: the ticket may be moved to the archive and back.
+    ticket_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    last_read_message_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+# ── Archive ───────────────────────────────────────────────────────────────────
+# Tickets closed long ago, moved out of the live tables by app.archive with
+# their ids and rows unchanged. Same columns as the live tables.
+
+class ArchivedTicket(Base):
+    __tablename__ = "archived_tickets"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    number: Mapped[str] = mapped_column(String, unique=True, index=True)
+    author_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    assigned_to: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=True
+    )
+    status: Mapped[str] = mapped_column(String)
+    is_urgent: Mapped[bool] = mapped_column(Boolean, default=False)
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    description: Mapped[str] = mapped_column(Text, nullable=False)
+    steps: Mapped[str | None] = mapped_column(Text, nullable=True)
+    url: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_message_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_message_preview: Mapped[str | None] = mapped_column(String, nullable=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # When app.archive moved it here, so /tickets/changes can report it removed
+    # from the mine and all tabs. NULL if archived before the column existed.
+    archived_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+
+    author: Mapped["User"] = relationship("User", foreign_keys=[author_id])
+    assignee: Mapped["User | None"] = relationship("User", foreign_keys=[assigned_to])
+    files: Mapped[list["ArchivedTicketFile"]] = relationship("ArchivedTicketFile")
+
+
+class ArchivedTicketFile(Base):
+    __tablename__ = "archived_ticket_files"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ticket_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("archived_tickets.id"), nullable=False, index=True
+    )
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    stored_path: Mapped[str] = mapped_column(String, nullable=False)
+    filesize: Mapped[int] = mapped_column(Integer, nullable=False)
+    uploaded_by: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    uploaded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class ArchivedMessage(Base):
+    __tablename__ = "archived_messages"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    ticket_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("archived_tickets.id"), nullable=False, index=True
+    )
+    sender_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=True
+    )
+    sender_role: Mapped[str] = mapped_column(String, nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    files: Mapped[list["ArchivedMessageFile"]] = relationship("ArchivedMessageFile")
+
+
+class ArchivedMessageFile(Base):
+    __tablename__ = "archived_message_files"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    message_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("archived_messages.id"), nullable=False, index=True
+    )
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    stored_path: Mapped[str] = mapped_column(String, nullable=False)
+    filesize: Mapped[int] = mapped_column(Integer, nullable=False)
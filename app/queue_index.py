@@ -0,0 +1,214 @@
+"""
+In-memory index of live tickets for the support queue (the "all" tab).
+
+Every live ticket is kept as an (updated_at, id) key in sorted lists: one of
+all tickets, one per status and one per urgency. A page of the queue, its
+count and newest change, or the tickets changed since a watermark are then a
+bisect away, with no database query for the ids; only the rows of the page
+are read.
+
+The index follows this process's commits: Session events note every flushed
+Ticket and apply the changes once the transaction commits, so rolled-back
+writes never show up. INSERT/UPDATE/DELETE statements on tickets (archiving,
+restoring) can't be followed row by row and mark the index for a rebuild
+instead. It is loaded on startup and rebuilt every
+`queue_index.resync_seconds` to pick up writes from other processes — the
+archive job, or other workers.
+
+Keys hold naive UTC datetimes, as SQLite returns them.
+"""
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import chain, islice
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import QUEUE_INDEX_RESYNC
+from app.models import Ticket
+
+Key = tuple[datetime, int]
+
+# A commit noted while a rebuild was reading may be missing from its snapshot,
+# if its updated_at was stamped up to this long before the read started.
+LOAD_OVERLAP = timedelta(seconds=2)
+
+
+def utc_naive(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+@dataclass(frozen=True, slots=True)
+class Entry:
+    key: Key
+    status: str
+    is_urgent: bool
+
+
+def _entry(ticket_id: int, status: str, is_urgent: bool, updated_at: datetime) -> Entry:
+    return Entry((utc_naive(updated_at), ticket_id), status, bool(is_urgent))
+
+
+class QueueIndex:
+    def __init__(self, resync: float = QUEUE_INDEX_RESYNC, clock=time.monotonic) -> None:
+        self.resync = resync
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[int, Entry] = {}
+        self._all: list[Key] = []
+        self._by_status: dict[str, list[Key]] = defaultdict(list)
+        self._by_urgency: dict[bool, list[Key]] = {True: [], False: []}
+        self.loaded_at: float | None = None
+
+    # ── Maintenance ──
+
+    def _lists(self, entry: Entry) -> tuple[list[Key], ...]:
+        return self._all, self._by_status[entry.status], self._by_urgency[entry.is_urgent]
+
+    def _insert(self, ticket_id: int, entry: Entry) -> None:
+        self._entries[ticket_id] = entry
+        for keys in self._lists(entry):
+            insort(keys, entry.key)
+
+    def _remove(self, ticket_id: int) -> None:
+        entry = self._entries.pop(ticket_id, None)
+        if entry is not None:
+            for keys in self._lists(entry):
+                del keys[bisect_left(keys, entry.key)]
+
+    def apply(self, changes: dict[int, Entry | None]) -> None:
+        """Upsert (Entry) or drop (None) tickets; an older state never replaces a newer one."""
+        with self._lock:
+            for ticket_id, entry in changes.items():
+                current = self._entries.get(ticket_id)
+                if entry is not None and current is not None and current.key > entry.key:
+                    continue
+                self._remove(ticket_id)
+                if entry is not None:
+                    self._insert(ticket_id, entry)
+
+    def load(self, db: Session) -> None:
+        """Rebuild from the tickets table."""
+        started = utc_naive(datetime.now(timezone.utc)) - LOAD_OVERLAP
+        loaded_at = self.clock()
+        rows = db.execute(select(Ticket.id, Ticket.status, Ticket.is_urgent, Ticket.updated_at)).all()
+        fresh = {row.id: _entry(*row) for row in rows}
+        with self._lock:
+            # Commits applied while we were reading win over the snapshot.
+            for ticket_id, entry in self._entries.items():
+                loaded = fresh.get(ticket_id)
+                if loaded is None and entry.key[0] < started:
+                    continue  # gone from the table, e.g. archived
+                if loaded is None or entry.key > loaded.key:
+                    fresh[ticket_id] = entry
+
+            self._entries = fresh
+            self._all = sorted(entry.key for entry in fresh.values())
+            self._by_status = defaultdict(list)
+            self._by_urgency = {True: [], False: []}
+            for key in self._all:  # already sorted, so appends keep order
+                entry = fresh[key[1]]
+                self._by_status[entry.status].append(key)
+                self._by_urgency[entry.is_urgent].append(key)
+            self.loaded_at = loaded_at
+
+    def invalidate(self) -> None:
+        """Rebuild on next use."""
+        self.loaded_at = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._all.clear()
+            self._by_status.clear()
+            for keys in self._by_urgency.values():
+                keys.clear()
+        self.loaded_at = None
+
+    def refresh(self, db: Session) -> "QueueIndex":
+        """Load or rebuild the index if it's due; returns self."""
+        if self.loaded_at is None or self.clock() - self.loaded_at >= self.resync:
+            self.load(db)
+        return self
+
+    # ── Queries (newest first) ──
+
+    def _source(self, status: str | None, urgent: bool | None) -> tuple[list[Key], bool]:
+        """The smallest sorted list covering the filter, and whether it needs filtering."""
+        if status is None:
+            return (self._all, False) if urgent is None else (self._by_urgency[urgent], False)
+        return self._by_status.get(status, []), urgent is not None
+
+    def _matches(self, key: Key, status: str | None, urgent: bool | None) -> bool:
+        entry = self._entries[key[1]]
+        return (status is None or entry.status == status) and (urgent is None or entry.is_urgent == urgent)
+
+    def page(self, status: str | None = None, urgent: bool | None = None,
+             before: Key | None = None, limit: int | None = None) -> list[int]:
+        """Ids of matching tickets with keys below `before`, newest first."""
+        with self._lock:
+            keys, check = self._source(status, urgent)
+            end = len(keys) if before is None else bisect_left(keys, before)
+            found = (keys[i] for i in range(end - 1, -1, -1))
+            if check:
+                found = (key for key in found if self._matches(key, status, urgent))
+            return [key[1] for key in islice(found, limit)]
+
+    def changed_since(self, since: datetime) -> list[tuple[int, Entry]]:
+        """Tickets with updated_at after `since`, whatever they match, newest first."""
+        with self._lock:
+            start = bisect_right(self._all, (utc_naive(since), sys.maxsize))
+            return [(key[1], self._entries[key[1]]) for key in reversed(self._all[start:])]
+
+    def stats(self, status: str | None = None, urgent: bool | None = None) -> tuple[int, Key | None]:
+        """Count and newest key of matching tickets, for validators."""
+        with self._lock:
+            keys, check = self._source(status, urgent)
+            if not check:
+                return len(keys), keys[-1] if keys else None
+            matching = [key for key in keys if self._matches(key, status, urgent)]
+            return len(matching), matching[-1] if matching else None
+
+
+support_queue = QueueIndex()
+
+
+# ── Following commits ─────────────────────────────────────────────────────────
+
+@event.listens_for(Session, "after_flush")
+def _note_flush(session: Session, flush_context) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Ticket):
+            changes = session.info.setdefault("queue_changes", {})
+            changes[obj.id] = None if obj in session.deleted else _entry(
+                obj.id, obj.status, obj.is_urgent, obj.updated_at
+            )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement(state: ORMExecuteState) -> None:
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    if getattr(table, "name", None) == Ticket.__tablename__:
+        state.session.info["queue_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    changes = session.info.pop("queue_changes", None)
+    if changes:
+        support_queue.apply(changes)
+    if session.info.pop("queue_stale", False):
+        support_queue.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop("queue_changes", None)
+    session.info.pop("queue_stale", None)
@@ -0,0 +1,185 @@
+"""
+Per-client rate limiting with in-memory token buckets, configured by the
+`rate_limits` section of config.yaml:
+
+    rate_limits:
+      default: {rate: 20, burst: 60}            # any request not listed below
+      routes:
+        "GET /tickets": {rate: 2, burst: 10}
+        "POST /tickets/{ticket_id}/messages": {rate: 1, burst: 5}
+
+`rate` is requests per second, `burst` the bucket size. Clients are told apart
+by the JWT subject, or by IP address for requests without a valid token, and
+every (route, client) pair has its own bucket. An empty bucket answers 429
+with Retry-After before the request reaches routing, the database or the
+threadpool.
+
+Sub-requests of POST /batch never pass through middleware. The middleware
+puts itself in the scope under "rate_limit", and app.routers.batch charges
+every item against its own route budget through charge(). The batch itself
+costs one default token, and items without a route budget cost nothing more.
+
+Buckets live in this process only: with several workers a client gets up to
+the budget per worker. They are touched only from the event loop and never
+across an await, so no lock is needed.
+"""
+import math
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.auth import decode_jwt
+from app.config import RATE_LIMITS
+from app.metrics import RATE_LIMIT_BUCKETS, RATE_LIMIT_REJECTED
+
+SWEEP_EVERY = 1024  # checks between sweeps of idle buckets
+
+
+@dataclass(frozen=True)
+class Budget:
+    rate: float   # tokens added per second
+    burst: float  # bucket capacity
+
+    @classmethod
+    def from_config(cls, section: dict) -> "Budget":
+        budget = cls(float(section["rate"]), float(section.get("burst", section["rate"])))
+        if budget.rate <= 0 or budget.burst < 1:
+            raise ValueError(f"rate_limits: rate must be > 0 and burst >= 1, got {section}")
+        return budget
+
+
+@dataclass(frozen=True)
+class RouteBudget:
+    name: str  # "GET /tickets/{ticket_id}", as configured
+    method: str
+    pattern: re.Pattern
+    budget: Budget
+
+
+def parse_limits(section: dict) -> tuple[Budget | None, list[RouteBudget]]:
+    default = Budget.from_config(section["default"]) if section.get("default") else None
+    routes = []
+    for name, budget in (section.get("routes") or {}).items():
+        method, _, path = name.partition(" ")
+        pattern, _, _ = compile_path(path)
+        routes.append(RouteBudget(name, method.upper(), pattern, Budget.from_config(budget)))
+    return default, routes
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated", "refill_seconds")
+
+    def __init__(self, budget: Budget, now: float) -> None:
+        self.tokens = budget.burst
+        self.updated = now
+        self.refill_seconds = budget.burst / budget.rate  # empty → full
+
+
+class RateLimiter:
+    def __init__(self, clock=time.monotonic) -> None:
+        self.clock = clock
+        self.buckets: dict[tuple[str, str], TokenBucket] = {}
+        self._checks = 0
+
+    def acquire(self, route: str, client: str, budget: Budget) -> float:
+        """Take a token; returns 0 if allowed, else seconds until one is available."""
+        now = self.clock()
+        bucket = self.buckets.get((route, client))
+        if bucket is None:
+            bucket = self.buckets[(route, client)] = TokenBucket(budget, now)
+            RATE_LIMIT_BUCKETS.inc()
+        else:
+            bucket.tokens = min(budget.burst, bucket.tokens + (now - bucket.updated) * budget.rate)
+            bucket.updated = now
+
+        self._checks += 1
+        if self._checks % SWEEP_EVERY == 0:
+            self.sweep(now)
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / budget.rate
+
+    def sweep(self, now: float) -> None:
+        """Forget buckets idle long enough to have refilled; a new one starts full anyway."""
+        idle = [k for k, b in self.buckets.items() if now - b.updated >= b.refill_seconds]
+        for key in idle:
+            del self.buckets[key]
+        RATE_LIMIT_BUCKETS.dec(len(idle))
+
+
+@lru_cache(maxsize=4096)
+def _token_subject(token: str) -> str | None:
+    # Verified, not just decoded: a forged token must not spend someone else's budget.
+    try:
+        return str(decode_jwt(token)["sub"])
+    except (ValueError, KeyError):
+        return None
+
+
+def client_key(scope: Scope) -> str:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and (subject := _token_subject(token.strip())):
+                return f"user:{subject}"
+            break
+    # Behind nginx, uvicorn's --proxy-headers puts the real client address here.
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, limits: dict = RATE_LIMITS) -> None:
+        self.app = app
+        self.default, self.routes = parse_limits(limits)
+        self.limiter = RateLimiter()
+
+    def _budget(self, scope: Scope) -> tuple[str, Budget] | None:
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        for route in self.routes:
+            if route.method == scope["method"] and route.pattern.match(path):
+                return route.name, route.budget
+        return ("default", self.default) if self.default else None
+
+    def charge(self, scope: Scope, routes_only: bool = False) -> float:
+        """
+        Take a token for the request; returns 0 if allowed, else seconds until
+        one is available. routes_only skips requests that only the default
+        budget covers.
+        """
+        matched = self._budget(scope)
+        if matched is None or routes_only and matched[0] == "default":
+            return 0.0
+        route, budget = matched
+        retry_after = self.limiter.acquire(route, client_key(scope), budget)
+        if retry_after:
+            RATE_LIMIT_REJECTED.labels(route).inc()
+        return retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self.charge(scope)
+        if retry_after:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        scope["rate_limit"] = self  # for POST /batch items
+        await self.app(scope, receive, send)
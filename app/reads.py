@@ -0,0 +1,83 @@
+"""
+Per-user read markers and unread counts.
+
+ticket_reads holds, per user and ticket, the id of the last message the user
+has seen; get_messages moves it forward. Message ids only grow, so a ticket's
+unread messages are those after the marker sent by someone else — a range
+scan of the messages.ticket_id index. System messages don't count: they
+record actions, often the reader's own.
+"""
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import ArchivedMessage, Message, Ticket, TicketRead
+
+IN_CHUNK = 500  # ticket ids per IN (...) query
+
+
+def mark_read(db: Session, user_id: int, ticket_id: int, message_id: int) -> bool:
+    """Move the user's marker forward to message_id; returns whether it moved. Doesn't commit."""
+    current = db.scalar(
+        select(TicketRead.last_read_message_id)
+        .where(TicketRead.user_id == user_id, TicketRead.ticket_id == ticket_id)
+    )
+    if current is not None and current >= message_id:
+        return False  # the usual case: no write, no lock
+    stmt = insert(TicketRead).values(
+        user_id=user_id, ticket_id=ticket_id, last_read_message_id=message_id
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[TicketRead.user_id, TicketRead.ticket_id],
+        # A concurrent read may have moved it further already.
+        set_={"last_read_message_id": func.max(
+            TicketRead.last_read_message_id, stmt.excluded.last_read_message_id
+        )},
+    ))
+    return True
+
+
+def _unread(model, user_id: int) -> tuple:
+    """Join to the user's marker and conditions selecting unread messages of `model`."""
+    join = and_(TicketRead.ticket_id == model.ticket_id, TicketRead.user_id == user_id)
+    conditions = (
+        model.id > func.coalesce(TicketRead.last_read_message_id, 0),
+        model.sender_id != user_id,  # NULL (system) never compares true
+    )
+    return join, conditions
+
+
+def unread_counts(db: Session, user_id: int, ticket_ids: list[int],
+                  include_archive: bool = False) -> dict[int, int]:
+    """Unread messages per ticket; tickets without any are left out."""
+    counts: dict[int, int] = {}
+    for model in (Message, ArchivedMessage) if include_archive else (Message,):
+        join, conditions = _unread(model, user_id)
+        for start in range(0, len(ticket_ids), IN_CHUNK):
+            counts.update(db.execute(
+                select(model.ticket_id, func.count(model.id))
+                .outerjoin(TicketRead, join)
+                .where(model.ticket_id.in_(ticket_ids[start:start + IN_CHUNK]), *conditions)
+                .group_by(model.ticket_id)
+            ).all())
+    return counts
+
+
+def unread_total(db: Session, user_id: int) -> tuple[int, int]:
+    """(messages, tickets) unread in live tickets the user wrote or is assigned to."""
+    join, conditions = _unread(Message, user_id)
+    messages, tickets = db.execute(
+        select(func.count(Message.id), func.count(func.distinct(Message.ticket_id)))
+        .join(Ticket, Ticket.id == Message.ticket_id)
+        .outerjoin(TicketRead, join)
+        .where(or_(Ticket.author_id == user_id, Ticket.assigned_to == user_id), *conditions)
+    ).one()
+    return messages, tickets
+
+
+def read_state(db: Session, user_id: int) -> tuple[int, int]:
+    """Fingerprint of the user's markers; changes whenever one moves."""
+    return tuple(db.execute(
+        select(func.count(), func.coalesce(func.sum(TicketRead.last_read_message_id), 0))
+        .where(TicketRead.user_id == user_id)
+    ).one())
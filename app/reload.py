@@ -0,0 +1,88 @@
+"""
+Config hot reload: SIGHUP (`systemctl reload`) or a change of config.yaml's
+mtime swaps the roles snapshot in app.config without restarting the worker.
+
+Roles are stored on User rows at login and checked from there, so a reload
+also rewrites users.role for everyone whose role changed — logged-in users
+get their new permissions on the next request, without signing in again.
+"""
+import asyncio
+import logging
+import signal
+
+from sqlalchemy import not_, update
+from sqlalchemy.orm import Session
+
+from app.config import Roles, reload_config, roles
+from app.database import SessionLocal
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+CONFIG_POLL_INTERVAL = 5.0  # seconds between config.yaml mtime checks
+
+
+def apply_roles(db: Session, snapshot: Roles) -> int:
+    """Bring users.role in line with the snapshot; returns rows changed."""
+    privileged = snapshot.admins | snapshot.support
+    statements = [
+        update(User)
+        .where(User.telegram_id.in_(snapshot.admins), User.role != "admin")
+        .values(role="admin"),
+        update(User)
+        .where(User.telegram_id.in_(snapshot.support - snapshot.admins), User.role != "support")
+        .values(role="support"),
+        update(User)
+        .where(not_(User.telegram_id.in_(privileged)), User.role != "author")
+        .values(role="author"),
+    ]
+    changed = sum(db.execute(stmt).rowcount for stmt in statements)
+    db.commit()
+    return changed
+
+
+def reload_roles(force: bool = False) -> bool:
+    """Reload config.yaml and sync stored roles; returns True if roles changed."""
+    try:
+        snapshot = reload_config(force=force)
+    except Exception as exc:
+        logger.error("Config reload failed, keeping current roles: %s", exc)
+        return False
+    if snapshot is None:
+        return False
+    with SessionLocal() as db:
+        changed = apply_roles(db, snapshot)
+    logger.info(
+        "Roles reloaded: %d admins, %d support, %d users updated",
+        len(snapshot.admins), len(snapshot.support), changed,
+    )
+    return True
+
+
+async def watch_config(interval: float = CONFIG_POLL_INTERVAL) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(reload_roles)
+
+
+def sync_roles_on_startup() -> None:
+    with SessionLocal() as db:
+        apply_roles(db, roles())
+
+
+def install_sighup_handler(loop: asyncio.AbstractEventLoop) -> bool:
+    """Reload on SIGHUP; returns False where signals aren't available (Windows)."""
+    try:
+        loop.add_signal_handler(
+            signal.SIGHUP, lambda: loop.run_in_executor(None, reload_roles, True)
+        )
+    except (AttributeError, NotImplementedError, RuntimeError):
+        return False
+    return True
+
+
+def remove_sighup_handler(loop: asyncio.AbstractEventLoop) -> None:
+    try:
+        loop.remove_signal_handler(signal.SIGHUP)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        pass
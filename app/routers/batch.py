@@ -0,0 +1,164 @@
+"""
+POST /batch — several read-only API calls in one round trip.
+
+Sub-requests are dispatched in-process straight to the matching API route, so
+they skip the HTTP stack and the middleware (no per-item compression or CORS).
+Rate limits still apply per item: each is charged against its own route
+budget (see app.ratelimit), and an exhausted one answers 429 for that item.
+Metrics are recorded per item under its route as well (see app.metrics).
+The batch resolves the bearer token once and hands the user id to every
+sub-request through request.state (see get_current_user); sequential batches
+also share one DB session (see get_db). With parallel=true each sub-request
+runs concurrently on its own session and loads the user there.
+"""
+import asyncio
+import logging
+import math
+import time
+from urllib.parse import urlsplit
+
+import orjson
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+from starlette.routing import Match
+from starlette.types import Message
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.metrics import observe_request, track_queries
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["batch"])
+
+BATCH_MAX_REQUESTS = 20
+# Read endpoints that may be batched; file downloads stream and stay out.
+BATCH_PREFIXES = ("/tickets", "/auth/me")
+
+
+class BatchItem(BaseModel):
+    id: str = Field(max_length=64)
+    path: str = Field(max_length=2048)  # e.g. "/tickets/5/messages?after_id=10"
+    etag: str | None = None  # sent as If-None-Match
+
+
+class BatchRequest(BaseModel):
+    requests: list[BatchItem] = Field(min_length=1, max_length=BATCH_MAX_REQUESTS)
+    parallel: bool = False
+
+
+class BatchItemResult(BaseModel):
+    id: str
+    status: int
+    etag: str | None = None
+    body: object = None
+
+
+class BatchResponse(BaseModel):
+    responses: list[BatchItemResult]
+
+
+def _allowed(path: str) -> bool:
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in BATCH_PREFIXES)
+
+
+def _error(item: BatchItem, status: int, detail: str) -> dict:
+    return {"id": item.id, "status": status, "body": {"detail": detail}}
+
+
+async def _dispatch(request: Request, item: BatchItem, state: dict) -> dict:
+    url = urlsplit(item.path)
+    if url.scheme or url.netloc or not _allowed(url.path) or "/../" in url.path + "/":
+        return _error(item, 400, "Path is not allowed in a batch")
+
+    headers = [(b"authorization", request.headers.get("authorization", "").encode("latin-1"))]
+    if item.etag:
+        headers.append((b"if-none-match", item.etag.encode("latin-1")))
+    scope = {
+        **request.scope,
+        "method": "GET",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "state": state,
+    }
+
+    limits = request.scope.get("rate_limit")
+    if limits is not None:
+        retry_after = limits.charge(scope, routes_only=True)
+        if retry_after:
+            result = _error(item, 429, "Too many requests")
+            result["body"]["retry_after"] = math.ceil(retry_after)
+            return result
+
+    route = next(
+        (
+            r for r in request.app.router.routes
+            if isinstance(r, APIRoute) and r.matches(scope)[0] is Match.FULL
+        ),
+        None,
+    )
+    if route is None:
+        return _error(item, 404, "Not found")
+    scope.update(route.matches(scope)[1])
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    start: Message = {}
+    chunks: list[bytes] = []
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            start.update(message)
+        else:
+            chunks.append(message.get("body", b""))
+
+    started = time.perf_counter()
+    try:
+        with track_queries() as stats:
+            await route.handle(scope, receive, send)
+    except Exception:
+        logger.exception("Batch sub-request %s failed", item.path)
+        return _error(item, 500, "Internal server error")
+    finally:
+        observe_request(scope, start.get("status", 500), time.perf_counter() - started, stats)
+
+    response_headers = {k.lower(): v for k, v in start.get("headers", [])}
+    body = b"".join(chunks)
+    result = {"id": item.id, "status": start.get("status", 500), "body": None}
+    if b"etag" in response_headers:
+        result["etag"] = response_headers[b"etag"].decode("latin-1")
+    if body and response_headers.get(b"content-type", b"").startswith(b"application/json"):
+        # Already-encoded JSON is embedded as is, without a parse/dump round trip.
+        result["body"] = orjson.Fragment(body)
+    return result
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(
+    payload: BatchRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Run up to BATCH_MAX_REQUESTS GET sub-requests and return their statuses and
+    bodies in request order. Each item may carry an ETag; an unchanged resource
+    comes back as 304 with a null body.
+    """
+    # Only the id: the user instance belongs to this session and thread.
+    state = {**request.scope.get("state", {}), "user_id": current_user.id}
+    if payload.parallel:
+        results = await asyncio.gather(
+            *(_dispatch(request, item, dict(state)) for item in payload.requests)
+        )
+    else:
+        state["db"] = db
+        results = [await _dispatch(request, item, state) for item in payload.requests]
+    return ORJSONResponse({"responses": results})
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from app import reads
+from app.auth import create_jwt
+from app.database import get_db
+from app.routers.messages import MessageOut
+from app.routers.tickets import (
+    TicketOut,
+    TicketSummary,
+    UnreadBadge,
+    _check_read_access,
+    _find_ticket,
+    _list_conditions,
+    _message_model,
+    _summary_rows,
+    _tab_counts,
+    _unread_context,
+)
+from app.routers.users import UserOut, _login
+from app.serialization import json_response
+
+router = APIRouter(tags=["bootstrap"])
+
+BOOTSTRAP_TAB = "mine"
+BOOTSTRAP_PAGE_SIZE = 50
+BOOTSTRAP_MESSAGES = 50
+
+
+class BootstrapRequest(BaseModel):
+    initData: str
+    startParam: str | None = None  # Telegram start_param, e.g. "ticket_42"
+
+
+class BootstrapResponse(BaseModel):
+    token: str
+    user: UserOut
+    tab: str
+    tickets: list[TicketSummary]
+    counts: dict[str, int]
+    unread: UnreadBadge
+    ticket: TicketOut | None = None
+    messages: list[MessageOut] | None = None
+    has_more_messages: bool = False
+
+
+def _deep_link_ticket_id(start_param: str | None) -> int | None:
+    if not start_param or not start_param.startswith("ticket_"):
+        return None
+    try:
+        return int(start_param.removeprefix("ticket_"))
+    except ValueError:
+        return None
+
+
+@router.post("/bootstrap", response_model=BootstrapResponse)
+def bootstrap(payload: BootstrapRequest, db: Session = Depends(get_db)):
+    """
+    Everything the Mini App needs on cold start in one round trip: token, user,
+    first page of the default tab, tab counts and, for a ticket_N deep link,
+    the ticket with its latest messages.
+    """
+    user = _login(db, payload.initData)
+    tickets = _summary_rows(db, _list_conditions(BOOTSTRAP_TAB, None, user), limit=BOOTSTRAP_PAGE_SIZE)
+    messages, unread_tickets = reads.unread_total(db, user.id)
+    content = {
+        "token": create_jwt(user.id, user.telegram_id, user.role),
+        "user": user,
+        "tab": BOOTSTRAP_TAB,
+        "tickets": tickets,
+        "counts": _tab_counts(db, user),
+        "unread": {"messages": messages, "tickets": unread_tickets},
+    }
+
+    marked = False
+    ticket_id = _deep_link_ticket_id(payload.startParam)
+    ticket = _find_ticket(db, ticket_id) if ticket_id is not None else None
+    if ticket is not None:
+        try:
+            _check_read_access(ticket, user)
+        except HTTPException:
+            ticket = None
+    if ticket is not None:
+        model = _message_model(ticket)
+        latest = list(db.scalars(
+            select(model)
+            .where(model.ticket_id == ticket.id)
+            .options(selectinload(model.files))
+            .order_by(model.id.desc())
+            .limit(BOOTSTRAP_MESSAGES + 1)
+        ))
+        content["ticket"] = ticket
+        content["messages"] = latest[:BOOTSTRAP_MESSAGES][::-1]
+        content["has_more_messages"] = len(latest) > BOOTSTRAP_MESSAGES
+        marked = bool(latest) and reads.mark_read(db, user.id, ticket.id, latest[0].id)
+
+    response = json_response(
+        BootstrapResponse, content, context=_unread_context(db, user, tickets, BOOTSTRAP_TAB)
+    )
+    if marked:
+        db.commit()  # after serializing: a commit expires the loaded rows
+    return response
@@ -1,21 +1,44 @@
-import uuid
+import time
 from pathlib import Path
+from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
 from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.config import FORBIDDEN_EXTENSIONS, MAX_FILE_SIZE, UPLOAD_DIR
+from app import storage
+from app.config import (
+    FILE_SERVING_MODE,
+    FORBIDDEN_EXTENSIONS,
+    MAX_FILE_SIZE,
+    UPLOAD_DIR,
+    X_ACCEL_LOCATION,
+)
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models import Ticket, TicketFile, User
-from app.routers.tickets import _check_read_access, _touch_ticket
+from app.metrics import UPLOAD_BYTES
+from app.models import (
+    ArchivedMessage,
+    ArchivedMessageFile,
+    ArchivedTicketFile,
+    Message,
+    MessageFile,
+    TicketFile,
+    User,
+)
+from app.routers.tickets import (
+    FileLinks,
+    _check_read_access,
+    _find_ticket,
+    _get_live_ticket,
+    _touch_ticket,
+)
 
 router = APIRouter(tags=["files"])
 
 
-class TicketFileOut(BaseModel):
+class TicketFileOut(FileLinks):
     id: int
     filename: str
     stored_path: str
@@ -35,9 +58,7 @@ async def upload_file(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.get(Ticket, ticket_id)
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    ticket = _get_live_ticket(db, ticket_id)
     _check_read_access(ticket, current_user)
 
     suffix = Path(file.filename or "file").suffix.lower()
@@ -48,12 +69,9 @@ async def upload_file(
     if len(content) > MAX_FILE_SIZE:
         raise HTTPException(status_code=400, detail="File too large (max 10 MB)")
 
-    dest_dir = UPLOAD_DIR / str(ticket_id)
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    safe_name = f"{uuid.uuid4().hex}_{Path(file.filename or 'file').name}"
-    stored_path = str(Path(str(ticket_id)) / safe_name)
-
-    (UPLOAD_DIR / stored_path).write_bytes(content)
+    stored_path = storage.new_stored_path(file.filename)
+    storage.save(UPLOAD_DIR, stored_path, content)
+    UPLOAD_BYTES.labels("ticket").inc(len(content))
 
     tf = TicketFile(
         ticket_id=ticket_id,
@@ -69,18 +87,89 @@ async def upload_file(
     return tf
 
 
-@router.get("/public/files/{file_path:path}")
-def download_public_file(file_path: str):
-    """Download a file publicly without authentication."""
+def _owning_ticket_id(db: Session, stored_path: str) -> int | None:
+    """Ticket a stored file belongs to, via ticket or message files, live or archived."""
+    for file_model in (TicketFile, ArchivedTicketFile):
+        ticket_id = db.scalar(
+            select(file_model.ticket_id).where(file_model.stored_path == stored_path).limit(1)
+        )
+        if ticket_id is not None:
+            return ticket_id
+    for message_model, file_model in ((Message, MessageFile), (ArchivedMessage, ArchivedMessageFile)):
+        ticket_id = db.scalar(
+            select(message_model.ticket_id)
+            .join(file_model, file_model.message_id == message_model.id)
+            .where(file_model.stored_path == stored_path)
+            .limit(1)
+        )
+        if ticket_id is not None:
+            return ticket_id
+    return None
+
+
+def _locate(file_path: str) -> Path:
+    """File on disk for a requested path, legacy or sharded; 403/404 on failure."""
     # Validate path doesn't escape uploads dir
     full_path = (UPLOAD_DIR / file_path).resolve()
     if not str(full_path).startswith(str(UPLOAD_DIR.resolve())):
         raise HTTPException(status_code=403, detail="Invalid path")
 
-    if not full_path.exists():
+    located = storage.locate(UPLOAD_DIR, file_path)
+    if located is None:
         raise HTTPException(status_code=404, detail="File not found")
-
-    return FileResponse(str(full_path), filename=full_path.name)
+    return located
+
+
+def _content_disposition(filename: str, disposition: str = "attachment") -> str:
+    # Same header FileResponse(filename=...) sends.
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def _send_file(
+    full_path: Path, disposition: str = "attachment", headers: dict[str, str] | None = None
+) -> Response:
+    """
+    Stream the file from Python, or hand it off to the reverse proxy per
+    file_serving.mode: the proxy then sends it with sendfile and the worker is
+    free as soon as the access check is done.
+    """
+    headers = dict(headers or {})
+    if FILE_SERVING_MODE == "app":
+        return FileResponse(
+            str(full_path), filename=full_path.name,
+            content_disposition_type=disposition, headers=headers,
+        )
+
+    headers["Content-Disposition"] = _content_disposition(full_path.name, disposition)
+    if FILE_SERVING_MODE == "x-accel":
+        relative = full_path.relative_to(UPLOAD_DIR).as_posix()
+        headers["X-Accel-Redirect"] = X_ACCEL_LOCATION.rstrip("/") + "/" + quote(relative)
+    else:
+        # Raw UTF-8 path bytes: the header is latin-1 and the proxy reads it as bytes.
+        headers["X-Sendfile"] = str(full_path.resolve()).encode().decode("latin-1")
+    return Response(headers=headers)
+
+
+@router.get(storage.SIGNED_PREFIX + "/{scope}/{expires}/{signature}/{file_path:path}")
+def download_signed_file(scope: str, expires: int, signature: str, file_path: str):
+    """
+    Download via a signed URL from FileOut.url / preview_url. The signature
+    stands in for the token, so there's no auth and no database query, and
+    the response may be cached by browsers and proxies until it expires.
+    """
+    if not storage.verify_signature(scope, expires, signature, file_path):
+        raise HTTPException(status_code=403, detail="Invalid or expired link")
+    full_path = _locate(file_path)
+
+    headers = {
+        "Cache-Control": f"public, max-age={max(0, expires - int(time.time()))}, immutable",
+        "X-Content-Type-Options": "nosniff",
+    }
+    disposition = "inline" if scope == "inline" else "attachment"
+    return _send_file(full_path, disposition, headers)
 
 
 @router.get("/files/{file_path:path}")
@@ -90,31 +179,17 @@ def download_file(
     current_user: User = Depends(get_current_user),
 ):
     """Download a file. Access is checked via ticket ownership."""
-    # Validate path doesn't escape uploads dir
-    full_path = (UPLOAD_DIR / file_path).resolve()
-    if not str(full_path).startswith(str(UPLOAD_DIR.resolve())):
-        raise HTTPException(status_code=403, detail="Invalid path")
-
-    if not full_path.exists():
+    full_path = _locate(file_path)
+
+    # Check access via the ticket the file is attached to. A legacy path may
+    # already be rewritten by the layout migration (see app.storage).
+    ticket_id = _owning_ticket_id(db, file_path)
+    if ticket_id is None and (moved := storage.migrated_path(file_path)) is not None:
+        ticket_id = _owning_ticket_id(db, moved)
+    if ticket_id is None:
         raise HTTPException(status_code=404, detail="File not found")
+    ticket = _find_ticket(db, ticket_id)
+    if ticket:
+        _check_read_access(ticket, current_user)
 
-    # Check access: find ticket_file or message_file with this stored_path
-    tf = db.query(TicketFile).filter(TicketFile.stored_path == file_path).first()
-    if tf:
-        ticket = db.get(Ticket, tf.ticket_id)
-        if ticket:
-            _check_read_access(ticket, current_user)
-    else:
-        # Try message file — resolve ticket via message
-        from app.models import Message, MessageFile
-        mf = db.query(MessageFile).filter(MessageFile.stored_path == file_path).first()
-        if mf:
-            msg = db.get(Message, mf.message_id)
-            if msg:
-                ticket = db.get(Ticket, msg.ticket_id)
-                if ticket:
-                    _check_read_access(ticket, current_user)
-        else:
-            raise HTTPException(status_code=404, detail="File not found")
-
-    return FileResponse(str(full_path), filename=full_path.name)
+    return _send_file(full_path)
@@ -1,22 +1,32 @@
-import uuid
 from datetime import datetime
 from pathlib import Path
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, UploadFile, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
+from app import reads, storage
 from app.config import FORBIDDEN_EXTENSIONS, MAX_FILE_SIZE, UPLOAD_DIR
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models import Message, MessageFile, Ticket, User
-from app.routers.tickets import _check_read_access, _touch_ticket
+from app.metrics import UPLOAD_BYTES
+from app.models import Message, MessageFile, User
+from app.routers.tickets import (
+    FileLinks,
+    _check_read_access,
+    _find_ticket,
+    _get_live_ticket,
+    _message_model,
+    _note_messages,
+    _touch_ticket,
+)
+from app.serialization import json_response
 from app.bot import notify_new_message
 
 router = APIRouter(tags=["messages"])
 
 
-class MessageFileOut(BaseModel):
+class MessageFileOut(FileLinks):
     id: int
     filename: str
     stored_path: str
@@ -40,21 +50,25 @@ class MessageOut(BaseModel):
 @router.get("/tickets/{ticket_id}/messages", response_model=list[MessageOut])
 def get_messages(
     ticket_id: int,
+    after_id: int | None = Query(None, ge=0),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.get(Ticket, ticket_id)
+    ticket = _find_ticket(db, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     _check_read_access(ticket, current_user)
 
-    messages = (
-        db.query(Message)
-        .filter(Message.ticket_id == ticket_id)
-        .order_by(Message.created_at.asc())
-        .all()
-    )
-    return messages
+    model = _message_model(ticket)
+    q = db.query(model).filter(model.ticket_id == ticket_id)
+    if after_id is not None:
+        # Messages are append-only, so the last seen id is a complete watermark.
+        q = q.filter(model.id > after_id)
+    messages = q.options(selectinload(model.files)).order_by(model.created_at.asc()).all()
+    response = json_response(list[MessageOut], messages)
+    if messages and reads.mark_read(db, current_user.id, ticket_id, max(m.id for m in messages)):
+        db.commit()  # after serializing: a commit expires the loaded rows
+    return response
 
 
 @router.post(
@@ -70,9 +84,7 @@ async def send_message(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.get(Ticket, ticket_id)
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    ticket = _get_live_ticket(db, ticket_id)
     _check_read_access(ticket, current_user)
 
     if ticket.status == "closed":
@@ -88,21 +100,22 @@ async def send_message(
     db.flush()  # get msg.id
 
     if file is not None:
-        await _attach_file_to_message(db, msg, ticket_id, file)
+        await _attach_file_to_message(db, msg, file)
 
     _touch_ticket(ticket)
+    _note_messages(ticket, msg.text, msg.created_at)
+    reads.mark_read(db, current_user.id, ticket_id, msg.id)  # they've seen the chat they answer
     db.commit()
     db.refresh(msg)
 
     _ = ticket.author  # pre-load relationship while session is open
+    db.refresh(current_user)
     background_tasks.add_task(notify_new_message, ticket, msg, current_user)
 
     return msg
 
 
-async def _attach_file_to_message(
-    db: Session, msg: Message, ticket_id: int, upload: UploadFile
-) -> None:
+async def _attach_file_to_message(db: Session, msg: Message, upload: UploadFile) -> None:
     suffix = Path(upload.filename or "file").suffix.lower()
     if suffix in FORBIDDEN_EXTENSIONS:
         raise HTTPException(status_code=400, detail=f"File type {suffix} is not allowed")
@@ -111,12 +124,9 @@ async def _attach_file_to_message(
     if len(content) > MAX_FILE_SIZE:
         raise HTTPException(status_code=400, detail="File too large (max 10 MB)")
 
-    dest_dir = UPLOAD_DIR / str(ticket_id)
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    safe_name = f"{uuid.uuid4().hex}_{Path(upload.filename or 'file').name}"
-    stored_path = str(Path(str(ticket_id)) / safe_name)
-
-    (UPLOAD_DIR / stored_path).write_bytes(content)
+    stored_path = storage.new_stored_path(upload.filename)
+    storage.save(UPLOAD_DIR, stored_path, content)
+    UPLOAD_BYTES.labels("message").inc(len(content))
 
     mf = MessageFile(
         message_id=msg.id,
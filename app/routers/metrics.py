@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from app.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint; keep it reachable only from the monitoring host."""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
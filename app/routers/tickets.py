@@ -1,21 +1,61 @@
-from datetime import datetime, timezone
+import hashlib
+import heapq
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
-from pydantic import BaseModel
-from sqlalchemy import extract, func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from typing import Literal
 
+from pydantic import BaseModel, Field, FieldSerializationInfo, computed_field, field_serializer
+from sqlalchemy import and_, case, extract, func, insert, not_, or_, select, true
+from sqlalchemy.orm import Session, aliased, selectinload
+
+from app import reads, storage
+from app.archive import restore_ticket
+from app.coalesce import SingleFlight
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models import Message, Ticket, TicketFile, User
-from app.bot import notify_new_ticket, notify_status_changed, notify_assigned, notify_urgent
+from app.models import (
+    ArchivedMessage,
+    ArchivedTicket,
+    Message,
+    Ticket,
+    TicketFile,
+    User,
+    message_preview,
+)
+from app.queue_index import Key, support_queue, utc_naive
+from app.serialization import json_response, validate
+from app.bot import (
+    notify_assigned,
+    notify_batch,
+    notify_new_ticket,
+    notify_status_changed,
+    notify_urgent,
+)
 
 router = APIRouter(prefix="/tickets", tags=["tickets"])
 
 
 # ── Schemas ──────────────────────────────────────────────────────────────────
 
-class FileOut(BaseModel):
+class FileLinks(BaseModel):
+    """Signed download / image preview URLs of an attachment, see app.storage."""
+
+    stored_path: str
+
+    @computed_field
+    @property
+    def url(self) -> str:
+        return storage.signed_url(self.stored_path)
+
+    @computed_field
+    @property
+    def preview_url(self) -> str | None:
+        return storage.preview_url(self.stored_path)
+
+
+class FileOut(FileLinks):
     id: int
     filename: str
     stored_path: str
@@ -34,7 +74,20 @@ class UserShort(BaseModel):
     model_config = {"from_attributes": True}
 
 
-class TicketOut(BaseModel):
+class UnreadCount(BaseModel):
+    """
+    `unread` of list rows: messages the caller hasn't seen, passed to the dump
+    as context={"unread": {ticket_id: count}} so one validated list can be
+    serialized for different users. Absent context leaves it None.
+    """
+
+    @field_serializer("unread", check_fields=False)
+    def _unread(self, value: int | None, info: FieldSerializationInfo) -> int | None:
+        counts = (info.context or {}).get("unread")
+        return value if counts is None else counts.get(self.id, 0)
+
+
+class TicketOut(UnreadCount):
     id: int
     number: str
     status: str
@@ -48,10 +101,52 @@ class TicketOut(BaseModel):
     files: list[FileOut]
     created_at: datetime
     updated_at: datetime
+    last_message_at: datetime | None
+    last_message_preview: str | None
+    message_count: int
+    unread: int | None = None
 
     model_config = {"from_attributes": True}
 
 
+class TicketSummary(UnreadCount):
+    """Row of the ticket list screen (GET /tickets?view=compact)."""
+
+    id: int
+    number: str
+    status: str
+    is_urgent: bool
+    title: str
+    assigned_to: int | None
+    author_username: str | None
+    author_name: str
+    assignee_name: str | None
+    updated_at: datetime
+    last_message_at: datetime | None
+    last_message_preview: str | None
+    message_count: int
+    unread: int | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class TicketChanges(BaseModel):
+    changed: list[TicketOut]
+    removed: list[int]
+    watermark: datetime
+
+
+class TicketSummaryChanges(BaseModel):
+    changed: list[TicketSummary]
+    removed: list[int]
+    watermark: datetime
+
+
+class UnreadBadge(BaseModel):
+    messages: int
+    tickets: int
+
+
 class TicketCreate(BaseModel):
     title: str
     description: str
@@ -76,6 +171,30 @@ class UrgentUpdate(BaseModel):
     is_urgent: bool
 
 
+BULK_MAX_OPERATIONS = 200
+LIST_PAGE_MAX = 200
+IN_CHUNK = 500  # ids per IN (...) query when rows are read by id
+
+
+class BulkOperation(BaseModel):
+    ticket_id: int
+    action: Literal["status", "assign", "urgent"]
+    status: str | None = None      # for action="status"
+    is_urgent: bool | None = None  # for action="urgent"
+
+
+class BulkRequest(BaseModel):
+    operations: list[BulkOperation] = Field(min_length=1, max_length=BULK_MAX_OPERATIONS)
+
+
+class BulkResult(BaseModel):
+    ticket_id: int
+    action: str
+    ok: bool
+    status_code: int
+    detail: str | None = None
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 VALID_TRANSITIONS: dict[str, list[str]] = {
@@ -90,27 +209,255 @@ VALID_TRANSITIONS: dict[str, list[str]] = {
 AUTHOR_ALLOWED_TARGETS = {"closed", "reopened"}  # author can only go to these
 SUPPORT_ALLOWED_TARGETS = {"in_progress", "on_pause", "biz_review", "closed"}
 
+# updated_at is stamped before commit, so a slow transaction can land with a
+# timestamp slightly behind one that's already visible. Watermarks trail "now"
+# by this much; the overlap only re-sends a few recent rows.
+CHANGES_OVERLAP = timedelta(seconds=2)
+
+# Shared staff list tabs, see list_tickets.
+list_flights = SingleFlight("ticket_list")
+
+# Everything TicketOut renders, loaded in three IN queries instead of per row.
+TICKET_OUT_LOADERS = (
+    selectinload(Ticket.author),
+    selectinload(Ticket.assignee),
+    selectinload(Ticket.files),
+)
+ARCHIVED_TICKET_OUT_LOADERS = (
+    selectinload(ArchivedTicket.author),
+    selectinload(ArchivedTicket.assignee),
+    selectinload(ArchivedTicket.files),
+)
+OUT_LOADERS = {Ticket: TICKET_OUT_LOADERS, ArchivedTicket: ARCHIVED_TICKET_OUT_LOADERS}
+
 
 def _generate_number(db: Session) -> str:
     year = datetime.now(timezone.utc).year
-    count = (
-        db.query(func.count(Ticket.id))
-        .filter(extract("year", Ticket.created_at) == year)
+    # Archived tickets keep their numbers, so they count too.
+    count = sum(
+        db.query(func.count(entity.id))
+        .filter(extract("year", entity.created_at) == year)
         .scalar()
         or 0
+        for entity in (Ticket, ArchivedTicket)
     )
     return f"#{year}-{count + 1:03d}"
 
 
-def _add_system_message(db: Session, ticket_id: int, text: str) -> None:
-    msg = Message(ticket_id=ticket_id, sender_id=None, sender_role="system", text=text)
-    db.add(msg)
+def _add_system_message(db: Session, ticket: Ticket, text: str) -> None:
+    now = datetime.now(timezone.utc)
+    db.add(Message(ticket_id=ticket.id, sender_id=None, sender_role="system", text=text, created_at=now))
+    _note_messages(ticket, text, now)
+    db.flush()  # before the ticket can be noted again, see _note_messages
+
+
+def _note_messages(ticket: Ticket, last_text: str, at: datetime, count: int = 1) -> None:
+    """
+    Keep the ticket's last-message columns in step with `count` messages just
+    added to it. The count is added in SQL so concurrent senders can't lose
+    an increment; flush before noting the same ticket again, or the second
+    expression replaces the first.
+    """
+    ticket.last_message_at = at
+    ticket.last_message_preview = message_preview(last_text)
+    ticket.message_count = Ticket.message_count + count
 
 
 def _touch_ticket(ticket: Ticket) -> None:
     ticket.updated_at = datetime.now(timezone.utc)
 
 
+def _list_conditions(filter: str, urgent: bool | None, user: User, entity=Ticket) -> list:
+    """WHERE clauses for a list tab; raises 403 for tabs the role can't see."""
+    conditions = []
+    if filter == "all":
+        if user.role not in ("support", "admin"):
+            raise HTTPException(status_code=403, detail="Access denied")
+    elif filter == "mine":
+        conditions.append(entity.author_id == user.id)
+    elif filter == "closed":
+        conditions.append(entity.status == "closed")
+        if user.role == "author":
+            conditions.append(entity.author_id == user.id)
+
+    if urgent is not None:
+        conditions.append(entity.is_urgent == urgent)
+    return conditions
+
+
+def _tab_entities(filter: str) -> tuple:
+    """Tables a list tab reads: the closed tab also covers the archive."""
+    return (Ticket, ArchivedTicket) if filter == "closed" else (Ticket,)
+
+
+def _find_ticket(db: Session, ticket_id: int) -> Ticket | ArchivedTicket | None:
+    """The live ticket, or its archived copy for read-only use."""
+    return db.get(Ticket, ticket_id) or db.get(ArchivedTicket, ticket_id)
+
+
+def _message_model(ticket: Ticket | ArchivedTicket) -> type[Message] | type[ArchivedMessage]:
+    return ArchivedMessage if isinstance(ticket, ArchivedTicket) else Message
+
+
+def _get_live_ticket(db: Session, ticket_id: int) -> Ticket:
+    """Ticket to modify; an archived one has to be reopened first."""
+    ticket = db.get(Ticket, ticket_id)
+    if ticket is not None:
+        return ticket
+    if db.get(ArchivedTicket, ticket_id) is not None:
+        raise HTTPException(status_code=409, detail="Ticket is archived, reopen it first")
+    raise HTTPException(status_code=404, detail="Ticket not found")
+
+
+def _unarchive(db: Session, archived: ArchivedTicket) -> Ticket:
+    """Move an archived ticket, with pending changes, back to the live tables."""
+    db.flush()
+    restore_ticket(db, archived.id)
+    db.expunge(archived)
+    return db.get(Ticket, archived.id)
+
+
+def _tab_counts(db: Session, user: User) -> dict[str, int]:
+    """Ticket count of every tab the user can open, in one aggregate query."""
+    tabs = ["mine", "closed"]
+    if user.role in ("support", "admin"):
+        tabs.insert(1, "all")
+    columns = []
+    for tab in tabs:
+        conditions = _list_conditions(tab, None, user)
+        match = and_(*conditions) if conditions else true()
+        columns.append(func.coalesce(func.sum(case((match, 1), else_=0)), 0).label(tab))
+    counts = dict(db.execute(select(*columns).select_from(Ticket)).one()._mapping)
+    counts["closed"] += db.scalar(
+        select(func.count(ArchivedTicket.id))
+        .where(*_list_conditions("closed", None, user, ArchivedTicket))
+    )
+    return counts
+
+
+def _summary_rows(db: Session, conditions: list, limit: int | None = None, entity=Ticket):
+    """Compact list rows from one joined Core query — no ORM identities built."""
+    author = aliased(User)
+    assignee = aliased(User)
+    stmt = (
+        select(
+            entity.id,
+            entity.number,
+            entity.status,
+            entity.is_urgent,
+            entity.title,
+            entity.assigned_to,
+            author.username.label("author_username"),
+            author.full_name.label("author_name"),
+            assignee.full_name.label("assignee_name"),
+            entity.updated_at,
+            entity.last_message_at,
+            entity.last_message_preview,
+            entity.message_count,
+        )
+        .join(author, entity.author_id == author.id)
+        .outerjoin(assignee, entity.assigned_to == assignee.id)
+        .where(*conditions)
+        .order_by(entity.updated_at.desc(), entity.id.desc())
+        .limit(limit)
+    )
+    return db.execute(stmt).all()
+
+
+def _tab_rows(db: Session, tab_conditions: dict, view: str, limit: int | None = None) -> list:
+    """List rows of every table in tab_conditions, merged newest first."""
+    parts = []
+    for entity, conditions in tab_conditions.items():
+        if view == "compact":
+            parts.append(_summary_rows(db, conditions, limit, entity=entity))
+        else:
+            parts.append(
+                db.query(entity)
+                .filter(*conditions)
+                .options(*OUT_LOADERS[entity])
+                .order_by(entity.updated_at.desc(), entity.id.desc())
+                .limit(limit)
+                .all()
+            )
+    if len(parts) == 1:
+        return parts[0]
+    merged = heapq.merge(*parts, key=lambda row: (row.updated_at, row.id), reverse=True)
+    return list(islice(merged, limit))
+
+
+def _rows_by_ids(db: Session, ids: list[int], view: str) -> list:
+    """List rows of live tickets in the order of ids."""
+    rows = []
+    for start in range(0, len(ids), IN_CHUNK):
+        chunk = ids[start:start + IN_CHUNK]
+        if view == "compact":
+            rows += _summary_rows(db, [Ticket.id.in_(chunk)])
+        else:
+            rows += db.query(Ticket).filter(Ticket.id.in_(chunk)).options(*TICKET_OUT_LOADERS).all()
+    if len(rows) < len(ids):
+        support_queue.invalidate()  # archived or removed by another process
+    position = {ticket_id: i for i, ticket_id in enumerate(ids)}
+    rows.sort(key=lambda row: position[row.id])
+    return rows
+
+
+def _page_conditions(entity, status: str | None, before: Key | None) -> list:
+    conditions = []
+    if status is not None:
+        conditions.append(entity.status == status)
+    if before is not None:
+        updated_at, ticket_id = before
+        conditions.append(or_(
+            entity.updated_at < updated_at,
+            and_(entity.updated_at == updated_at, entity.id < ticket_id),
+        ))
+    return conditions
+
+
+def _parse_cursor(cursor: str | None) -> Key | None:
+    """`<updated_at>,<id>` of the last row of the previous page."""
+    if cursor is None:
+        return None
+    stamp, _, ticket_id = cursor.rpartition(",")
+    try:
+        return utc_naive(datetime.fromisoformat(stamp)), int(ticket_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _weak_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _list_etag(db: Session, tab_conditions: dict, params: tuple, audience) -> str:
+    # Cheap validator: any change to a ticket bumps updated_at, and the count
+    # catches tickets entering or leaving the filtered set (archival included).
+    stats = [
+        tuple(db.execute(
+            select(func.count(entity.id), func.max(entity.updated_at)).where(*conditions)
+        ).one())
+        for entity, conditions in tab_conditions.items()
+    ]
+    # Signed file URLs in the body change with the signing window.
+    return _weak_etag("list", *params, audience, *stats, storage.url_window())
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of If-None-Match against our ETag (RFC 9110 §13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    ours = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == ours for tag in header.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
 STATUS_LABELS = {
     "new": "Новое",
     "in_progress": "В работе",
@@ -119,34 +466,337 @@ STATUS_LABELS = {
     "closed": "Закрытое",
     "reopened": "Переоткрытое",
 }
+REOPENED_TEXT = "── Обращение переоткрыто"
+
+
+# ── Ticket actions ────────────────────────────────────────────────────────────
+# Validate first, then mutate: an HTTPException leaves the ticket untouched,
+# which lets /bulk report a failed item and carry on with the rest.
+
+def _require_support(user: User) -> None:
+    if user.role not in ("support", "admin"):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+
+def _apply_status(ticket: Ticket, new_status: str, user: User) -> tuple[str, str]:
+    """Change status per VALID_TRANSITIONS; returns (old status, system message)."""
+    allowed_from_current = VALID_TRANSITIONS.get(ticket.status, [])
+
+    if new_status not in allowed_from_current:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Transition {ticket.status} → {new_status} is not allowed",
+        )
+
+    role = user.role
+    if role == "author":
+        # Author can only close from biz_review or reopen from closed
+        if new_status not in ("closed", "reopened"):
+            raise HTTPException(status_code=403, detail="Insufficient permissions")
+        if new_status == "closed" and ticket.status != "biz_review":
+            raise HTTPException(status_code=403, detail="Author can close only from biz_review")
+        if new_status == "reopened" and ticket.status != "closed":
+            raise HTTPException(status_code=403, detail="Author can reopen only closed tickets")
+        if ticket.author_id != user.id:
+            raise HTTPException(status_code=403, detail="Not your ticket")
+    elif role not in ("support", "admin"):
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+    old_status = ticket.status
+    ticket.status = new_status
+    _touch_ticket(ticket)
+
+    label_old = STATUS_LABELS.get(old_status, old_status)
+    label_new = STATUS_LABELS.get(new_status, new_status)
+
+    if new_status == "closed":
+        sys_text = "── Обращение закрыто"
+    elif new_status == "reopened":
+        sys_text = REOPENED_TEXT
+    else:
+        sys_text = f"── Статус изменён: {label_old} → {label_new}"
+    return old_status, sys_text
+
+
+def _apply_assign(ticket: Ticket, user: User) -> str | None:
+    """Assign to user (role checked by caller); returns a system message if status moved."""
+    if ticket.assigned_to is not None:
+        raise HTTPException(status_code=400, detail="Ticket already assigned")
+
+    ticket.assigned_to = user.id
+    sys_text = None
+    if ticket.status == "new":
+        ticket.status = "in_progress"
+        sys_text = "── Статус изменён: Новое → В работе"
+    _touch_ticket(ticket)
+    return sys_text
+
+
+def _apply_urgent(ticket: Ticket, is_urgent: bool, user: User) -> str:
+    if user.role == "author" and ticket.author_id != user.id:
+        raise HTTPException(status_code=403, detail="Not your ticket")
+
+    ticket.is_urgent = is_urgent
+    _touch_ticket(ticket)
+    return "── Тег «Срочно» установлен" if is_urgent else "── Тег «Срочно» снят"
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
-@router.get("", response_model=list[TicketOut])
+@router.get("", response_model=list[TicketOut] | list[TicketSummary])
 def list_tickets(
+    request: Request,
     filter: str = Query("mine", pattern="^(all|mine|closed)$"),
     urgent: bool | None = Query(None),
+    view: str = Query("full", pattern="^(full|compact)$"),
+    status: str | None = Query(None, pattern=f"^({'|'.join(VALID_TRANSITIONS)})$"),
+    limit: int | None = Query(None, ge=1, le=LIST_PAGE_MAX),
+    cursor: str | None = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    q = db.query(Ticket)
-
+    """
+    Tickets of a list tab, newest first. With `limit` returns one page; pass
+    `<updated_at>,<id>` of its last row as `cursor` to get the next one.
+    """
+    before = _parse_cursor(cursor)
+    tab_conditions = {
+        entity: _list_conditions(filter, urgent, current_user, entity)
+        + _page_conditions(entity, status, before)
+        for entity in _tab_entities(filter)
+    }
+    schema = list[TicketSummary] if view == "compact" else list[TicketOut]
+    params = (filter, urgent, view, status, limit, cursor)
+    # Unread counts are the caller's own: their markers go into every ETag.
+    read_state = reads.read_state(db, current_user.id)
+
+    # The support queue comes from the in-memory index: ids, count and newest
+    # change need no query, only the rows of the page are read.
     if filter == "all":
-        if current_user.role not in ("support", "admin"):
-            raise HTTPException(status_code=403, detail="Access denied")
-    elif filter == "mine":
-        q = q.filter(Ticket.author_id == current_user.id)
-    elif filter == "closed":
-        q = q.filter(Ticket.status == "closed")
-        if current_user.role == "author":
-            q = q.filter(Ticket.author_id == current_user.id)
+        queue = support_queue.refresh(db)
+        shared_etag = _weak_etag(
+            "list", *params, "staff", *queue.stats(status, urgent), storage.url_window()
+        )
 
-    if urgent is not None:
-        q = q.filter(Ticket.is_urgent == urgent)
+        def load():
+            return validate(schema, _rows_by_ids(db, queue.page(status, urgent, before, limit), view))
+    # The closed tab reads the same rows for every support agent and admin.
+    elif current_user.role in ("support", "admin") and filter != "mine":
+        shared_etag = list_flights.do(
+            ("etag", *params), lambda: _list_etag(db, tab_conditions, params, "staff")
+        )
+
+        def load():
+            return validate(schema, _tab_rows(db, tab_conditions, view, limit))
+    else:
+        shared_etag = None
+
+    if shared_etag is not None:
+        # Identical concurrent requests share the queries and the validated
+        # rows; each response is then dumped with the caller's unread counts.
+        etag = _weak_etag(shared_etag, *read_state)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        rows = list_flights.do(("rows", *params, shared_etag), load)
+    else:
+        etag = _weak_etag(_list_etag(db, tab_conditions, params, current_user.id), *read_state)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        rows = _tab_rows(db, tab_conditions, view, limit)
+    return json_response(
+        schema, rows, headers={"ETag": etag}, context=_unread_context(db, current_user, rows, filter)
+    )
+
+
+def _unread_context(db: Session, user: User, rows: list, filter: str) -> dict:
+    """Dump context with the user's unread counts for rows, see UnreadCount."""
+    ids = [row.id for row in rows]
+    return {"unread": reads.unread_counts(db, user.id, ids, include_archive=filter == "closed")}
+
+
+@router.get("/changes", response_model=TicketChanges | TicketSummaryChanges)
+def ticket_changes(
+    since: datetime | None = Query(None),
+    filter: str = Query("mine", pattern="^(all|mine|closed)$"),
+    urgent: bool | None = Query(None),
+    view: str = Query("full", pattern="^(full|compact)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Tickets of a list tab changed after `since`, plus ids of readable tickets
+    that changed and left the tab (tombstones). Without `since`
+    returns the whole tab. Pass the returned watermark as the next `since`.
+    """
+    conditions = _list_conditions(filter, urgent, current_user)
+    watermark = datetime.now(timezone.utc) - CHANGES_OVERLAP
+
+    removed: list[int] = []
+    changed_conditions = {
+        entity: _list_conditions(filter, urgent, current_user, entity)
+        for entity in _tab_entities(filter)
+    }
+    if since is not None:
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        since = since.astimezone(timezone.utc)
+        watermark = max(watermark, since)
+        if filter == "all":
+            return _queue_changes(db, current_user, since, urgent, view, watermark)
+        for entity, entity_conditions in changed_conditions.items():
+            entity_conditions.append(entity.updated_at > since)
+        removed = list(db.scalars(
+            select(Ticket.id).where(
+                Ticket.updated_at > since,
+                not_(and_(*conditions)),
+                *_tombstone_conditions(filter, current_user, since),
+                *_read_access_conditions(current_user),
+            )
+        ))
+        if filter == "mine":
+            removed += _archived_since(db, current_user, since)
+
+    changed = _tab_rows(db, changed_conditions, view)
+    content = {"changed": changed, "removed": removed, "watermark": watermark}
+    schema = TicketSummaryChanges if view == "compact" else TicketChanges
+    return json_response(schema, content, context=_unread_context(db, current_user, changed, filter))
+
+
+def _queue_changes(db: Session, user: User, since: datetime, urgent: bool | None, view: str,
+                   watermark: datetime) -> Response:
+    """ticket_changes of the "all" tab, with the changed ids from the queue index."""
+    changed_ids, removed = [], []
+    for ticket_id, entry in support_queue.refresh(db).changed_since(since):
+        (changed_ids if urgent is None or entry.is_urgent == urgent else removed).append(ticket_id)
+    changed = _rows_by_ids(db, changed_ids, view)
+    removed += _archived_since(db, user, since)
+    content = {"changed": changed, "removed": removed, "watermark": watermark}
+    schema = TicketSummaryChanges if view == "compact" else TicketChanges
+    return json_response(schema, content, context=_unread_context(db, user, changed, "all"))
+
+
+def _tombstone_conditions(filter: str, user: User, since: datetime) -> list:
+    """
+    WHERE clauses for tickets that may have been in the tab at `since`, so that
+    tombstones follow the tab and not every change in the system. A ticket
+    stays the author's for good; it leaves the closed tab only by a reopen.
+    """
+    if filter == "mine":
+        return [Ticket.author_id == user.id]
+    reopened = select(Message.id).where(
+        Message.ticket_id == Ticket.id,
+        Message.sender_role == "system",
+        Message.text == REOPENED_TEXT,
+        Message.created_at > since,
+    )
+    return [or_(Ticket.status == "closed", reopened.exists())]
+
+
+def _archived_since(db: Session, user: User, since: datetime) -> list[int]:
+    """
+    Readable tickets archived after `since`. Archiving drops them from the mine
+    and all tabs without touching updated_at, so they are reported as removed.
+    """
+    return list(db.scalars(
+        select(ArchivedTicket.id).where(
+            ArchivedTicket.archived_at > since,
+            *_read_access_conditions(user, ArchivedTicket),
+        )
+    ))
+
+
+@router.get("/unread", response_model=UnreadBadge)
+def unread_badge(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Unread messages in tickets the caller wrote or is assigned to, for the app badge."""
+    messages, tickets = reads.unread_total(db, current_user.id)
+    return {"messages": messages, "tickets": tickets}
 
-    tickets = q.order_by(Ticket.updated_at.desc()).all()
-    return tickets
+
+@router.post("/bulk", response_model=list[BulkResult])
+def bulk_update(
+    payload: BulkRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Apply status / assign / urgent operations in one transaction. Each item is
+    checked exactly like its single-ticket endpoint; failed items are reported
+    and skipped, the rest are committed together.
+    """
+    ids = {op.ticket_id for op in payload.operations}
+    tickets = {t.id: t for t in db.scalars(select(Ticket).where(Ticket.id.in_(ids)))}
+    if missing := ids - tickets.keys():
+        tickets.update(
+            (t.id, t)
+            for t in db.scalars(select(ArchivedTicket).where(ArchivedTicket.id.in_(missing)))
+        )
+
+    results: list[BulkResult] = []
+    system_messages: list[dict] = []
+    now = datetime.now(timezone.utc)
+    notifications: list[tuple] = []
+
+    for op in payload.operations:
+        ticket = tickets.get(op.ticket_id)
+        try:
+            if ticket is None:
+                raise HTTPException(status_code=404, detail="Ticket not found")
+            if isinstance(ticket, ArchivedTicket) and op.action != "status":
+                raise HTTPException(status_code=409, detail="Ticket is archived, reopen it first")
+            if op.action == "status":
+                if op.status is None:
+                    raise HTTPException(status_code=422, detail="status is required")
+                old_status, sys_text = _apply_status(ticket, op.status, current_user)
+                if isinstance(ticket, ArchivedTicket):
+                    ticket = tickets[op.ticket_id] = _unarchive(db, ticket)
+                notifications.append((notify_status_changed, ticket, old_status, current_user))
+            elif op.action == "assign":
+                _require_support(current_user)
+                sys_text = _apply_assign(ticket, current_user)
+                notifications.append((notify_assigned, ticket, current_user))
+            else:
+                if op.is_urgent is None:
+                    raise HTTPException(status_code=422, detail="is_urgent is required")
+                sys_text = _apply_urgent(ticket, op.is_urgent, current_user)
+                if op.is_urgent:
+                    notifications.append((notify_urgent, ticket, current_user))
+        except HTTPException as exc:
+            results.append(BulkResult(
+                ticket_id=op.ticket_id, action=op.action, ok=False,
+                status_code=exc.status_code, detail=exc.detail,
+            ))
+            continue
+
+        if sys_text:
+            system_messages.append({
+                "ticket_id": ticket.id, "sender_id": None, "sender_role": "system",
+                "text": sys_text, "created_at": now,
+            })
+        results.append(BulkResult(ticket_id=op.ticket_id, action=op.action, ok=True, status_code=200))
+
+    if system_messages:
+        db.execute(insert(Message), system_messages)
+        texts: dict[int, list[str]] = {}
+        for row in system_messages:
+            texts.setdefault(row["ticket_id"], []).append(row["text"])
+        for ticket_id, ticket_texts in texts.items():
+            _note_messages(tickets[ticket_id], ticket_texts[-1], now, len(ticket_texts))
+    db.commit()
+
+    if notifications:
+        # Reload the touched tickets with their authors in one query for the notifiers
+        touched = {n[1].id for n in notifications}
+        db.scalars(
+            select(Ticket).where(Ticket.id.in_(touched)).options(selectinload(Ticket.author))
+        ).all()
+        db.refresh(current_user)  # the notifiers read it after the session is closed
+        background_tasks.add_task(notify_batch, notifications)
+
+    return results
 
 
 @router.post("", response_model=TicketOut, status_code=status.HTTP_201_CREATED)
@@ -180,14 +830,19 @@ def create_ticket(
 @router.get("/{ticket_id}", response_model=TicketOut)
 def get_ticket(
     ticket_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.get(Ticket, ticket_id)
+    ticket = _find_ticket(db, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     _check_read_access(ticket, current_user)
-    return ticket
+
+    etag = _weak_etag("ticket", ticket.id, ticket.updated_at, storage.url_window())
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    return json_response(TicketOut, ticket, headers={"ETag": etag})
 
 
 @router.put("/{ticket_id}", response_model=TicketOut)
@@ -197,9 +852,7 @@ def edit_ticket(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.get(Ticket, ticket_id)
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    ticket = _get_live_ticket(db, ticket_id)
     if ticket.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Only the author can edit")
     if ticket.status != "new":
@@ -221,48 +874,14 @@ def change_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.get(Ticket, ticket_id)
+    ticket = _find_ticket(db, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    new_status = payload.status
-    allowed_from_current = VALID_TRANSITIONS.get(ticket.status, [])
-
-    if new_status not in allowed_from_current:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Transition {ticket.status} → {new_status} is not allowed",
-        )
-
-    role = current_user.role
-    if role == "author":
-        # Author can only close from biz_review or reopen from closed
-        if new_status not in ("closed", "reopened"):
-            raise HTTPException(status_code=403, detail="Insufficient permissions")
-        if new_status == "closed" and ticket.status != "biz_review":
-            raise HTTPException(status_code=403, detail="Author can close only from biz_review")
-        if new_status == "reopened" and ticket.status != "closed":
-            raise HTTPException(status_code=403, detail="Author can reopen only closed tickets")
-        if ticket.author_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not your ticket")
-    elif role not in ("support", "admin"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
-
-    old_status = ticket.status
-    ticket.status = new_status
-    _touch_ticket(ticket)
-
-    label_old = STATUS_LABELS.get(old_status, old_status)
-    label_new = STATUS_LABELS.get(new_status, new_status)
-
-    if new_status == "closed":
-        sys_text = "── Обращение закрыто"
-    elif new_status == "reopened":
-        sys_text = "── Обращение переоткрыто"
-    else:
-        sys_text = f"── Статус изменён: {label_old} → {label_new}"
-
-    _add_system_message(db, ticket.id, sys_text)
+    old_status, sys_text = _apply_status(ticket, payload.status, current_user)
+    if isinstance(ticket, ArchivedTicket):
+        ticket = _unarchive(db, ticket)  # reopened
+    _add_system_message(db, ticket, sys_text)
     db.commit()
     db.refresh(ticket)
 
@@ -279,21 +898,13 @@ def assign_ticket(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    if current_user.role not in ("support", "admin"):
-        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    _require_support(current_user)
 
-    ticket = db.get(Ticket, ticket_id)
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    if ticket.assigned_to is not None:
-        raise HTTPException(status_code=400, detail="Ticket already assigned")
+    ticket = _get_live_ticket(db, ticket_id)
 
-    ticket.assigned_to = current_user.id
-    if ticket.status == "new":
-        old_status = ticket.status
-        ticket.status = "in_progress"
-        _add_system_message(db, ticket.id, "── Статус изменён: Новое → В работе")
-    _touch_ticket(ticket)
+    sys_text = _apply_assign(ticket, current_user)
+    if sys_text:
+        _add_system_message(db, ticket, sys_text)
     db.commit()
     db.refresh(ticket)
 
@@ -311,22 +922,9 @@ def toggle_urgent(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    ticket = db.get(Ticket, ticket_id)
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-
-    role = current_user.role
-    if role == "author" and ticket.author_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your ticket")
-
-    ticket.is_urgent = payload.is_urgent
-    _touch_ticket(ticket)
-
-    if payload.is_urgent:
-        _add_system_message(db, ticket.id, "── Тег «Срочно» установлен")
-    else:
-        _add_system_message(db, ticket.id, "── Тег «Срочно» снят")
+    ticket = _get_live_ticket(db, ticket_id)
 
+    _add_system_message(db, ticket, _apply_urgent(ticket, payload.is_urgent, current_user))
     db.commit()
     db.refresh(ticket)
 
@@ -338,6 +936,13 @@ def toggle_urgent(
 
 # ── Access helpers ────────────────────────────────────────────────────────────
 
+def _read_access_conditions(user: User, entity=Ticket) -> list:
+    """SQL counterpart of _check_read_access."""
+    if user.role in ("support", "admin"):
+        return []
+    return [entity.author_id == user.id]
+
+
 def _check_read_access(ticket: Ticket, user: User) -> None:
     if user.role in ("support", "admin"):
         return
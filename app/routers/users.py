@@ -29,10 +29,10 @@ class AuthResponse(BaseModel):
     user: UserOut
 
 
-@router.post("/telegram", response_model=AuthResponse)
-def auth_telegram(payload: TelegramAuthRequest, db: Session = Depends(get_db)):
+def _login(db: Session, init_data: str) -> User:
+    """Validate initData and create or refresh the matching user."""
     try:
-        tg_user = validate_init_data(payload.initData)
+        tg_user = validate_init_data(init_data)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc))
 
@@ -62,7 +62,12 @@ def auth_telegram(payload: TelegramAuthRequest, db: Session = Depends(get_db)):
         user.role = role
         db.commit()
         db.refresh(user)
+    return user
+
 
+@router.post("/telegram", response_model=AuthResponse)
+def auth_telegram(payload: TelegramAuthRequest, db: Session = Depends(get_db)):
+    user = _login(db, payload.initData)
     token = create_jwt(user.id, user.telegram_id, user.role)
     return AuthResponse(token=token, user=UserOut.model_validate(user))
 
@@ -0,0 +1,45 @@
+"""
+Fast JSON encoding for API responses.
+
+FastAPI's response_model path validates the returned ORM objects, dumps them
+to Python dicts and then encodes those dicts again. Hot read endpoints instead
+return json_response(), which validates once and lets pydantic-core write the
+JSON bytes directly. Endpoints keep response_model for the OpenAPI schema.
+"""
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def validate(tp: Any, content: Any) -> Any:
+    """content (ORM objects, rows) as tp, for dumping later, possibly more than once."""
+    return _adapter(tp).validate_python(content, from_attributes=True)
+
+
+def dump_json(tp: Any, content: Any, context: dict | None = None) -> bytes:
+    """`context` reaches field serializers, for per-caller values such as unread counts."""
+    adapter = _adapter(tp)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True), context=context)
+
+
+def json_response(
+    tp: Any,
+    content: Any,
+    *,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+    context: dict | None = None,
+) -> Response:
+    return Response(
+        content=dump_json(tp, content, context),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
@@ -0,0 +1,108 @@
+"""
+Opt-in SQL diagnostics, enabled by the `sql_debug` section of config.yaml.
+
+SQLTraceMiddleware tracks every statement a request runs (via SQLAlchemy engine
+events and a ContextVar, like app.metrics) and:
+- logs statements slower than slow_query_ms together with the route;
+- warns when one statement shape runs n_plus_one_threshold times or more in a
+  request — the usual sign of a lazy-load loop (N+1);
+- adds `Server-Timing: db;dur=<ms>;desc="<n> queries"` to the response so the
+  totals show up in the browser's devtools.
+
+Statements are compared as SQLAlchemy renders them, with bound parameters as
+placeholders, so the same query with different ids counts as one shape.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import N_PLUS_ONE_THRESHOLD, SLOW_QUERY_MS
+from app.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+
+class SQLTrace:
+    __slots__ = ("scope", "queries", "db_seconds", "shapes")
+
+    def __init__(self, scope: Scope) -> None:
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(sql, n) for sql, n in self.shapes.most_common() if n >= threshold]
+
+
+_current_trace: ContextVar[SQLTrace | None] = ContextVar("sql_trace", default=None)
+_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("trace_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["trace_start"].pop()
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.queries += 1
+    trace.db_seconds += elapsed
+    trace.shapes[" ".join(statement.split())] += 1
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms) on %s %s: %s",
+            elapsed * 1000, trace.scope["method"], route_label(trace.scope), statement,
+        )
+
+
+def install() -> None:
+    """Register the engine hooks; a no-op on repeated calls."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+
+def server_timing(trace: SQLTrace) -> str:
+    return f'db;dur={trace.db_seconds * 1000:.1f};desc="{trace.queries} queries"'
+
+
+class SQLTraceMiddleware:
+    def __init__(self, app: ASGIApp, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD) -> None:
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        install()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = SQLTrace(scope)
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", server_timing(trace))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            for statement, count in trace.repeated(self.n_plus_one_threshold):
+                logger.warning(
+                    "Possible N+1 on %s %s: %d× %s",
+                    scope["method"], route_label(scope), count, statement,
+                )
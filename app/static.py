@@ -0,0 +1,179 @@
+"""
+Static frontend build and serving.
+
+build_frontend() copies frontend/ into frontend/dist/, adds content-hashed
+copies of the scripts and stylesheets referenced by index.html (app.js →
+app.<hash>.js) and rewrites index.html to point at them. precompress_directory()
+then writes .br / .gz siblings. Both run at startup and via `python -m
+app.static` during deploy; output is deterministic, so concurrent workers write
+identical files, and old hashed files are kept for clients holding a stale
+index.html.
+
+PrecompressedStaticFiles serves the siblings with the right Content-Encoding,
+hashed assets as immutable and HTML as no-cache.
+"""
+import hashlib
+import os
+import re
+from mimetypes import guess_type
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from app.compression import ENCODINGS, choose_encoding, compress, is_compressible
+from app.config import COMPRESS_MIN_SIZE
+
+FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+DIST_DIR = FRONTEND_DIR / "dist"
+
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+NO_CACHE = "no-cache"
+
+# Local (no scheme, no query) script/stylesheet references in index.html.
+_ASSET_REF = re.compile(r'\b(?P<attr>src|href)="(?P<path>[^":?#]+\.(?:js|css))"')
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+
+
+def _media_type(path: str) -> str:
+    return guess_type(path)[0] or "text/plain"
+
+
+def _write_if_changed(target: Path, data: bytes) -> None:
+    if target.exists() and target.read_bytes() == data:
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+def _fingerprinted_name(name: str, data: bytes) -> str:
+    stem, dot, suffix = name.rpartition(".")
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    return f"{stem}.{digest}{dot}{suffix}"
+
+
+def build_frontend(src: Path = FRONTEND_DIR, out: Path = DIST_DIR) -> Path:
+    """Copy src into out with fingerprinted assets and a rewritten index.html."""
+    for path in src.rglob("*"):
+        if not path.is_file() or out in path.parents or path.suffix in SUFFIXES.values():
+            continue
+        _write_if_changed(out / path.relative_to(src), path.read_bytes())
+
+    def rewrite(match: re.Match) -> str:
+        ref = match["path"]
+        asset = src / ref
+        if not asset.is_file():
+            return match[0]
+        data = asset.read_bytes()
+        head, _, name = ref.rpartition("/")
+        hashed = _fingerprinted_name(name, data)
+        _write_if_changed(out / head / hashed, data)
+        return f'{match["attr"]}="{head + "/" if head else ""}{hashed}"'
+
+    index = (src / "index.html").read_text(encoding="utf-8")
+    _write_if_changed(out / "index.html", _ASSET_REF.sub(rewrite, index).encode("utf-8"))
+    return out
+
+
+def precompress_directory(directory: Path, minimum_size: int = COMPRESS_MIN_SIZE) -> int:
+    """Write missing or stale .br/.gz siblings for text assets; returns files written."""
+    written = 0
+    for path in directory.rglob("*"):
+        if not path.is_file() or path.suffix in SUFFIXES.values():
+            continue
+        if not is_compressible(_media_type(str(path))):
+            continue
+        stat = path.stat()
+        if stat.st_size < minimum_size:
+            continue
+
+        data = None
+        for encoding in ENCODINGS:
+            target = path.with_name(path.name + SUFFIXES[encoding])
+            if target.exists() and target.stat().st_mtime >= stat.st_mtime:
+                continue
+            if data is None:
+                data = path.read_bytes()
+            tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(compress(data, encoding, best=True))
+            os.replace(tmp, target)
+            written += 1
+    return written
+
+
+def _cache_control(path: str) -> str | None:
+    if _FINGERPRINTED.search(path):
+        return IMMUTABLE
+    if path.endswith(".html"):
+        return NO_CACHE
+    return None
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def use_directory(self, directory: Path) -> None:
+        """Switch to another directory, e.g. the build output once it exists."""
+        self.directory = directory
+        self.all_directories = [directory]
+        self.config_checked = False
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = self._file_response(full_path, stat_result, scope, status_code)
+        cache_control = _cache_control(str(full_path))
+        if cache_control:
+            response.headers["Cache-Control"] = cache_control
+        return response
+
+    def _file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is not None:
+            sibling = f"{full_path}{SUFFIXES[encoding]}"
+            try:
+                sibling_stat = os.stat(sibling)
+            except OSError:
+                sibling_stat = None
+            # A sibling older than its source is stale — fall back to identity.
+            if sibling_stat is not None and sibling_stat.st_mtime >= stat_result.st_mtime:
+                response = FileResponse(
+                    sibling,
+                    status_code=status_code,
+                    stat_result=sibling_stat,
+                    media_type=_media_type(str(full_path)),
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+                )
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+def build_static() -> Path:
+    out = build_frontend()
+    precompress_directory(out)
+    return out
+
+
+if __name__ == "__main__":
+    print(f"Built frontend into {build_static()}")
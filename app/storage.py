@@ -0,0 +1,230 @@
+"""
+Attachment storage layout.
+
+Files are stored as UPLOAD_DIR/ab/cd/<uuid>_<name>, where abcd are the first
+hex digits of sha1(<uuid>_<name>). That gives at most 65,536 leaf directories
+with evenly spread files, however many tickets there are, instead of one
+directory per ticket.
+
+Older files use the legacy UPLOAD_DIR/<ticket_id>/<name> layout. Their sharded
+location follows from the file name alone (migrated_path), so
+`python -m app.storage` can move them while the app keeps running:
+
+- the file is renamed atomically, so it always exists at exactly one path;
+- stored_path is rewritten in every live and archived file table, one batch
+  of rows per transaction;
+- downloads accept both paths and serve the file from wherever it is now,
+  including links that clients cached before the move.
+
+The migration only picks up rows that still have a legacy path, so it can be
+interrupted and started again at any time.
+
+Attachments are linked with signed URLs (signed_url): the path, an expiry and
+a scope under an HMAC of secret_key, checked without a database lookup, so an
+<img> or a caching proxy can fetch them without the Bearer token.
+
+Usage:
+    python -m app.storage [--batch-size 500]
+"""
+import argparse
+import hashlib
+import hmac
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import FILE_URL_TTL, FILE_URL_WINDOW, SECRET_KEY, UPLOAD_DIR
+from app.database import SessionLocal, init_db
+from app.models import ArchivedMessageFile, ArchivedTicketFile, MessageFile, TicketFile
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = 500
+BATCH_PAUSE = 0.05  # seconds between batches, lets queued writers in
+FILE_MODELS = (TicketFile, MessageFile, ArchivedTicketFile, ArchivedMessageFile)
+
+# Shard directories known to exist, so uploads skip mkdir after the first one.
+_created_dirs: set[Path] = set()
+
+
+def sharded_path(name: str) -> str:
+    digest = hashlib.sha1(name.encode()).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}/{name}"
+
+
+def new_stored_path(filename: str | None) -> str:
+    """stored_path for a new upload; the original name is kept after a uuid."""
+    return sharded_path(f"{uuid.uuid4().hex}_{Path(filename or 'file').name}")
+
+
+def is_legacy(stored_path: str) -> bool:
+    return stored_path.count("/") == 1
+
+
+def migrated_path(stored_path: str) -> str | None:
+    """Sharded counterpart of a legacy <ticket_id>/<name> path, else None."""
+    if not is_legacy(stored_path):
+        return None
+    return sharded_path(stored_path.rsplit("/", 1)[1])
+
+
+def save(upload_dir: Path, stored_path: str, content: bytes) -> None:
+    target = upload_dir / stored_path
+    if target.parent not in _created_dirs:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(target.parent)
+    try:
+        target.write_bytes(content)
+    except FileNotFoundError:  # shard directory removed behind our back
+        _created_dirs.discard(target.parent)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+
+
+def locate(upload_dir: Path, stored_path: str) -> Path | None:
+    """The file behind stored_path, at its legacy or its sharded location."""
+    for candidate in (stored_path, migrated_path(stored_path)):
+        if candidate is not None and (upload_dir / candidate).is_file():
+            return upload_dir / candidate
+    return None
+
+
+# ── Signed URLs ───────────────────────────────────────────────────────────────
+# /signed-files/<scope>/<expires>/<signature>/<stored_path>
+#   scope "download" — served as an attachment;
+#   scope "inline"   — shown in place, only handed out for raster images.
+
+SIGNED_PREFIX = "/signed-files"
+INLINE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+SCOPES = ("download", "inline")
+
+_url_mac = hmac.new(
+    hmac.new(SECRET_KEY.encode(), b"signed-file-urls", hashlib.sha256).digest(),
+    digestmod=hashlib.sha256,
+)
+
+
+def url_window(now: float | None = None) -> int:
+    """Index of the current signing window; URLs change when it does."""
+    return int((time.time() if now is None else now) // FILE_URL_WINDOW)
+
+
+def _signature(scope: str, expires: int, stored_path: str) -> str:
+    mac = _url_mac.copy()
+    mac.update(f"{scope}\n{expires}\n{stored_path}".encode())
+    return mac.hexdigest()[:32]
+
+
+def signed_url(stored_path: str, scope: str = "download", now: float | None = None) -> str:
+    # Expiry rounded up to the window end: identical URLs within a window,
+    # each valid for FILE_URL_TTL to FILE_URL_TTL + FILE_URL_WINDOW.
+    expires = (url_window(now) + 1) * FILE_URL_WINDOW + FILE_URL_TTL
+    signature = _signature(scope, expires, stored_path)
+    return f"{SIGNED_PREFIX}/{scope}/{expires}/{signature}/{quote(stored_path)}"
+
+
+def preview_url(stored_path: str, now: float | None = None) -> str | None:
+    """Inline URL for images the Mini App can show in an <img>, else None."""
+    if Path(stored_path).suffix.lower() not in INLINE_EXTENSIONS:
+        return None
+    return signed_url(stored_path, "inline", now)
+
+
+def verify_signature(scope: str, expires: int, signature: str, stored_path: str,
+                     now: float | None = None) -> bool:
+    if scope not in SCOPES or expires < (time.time() if now is None else now):
+        return False
+    if scope == "inline" and Path(stored_path).suffix.lower() not in INLINE_EXTENSIONS:
+        return False
+    return hmac.compare_digest(signature, _signature(scope, expires, stored_path))
+
+
+# ── Migration ─────────────────────────────────────────────────────────────────
+
+def _move_file(upload_dir: Path, old: str, new: str) -> str:
+    """Rename old → new; returns "moved", "done" (already there), "missing" or "conflict"."""
+    source, target = upload_dir / old, upload_dir / new
+    if not source.exists():
+        return "done" if target.exists() else "missing"
+    if target.exists():
+        return "conflict"  # a different file with the same name; leave both alone
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, target)
+    try:
+        source.parent.rmdir()  # drop the ticket directory once it's empty
+    except OSError:
+        pass
+    return "moved"
+
+
+def migrate_batch(db: Session, model, upload_dir: Path, after_id: int, batch_size: int,
+                  stats: dict[str, int]) -> int | None:
+    """
+    Migrate the next batch of legacy rows of one table with id > after_id and
+    commit; returns the last id seen, or None when the table is done.
+    """
+    rows = db.execute(
+        select(model.id, model.stored_path)
+        .where(model.id > after_id, model.stored_path.not_like("%/%/%"))
+        .order_by(model.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None
+    for row in rows:
+        new = migrated_path(row.stored_path)
+        if new is None:
+            continue
+        outcome = _move_file(upload_dir, row.stored_path, new)
+        stats[outcome] += 1
+        if outcome == "conflict":
+            logger.warning("Not migrating %s: %s already exists", row.stored_path, new)
+            continue
+        # Files shared between rows are rewritten everywhere at once.
+        for other in FILE_MODELS:
+            db.execute(
+                update(other).where(other.stored_path == row.stored_path).values(stored_path=new)
+            )
+    db.commit()
+    return rows[-1].id
+
+
+def migrate_uploads(
+    db: Session,
+    upload_dir: Path = UPLOAD_DIR,
+    batch_size: int = MIGRATION_BATCH_SIZE,
+    pause: float = BATCH_PAUSE,
+) -> dict[str, int]:
+    """Move every legacy attachment to the sharded layout; returns outcome counts."""
+    stats = {"moved": 0, "done": 0, "missing": 0, "conflict": 0}
+    for model in FILE_MODELS:
+        after_id = 0
+        while (after_id := migrate_batch(db, model, upload_dir, after_id, batch_size, stats)) is not None:
+            time.sleep(pause)
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move attachments to the sharded layout")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE,
+                        help="file rows rewritten per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    init_db()
+    with SessionLocal() as db:
+        stats = migrate_uploads(db, UPLOAD_DIR, args.batch_size)
+    logger.info(
+        "Migrated %(moved)d files (%(done)d already moved, %(missing)d missing on disk, "
+        "%(conflict)d name conflicts left in place)", stats,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+API benchmark: throughput and p50/p95/p99 latency per endpoint.
+
+Seeds a throwaway SQLite database at the requested scale and drives the real
+application in-process through TestClient, one request at a time, so results
+measure the app (routing, auth, queries, serialization, middleware) without
+network noise. Telegram notifications are not sent and uploads go to a
+temporary directory.
+
+Each scenario is measured in --repeat rounds of --iterations requests, the
+rounds of all scenarios interleaved so that a slow spell of the machine hits
+every scenario once rather than one scenario throughout. Reported figures are
+the medians over the rounds.
+
+Results are written as JSON. With --baseline the run is compared against an
+earlier result and the process exits with status 1 if any scenario's p95 grew
+or its throughput dropped by more than --tolerance.
+
+Usage:
+    python -m benchmarks.api [--tickets 1000] [--messages 20] [--iterations 200]
+                             [--repeat 5] [--output bench.json] [--baseline old.json]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import quote, urlencode
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import bot
+from app.auth import create_jwt
+from app.config import BOT_TOKEN
+from app.database import Base, get_db
+from app.main import app
+from app.models import Message, MessageFile, Ticket, TicketFile, User
+from app.routers import files as files_router
+from app.routers import messages as messages_router
+
+STATUSES = ("new", "in_progress", "on_pause", "biz_review", "closed", "reopened")
+UPLOAD_SIZE = 64 * 1024
+AUTH_TELEGRAM_ID = 900_000  # logs in repeatedly; kept apart from seeded users
+
+
+def sign_init_data(user: dict, bot_token: str = BOT_TOKEN, auth_date: int = 1_700_000_000) -> str:
+    """Telegram WebApp initData signed the way Telegram does it."""
+    params = {"user": json.dumps(user), "auth_date": str(auth_date)}
+    # The check string uses decoded values; only the query string is URL-encoded.
+    data_check_string = "\n".join(f"{k}={v}" for k, v in sorted(params.items()))
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    params["hash"] = hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(params, quote_via=quote)
+
+
+def seed(session, upload_dir: Path, tickets: int, messages: int, authors: int = 50) -> dict:
+    """Deterministic dataset; returns the ids the scenarios need."""
+    users = [
+        User(telegram_id=1000 + i, username=f"author{i}", full_name=f"Автор {i}", role="author")
+        for i in range(authors)
+    ]
+    agent = User(telegram_id=1, username="agent", full_name="Специалист", role="support")
+    session.add_all([*users, agent])
+    session.flush()
+
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(tickets):
+        stamp = now - timedelta(minutes=i)
+        rows.append(Ticket(
+            number=f"#bench-{i:06d}",
+            author_id=users[i % authors].id,
+            assigned_to=agent.id if i % 3 else None,
+            status=STATUSES[i % len(STATUSES)],
+            is_urgent=i % 10 == 0,
+            title=f"Обращение {i}",
+            description="Подробное описание проблемы " * 8,
+            steps="Шаг 1\nШаг 2\nШаг 3",
+            created_at=stamp,
+            updated_at=stamp,
+        ))
+    session.add_all(rows)
+    session.flush()
+
+    payload = b"x" * UPLOAD_SIZE
+    for i, ticket in enumerate(rows):
+        stored_path = f"{ticket.id}/seed.pdf"
+        (upload_dir / str(ticket.id)).mkdir(parents=True, exist_ok=True)
+        (upload_dir / stored_path).write_bytes(payload)
+        session.add(TicketFile(ticket_id=ticket.id, filename="seed.pdf", stored_path=stored_path,
+                               filesize=len(payload), uploaded_by=ticket.author_id))
+        for j in range(messages):
+            from_agent = j % 2 == 1
+            msg = Message(
+                ticket_id=ticket.id,
+                sender_id=agent.id if from_agent else ticket.author_id,
+                sender_role="support" if from_agent else "author",
+                text=f"Сообщение {j}",
+                created_at=ticket.created_at + timedelta(seconds=j),
+            )
+            if j % 10 == 0:
+                msg.files = [MessageFile(filename="log.txt", stored_path=stored_path,
+                                         filesize=len(payload))]
+            session.add(msg)
+    session.commit()
+
+    owner = users[0]
+    own_tickets = [t for t in rows if t.author_id == owner.id]
+    return {
+        "author": (owner.id, owner.telegram_id, owner.role),
+        "agent": (agent.id, agent.telegram_id, agent.role),
+        "tickets": [t.id for t in own_tickets],
+        # Closed tickets refuse messages and uploads.
+        "open_tickets": [t.id for t in own_tickets if t.status != "closed"],
+        "files": [f"{t.id}/seed.pdf" for t in own_tickets],
+    }
+
+
+def _headers(identity: tuple) -> dict:
+    return {"Authorization": f"Bearer {create_jwt(*identity)}"}
+
+
+def build_scenarios(ids: dict) -> dict:
+    """name → callable(client) that performs one request and returns the response."""
+    author, agent = _headers(ids["author"]), _headers(ids["agent"])
+    tickets = itertools.cycle(ids["tickets"])
+    open_tickets = itertools.cycle(ids["open_tickets"])
+    files = itertools.cycle(ids["files"])
+    init_data = sign_init_data({"id": AUTH_TELEGRAM_ID, "first_name": "Bench", "username": "bench"})
+    upload = b"u" * UPLOAD_SIZE
+
+    return {
+        "POST /auth/telegram": lambda c: c.post("/auth/telegram", json={"initData": init_data}),
+        "GET /tickets?filter=mine": lambda c: c.get("/tickets?filter=mine", headers=author),
+        "GET /tickets?filter=all": lambda c: c.get("/tickets?filter=all", headers=agent),
+        "GET /tickets?filter=closed": lambda c: c.get("/tickets?filter=closed", headers=agent),
+        "GET /tickets/{id}": lambda c: c.get(f"/tickets/{next(tickets)}", headers=author),
+        "GET /tickets/{id}/messages": lambda c: c.get(
+            f"/tickets/{next(tickets)}/messages", headers=author
+        ),
+        "POST /tickets/{id}/messages": lambda c: c.post(
+            f"/tickets/{next(open_tickets)}/messages", data={"text": "Ответ"}, headers=agent
+        ),
+        "POST /tickets/{id}/files": lambda c: c.post(
+            f"/tickets/{next(open_tickets)}/files",
+            files={"file": ("bench.pdf", upload, "application/pdf")},
+            headers=author,
+        ),
+        "GET /files/{path}": lambda c: c.get(f"/files/{next(files)}", headers=author),
+    }
+
+
+def summarize(latencies: list[float], wall: float) -> dict:
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+def run_scenario(client: TestClient, request, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        request(client)
+    latencies = []
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = request(client)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.url}: HTTP {response.status_code}")
+    return summarize(latencies, time.perf_counter() - wall_start)
+
+
+def median_of_rounds(rounds: list[dict]) -> dict:
+    """Per-statistic median of the summaries of repeated rounds of one scenario."""
+    result = {key: statistics.median(r[key] for r in rounds) for key in rounds[0]}
+    result["requests"] = sum(r["requests"] for r in rounds)
+    result["rounds"] = len(rounds)
+    return result
+
+
+async def _no_send(chat_id: int, text: str, reply_markup=None) -> None:
+    return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as tmp, ExitStack() as stack:
+        upload_dir = Path(tmp) / "uploads"
+        upload_dir.mkdir()
+        engine = create_engine(
+            f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with Session() as session:
+            ids = seed(session, upload_dir, args.tickets, args.messages)
+
+        def bench_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        stack.enter_context(patch.object(bot, "_send", _no_send))
+        stack.enter_context(patch.object(files_router, "UPLOAD_DIR", upload_dir))
+        stack.enter_context(patch.object(messages_router, "UPLOAD_DIR", upload_dir))
+        app.dependency_overrides[get_db] = bench_db
+        stack.callback(app.dependency_overrides.clear)
+        stack.callback(engine.dispose)
+
+        client = TestClient(app)
+        scenarios = {
+            name: request for name, request in build_scenarios(ids).items()
+            if not args.only or any(pattern in name for pattern in args.only)
+        }
+        rounds = {name: [] for name in scenarios}
+        for round_index in range(args.repeat):
+            warmup = args.warmup if round_index == 0 else 0
+            for name, request in scenarios.items():
+                rounds[name].append(run_scenario(client, request, args.iterations, warmup))
+        results = {}
+        for name in scenarios:
+            results[name] = median_of_rounds(rounds[name])
+            print(f"  {name:<30} {results[name]['throughput_rps']:>8.1f} rps  "
+                  f"p50 {results[name]['p50_ms']:>8.2f}  p95 {results[name]['p95_ms']:>8.2f}  "
+                  f"p99 {results[name]['p99_ms']:>8.2f} ms")
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tickets": args.tickets,
+            "messages_per_ticket": args.messages,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "repeat": args.repeat,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions of current vs baseline; empty if none."""
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} → {now['p95_ms']} ms")
+        if now["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {before['throughput_rps']} → {now['throughput_rps']} rps"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickets", type=int, default=1_000)
+    parser.add_argument("--messages", type=int, default=20, help="messages per ticket")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per scenario, medians reported")
+    parser.add_argument("--only", nargs="+", help="run scenarios whose name contains any of these")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="earlier JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    print(f"Seeding {args.tickets} tickets × {args.messages} messages")
+    result = run(args)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(result, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Synthetic support.db generator for reproducing scaling problems locally.
+
+Builds users, tickets whose status histories follow VALID_TRANSITIONS (with
+the same system messages the API writes), chat messages and attachment rows.
+Rows are streamed in batches through executemany on the raw SQLite
+connection, with journaling and fsync off and indexes created after the load.
+The output depends only on the arguments: the same --seed gives the same
+database.
+
+Usage:
+    python -m benchmarks.dataset --out support.db [--users 100000]
+        [--tickets 1000000] [--messages 20] [--seed 42] [--uploads uploads]
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from sqlalchemy import create_engine
+
+from app.database import Base
+import app.models  # noqa: F401 — registers all ORM models with Base.metadata
+from app.models import message_preview
+from app.routers.tickets import STATUS_LABELS, VALID_TRANSITIONS
+
+BATCH_SIZE = 50_000
+END = datetime(2026, 1, 1)  # fixed, so output doesn't depend on the clock
+SPAN = timedelta(days=3 * 365)
+
+SUPPORT_AGENTS = 50
+ADMINS = 5
+TICKET_FILE_RATE = 0.1
+MESSAGE_FILE_RATE = 0.03
+URGENT_RATE = 0.08
+MAX_HISTORY = 8
+
+TITLES = (
+    "Не открывается страница оплаты", "Ошибка при входе", "Не приходят уведомления",
+    "Пропали данные в отчёте", "Медленно грузится список", "Не работает экспорт в Excel",
+    "Дублируются заказы", "Неверный расчёт скидки", "Не загружается фото",
+    "Ошибка 500 при сохранении",
+)
+AUTHOR_LINES = (
+    "Проблема повторяется", "Прикладываю скриншот", "Когда будет исправлено?",
+    "Спасибо, проверю", "Всё ещё не работает", "Да, теперь работает",
+    "Уточните, пожалуйста, сроки", "Ошибка появляется только в мобильном приложении",
+)
+SUPPORT_LINES = (
+    "Взяли в работу", "Уточните, пожалуйста, версию приложения", "Передали разработчикам",
+    "Исправление выкатили, проверьте", "Не удалось воспроизвести, нужны шаги",
+    "Проверьте, пожалуйста, ещё раз", "Ожидаем ответа от смежной команды",
+)
+FILE_NAMES = ("screenshot.png", "log.txt", "report.pdf", "video.mp4", "export.xlsx")
+
+
+def _ts(dt: datetime) -> str:
+    # Same storage format SQLAlchemy's SQLite DateTime writes.
+    return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _batches(rows: Iterable[tuple], size: int = BATCH_SIZE) -> Iterator[list[tuple]]:
+    it = iter(rows)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+class Generator:
+    def __init__(self, users: int, tickets: int, messages: int, seed: int) -> None:
+        self.users = users
+        self.tickets = tickets
+        self.messages = messages
+        self.rng = random.Random(seed)
+        self.support_ids = list(range(1, SUPPORT_AGENTS + 1))
+        self.author_count = users - SUPPORT_AGENTS - ADMINS
+        if self.author_count < 1:
+            raise ValueError(f"--users must be greater than {SUPPORT_AGENTS + ADMINS}")
+        # Filled in while tickets are generated, drained by the writers.
+        self.message_rows: list[tuple] = []
+        self.message_file_rows: list[tuple] = []
+        self.ticket_file_rows: list[tuple] = []
+        self.next_message_id = 1
+        self.file_paths: list[tuple[str, int]] = []
+        # The current ticket's denormalized last-message columns.
+        self.chat_length = 0
+        self.last_message: tuple[datetime, str] | None = None
+
+    def user_rows(self) -> Iterator[tuple]:
+        created = _ts(END - SPAN)
+        for user_id in range(1, self.users + 1):
+            if user_id <= SUPPORT_AGENTS:
+                role = "support"
+            elif user_id <= SUPPORT_AGENTS + ADMINS:
+                role = "admin"
+            else:
+                role = "author"
+            yield (user_id, 10_000_000 + user_id, f"user{user_id}", f"Пользователь {user_id}",
+                   role, created)
+
+    def _author_id(self) -> int:
+        # Skewed: a few authors file most of the tickets.
+        return SUPPORT_AGENTS + ADMINS + 1 + int(self.author_count * self.rng.random() ** 3)
+
+    def _history(self) -> list[str]:
+        """Random walk over VALID_TRANSITIONS from "new"; returns visited statuses."""
+        statuses = ["new"]
+        for _ in range(self.rng.randint(0, MAX_HISTORY)):
+            statuses.append(self.rng.choice(VALID_TRANSITIONS[statuses[-1]]))
+        return statuses
+
+    @staticmethod
+    def _status_text(old: str, new: str) -> str:
+        if new == "closed":
+            return "── Обращение закрыто"
+        if new == "reopened":
+            return "── Обращение переоткрыто"
+        return f"── Статус изменён: {STATUS_LABELS[old]} → {STATUS_LABELS[new]}"
+
+    def _message(self, ticket_id: int, sender_id: int | None, role: str, text: str,
+                 at: datetime) -> int:
+        message_id = self.next_message_id
+        self.next_message_id += 1
+        self.message_rows.append((message_id, ticket_id, sender_id, role, text, _ts(at)))
+        self.chat_length += 1
+        self.last_message = (at, text)
+        return message_id
+
+    def _file(self, ticket_id: int) -> tuple[str, str, int]:
+        name = self.rng.choice(FILE_NAMES)
+        stored_path = f"{ticket_id}/{self.rng.getrandbits(64):016x}_{name}"
+        size = self.rng.randint(1_000, 5_000_000)
+        self.file_paths.append((stored_path, size))
+        return name, stored_path, size
+
+    def ticket_rows(self) -> Iterator[tuple]:
+        rng = self.rng
+        numbers: dict[int, int] = {}
+        step = SPAN / self.tickets
+        for ticket_id in range(1, self.tickets + 1):
+            created = END - SPAN + step * (ticket_id - 1) + timedelta(seconds=rng.randint(0, 59))
+            numbers[created.year] = numbers.get(created.year, 0) + 1
+            number = f"#{created.year}-{numbers[created.year]:03d}"
+            author_id = self._author_id()
+            agent_id = rng.choice(self.support_ids)
+            title = rng.choice(TITLES)
+
+            history = self._history()
+            chat = max(0, int(rng.gauss(self.messages, self.messages / 3))) if self.messages else 0
+            # Chat messages and status changes interleaved in time.
+            events = ["chat"] * chat + history[1:]
+            rng.shuffle(events)
+            # Status changes must stay in walk order after the shuffle.
+            transitions = iter(zip(history, history[1:]))
+
+            at = created
+            assigned = None
+            is_urgent = False
+            self.chat_length, self.last_message = 0, None
+            for event in events:
+                at += timedelta(minutes=rng.randint(1, 600))
+                if event == "chat":
+                    from_author = assigned is None or rng.random() < 0.5
+                    if from_author:
+                        mid = self._message(ticket_id, author_id, "author",
+                                            rng.choice(AUTHOR_LINES), at)
+                    else:
+                        mid = self._message(ticket_id, assigned, "support",
+                                            rng.choice(SUPPORT_LINES), at)
+                    if rng.random() < MESSAGE_FILE_RATE:
+                        name, path, size = self._file(ticket_id)
+                        self.message_file_rows.append((mid, name, path, size))
+                else:
+                    old, new = next(transitions)
+                    if old == "new":
+                        assigned = agent_id  # taking the ticket moves it to in_progress
+                    self._message(ticket_id, None, "system", self._status_text(old, new), at)
+                if rng.random() < URGENT_RATE / max(len(events), 1):
+                    is_urgent = not is_urgent
+                    at += timedelta(seconds=1)
+                    text = "── Тег «Срочно» установлен" if is_urgent else "── Тег «Срочно» снят"
+                    self._message(ticket_id, None, "system", text, at)
+
+            if rng.random() < TICKET_FILE_RATE:
+                name, path, size = self._file(ticket_id)
+                self.ticket_file_rows.append(
+                    (ticket_id, name, path, size, author_id, _ts(created))
+                )
+
+            yield (
+                ticket_id, number, author_id, assigned, history[-1], is_urgent, title,
+                f"{title}. Подробное описание проблемы для обращения {number}.",
+                "1. Открыть приложение\n2. Перейти в раздел\n3. Нажать «Сохранить»",
+                None, _ts(created), _ts(at),
+                _ts(self.last_message[0]) if self.last_message else None,
+                message_preview(self.last_message[1]) if self.last_message else None,
+                self.chat_length,
+            )
+
+
+INSERTS = {
+    "users": "INSERT INTO users (id, telegram_id, username, full_name, role, created_at) "
+             "VALUES (?, ?, ?, ?, ?, ?)",
+    "tickets": "INSERT INTO tickets (id, number, author_id, assigned_to, status, is_urgent, "
+               "title, description, steps, url, created_at, updated_at, last_message_at, "
+               "last_message_preview, message_count) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    "messages": "INSERT INTO messages (id, ticket_id, sender_id, sender_role, text, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+    "message_files": "INSERT INTO message_files (message_id, filename, stored_path, filesize) "
+                     "VALUES (?, ?, ?, ?)",
+    "ticket_files": "INSERT INTO ticket_files (ticket_id, filename, stored_path, filesize, "
+                    "uploaded_by, uploaded_at) VALUES (?, ?, ?, ?, ?, ?)",
+}
+
+# Bulk-load settings: the file is thrown away if generation fails anyway.
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",  # 256 MiB
+    "PRAGMA locking_mode = EXCLUSIVE",
+)
+
+
+def _create_schema(path: Path) -> list[str]:
+    """Create tables without indexes; returns the CREATE INDEX statements for later."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    index_sql = [
+        sql for (sql,) in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        )
+    ]
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+    ).fetchall():
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.commit()
+    conn.close()
+    return index_sql
+
+
+def _write_sparse_files(uploads: Path, paths: list[tuple[str, int]]) -> None:
+    for stored_path, size in paths:
+        target = uploads / stored_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as f:
+            f.truncate(size)  # no data blocks allocated on filesystems with holes
+
+
+def generate(
+    out: Path,
+    users: int,
+    tickets: int,
+    messages: int,
+    seed: int = 42,
+    uploads: Path | None = None,
+    log=print,
+) -> dict[str, int]:
+    """Write a fresh database to `out`; returns row counts per table."""
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    index_sql = _create_schema(tmp)
+    gen = Generator(users, tickets, messages, seed)
+    counts = dict.fromkeys(INSERTS, 0)
+
+    conn = sqlite3.connect(tmp, isolation_level=None)
+    for pragma in LOAD_PRAGMAS:
+        conn.execute(pragma)
+
+    def flush(table: str, rows: list[tuple]) -> None:
+        conn.executemany(INSERTS[table], rows)
+        counts[table] += len(rows)
+        rows.clear()
+
+    started = time.perf_counter()
+    conn.execute("BEGIN")
+    for batch in _batches(gen.user_rows()):
+        flush("users", batch)
+    for batch in _batches(gen.ticket_rows()):
+        flush("tickets", batch)
+        # Messages and files were produced alongside this batch of tickets.
+        flush("messages", gen.message_rows)
+        flush("message_files", gen.message_file_rows)
+        flush("ticket_files", gen.ticket_file_rows)
+        log(f"  {counts['tickets']:>10} tickets  {counts['messages']:>11} messages  "
+            f"{time.perf_counter() - started:6.0f} s")
+    conn.execute("COMMIT")
+
+    log("Building indexes")
+    for sql in index_sql:
+        conn.execute(sql)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.close()
+    os.replace(tmp, out)
+
+    if uploads is not None:
+        log(f"Writing {len(gen.file_paths)} sparse files into {uploads}")
+        _write_sparse_files(uploads, gen.file_paths)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", type=Path, required=True, help="database file to create")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--messages", type=int, default=20, help="average chat messages per ticket")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--uploads", type=Path,
+                        help="also create the attachment files here, as sparse files")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing --out")
+    args = parser.parse_args()
+
+    if args.out.exists() and not args.force:
+        sys.exit(f"{args.out} exists; pass --force to overwrite")
+
+    started = time.perf_counter()
+    counts = generate(
+        args.out, args.users, args.tickets, args.messages, args.seed,
+        uploads=args.uploads,
+    )
+    print(", ".join(f"{table}: {n}" for table, n in counts.items()))
+    print(f"Done in {time.perf_counter() - started:.0f} s → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Micro-benchmark: JSON encoding of list_tickets / get_messages payloads.
+
+Compares FastAPI's default response_model path (validate → dump to Python →
+stdlib json), the same path rendered with orjson, and the TypeAdapter path
+used by app.serialization.json_response.
+
+Usage:
+    python -m benchmarks.serialization [--rows 1000 10000] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlalchemy import create_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Message, MessageFile, Ticket, TicketFile, User
+from app.routers.messages import MessageOut
+from app.routers.tickets import TicketOut
+from app.serialization import _adapter, dump_json
+
+
+def _seed(session, rows: int) -> None:
+    author = User(telegram_id=1, username="author", full_name="Author", role="author")
+    agent = User(telegram_id=2, username="agent", full_name="Agent", role="support")
+    session.add_all([author, agent])
+    session.flush()
+
+    now = datetime.now(timezone.utc)
+    ticket = None
+    for i in range(rows):
+        ticket = Ticket(
+            number=f"#bench-{i:06d}",
+            author_id=author.id,
+            assigned_to=agent.id if i % 2 else None,
+            status="in_progress",
+            title=f"Обращение {i}",
+            description="Подробное описание проблемы " * 8,
+            steps="Шаг 1\nШаг 2\nШаг 3",
+            url="https://example.com/page",
+            created_at=now - timedelta(minutes=i),
+            updated_at=now - timedelta(minutes=i),
+        )
+        ticket.files = [
+            TicketFile(filename="screen.png", stored_path=f"{i}/screen.png",
+                       filesize=1024, uploaded_by=author.id),
+        ]
+        session.add(ticket)
+    session.flush()
+
+    # All messages go to one ticket, matching a single get_messages call.
+    for i in range(rows):
+        msg = Message(
+            ticket_id=ticket.id,
+            sender_id=author.id if i % 2 else agent.id,
+            sender_role="author" if i % 2 else "support",
+            text=f"Сообщение номер {i}",
+            created_at=now + timedelta(seconds=i),
+        )
+        if i % 10 == 0:
+            msg.files = [MessageFile(filename="log.txt", stored_path=f"m/{i}.txt", filesize=64)]
+        session.add(msg)
+    session.commit()
+
+
+def _fastapi_default(tp, objs) -> bytes:
+    adapter = _adapter(tp)
+    value = adapter.validate_python(objs, from_attributes=True)
+    data = adapter.dump_python(value, mode="json")
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def _fastapi_orjson(tp, objs) -> bytes:
+    adapter = _adapter(tp)
+    value = adapter.validate_python(objs, from_attributes=True)
+    return orjson.dumps(adapter.dump_python(value, mode="json"))
+
+
+ENCODERS = {
+    "stdlib json (default)": _fastapi_default,
+    "orjson response": _fastapi_orjson,
+    "TypeAdapter.dump_json": dump_json,
+}
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(rows: int, repeat: int) -> None:
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    _seed(session, rows)
+
+    # Relationships are loaded up front so only encoding is measured.
+    tickets = (
+        session.query(Ticket)
+        .options(selectinload(Ticket.author), selectinload(Ticket.assignee),
+                 selectinload(Ticket.files))
+        .all()
+    )
+    messages = (
+        session.query(Message)
+        .filter(Message.ticket_id == tickets[-1].id)
+        .options(selectinload(Message.files))
+        .all()
+    )
+
+    for label, tp, objs in (
+        ("list_tickets", list[TicketOut], tickets),
+        ("get_messages", list[MessageOut], messages),
+    ):
+        print(f"\n{label} — {len(objs)} rows")
+        baseline = None
+        for name, encode in ENCODERS.items():
+            elapsed = _best_of(lambda: encode(tp, objs), repeat)
+            baseline = baseline or elapsed
+            size = len(encode(tp, objs))
+            print(f"  {name:<24} {elapsed * 1000:8.1f} ms  "
+                  f"x{baseline / elapsed:4.1f}  {size / 1024:8.0f} KiB")
+
+    session.close()
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for rows in args.rows:
+        run(rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
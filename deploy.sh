@@ -51,6 +51,10 @@ step "Установка/обновление зависимостей"
 "$VENV_DIR/bin/pip" install -q --upgrade pip
 "$VENV_DIR/bin/pip" install -q -r requirements.txt
 
+# ── Сборка статики ─────────────────────────────────────────────
+step "Сборка статики (хеши в именах, .br / .gz)"
+"$VENV_DIR/bin/python" -m app.static
+
 # ── Перезапуск сервиса ─────────────────────────────────────────
 if systemctl is-active --quiet "$SERVICE"; then
     step "Перезапуск сервиса $SERVICE"
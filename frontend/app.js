@@ -40,19 +40,83 @@ const VALID_TRANSITIONS = {
   reopened:    ['in_progress'],
 };
 
+// ── Local cache (IndexedDB) ────────────────────────────────────
+// One database per user. Stores:
+//   responses — { etag, body } per GET path, revalidated with If-None-Match
+//   lists     — { tickets, watermark } per tab, synced via /tickets/changes
+//   messages  — chat history per ticket id, extended with ?after_id=<last id>
+// Every helper degrades to a no-op when IndexedDB is unavailable.
+let cacheDb = null;
+const CACHE_STORES = ['responses', 'lists', 'messages'];
+
+function openCache(userId) {
+  return new Promise(resolve => {
+    if (!window.indexedDB) return resolve(null);
+    const req = indexedDB.open(`support-cache-${userId}`, 2);
+    req.onupgradeneeded = () => {
+      CACHE_STORES.forEach(name => {
+        if (!req.result.objectStoreNames.contains(name)) req.result.createObjectStore(name);
+      });
+    };
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => resolve(null);
+  });
+}
+
+function cacheGet(store, key) {
+  return new Promise(resolve => {
+    if (!cacheDb) return resolve(undefined);
+    const req = cacheDb.transaction(store).objectStore(store).get(key);
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => resolve(undefined);
+  });
+}
+
+function cachePut(store, key, value) {
+  if (!cacheDb) return;
+  try {
+    cacheDb.transaction(store, 'readwrite').objectStore(store).put(value, key);
+  } catch (e) {
+    console.warn('Cache write failed:', e);
+  }
+}
+
 // ── API helpers ────────────────────────────────────────────────
+// Last ETag and body per GET path; the server answers 304 when unchanged.
+const etagCache = new Map();
+
+async function cachedResponse(path) {
+  if (!etagCache.has(path)) {
+    const stored = await cacheGet('responses', path);
+    if (stored) etagCache.set(path, stored);
+  }
+  return etagCache.get(path);
+}
+
 async function apiFetch(path, options = {}) {
   const headers = { ...(options.headers || {}) };
   if (state.token) headers['Authorization'] = `Bearer ${state.token}`;
   if (!(options.body instanceof FormData)) {
     headers['Content-Type'] = 'application/json';
   }
+  const isGet = !options.method || options.method === 'GET';
+  const cached = isGet ? await cachedResponse(path) : null;
+  if (cached) headers['If-None-Match'] = cached.etag;
+
   const res = await fetch(API_BASE + path, { ...options, headers });
+  if (res.status === 304 && cached) return cached.body;
   if (!res.ok) {
     const err = await res.json().catch(() => ({ detail: res.statusText }));
     throw new Error(err.detail || res.statusText);
   }
-  return res.json();
+  const body = await res.json();
+  const etag = res.headers.get('ETag');
+  if (isGet && etag) {
+    const entry = { etag, body };
+    etagCache.set(path, entry);
+    cachePut('responses', path, entry);
+  }
+  return body;
 }
 
 async function apiGet(path) { return apiFetch(path); }
@@ -111,10 +175,13 @@ async function initAuth() {
   // Handle deep link: ?startapp=ticket_42
   const startParam = tg?.initDataUnsafe?.start_param || new URLSearchParams(location.search).get('startapp') || '';
 
+  // One round trip: token, user, first page of the default tab, tab counts
+  // and the deep-linked ticket with its latest messages.
+  let boot = null;
   try {
-    const resp = await apiPost('/auth/telegram', { initData });
-    state.token = resp.token;
-    state.user = resp.user;
+    boot = await apiPost('/bootstrap', { initData, startParam: startParam || null });
+    state.token = boot.token;
+    state.user = boot.user;
   } catch (e) {
     // Dev fallback: allow no-auth with mock user
     console.warn('Auth failed, using mock user:', e.message);
@@ -122,11 +189,18 @@ async function initAuth() {
     state.user = { id: 1, telegram_id: 0, username: 'dev', full_name: 'Dev User', role: 'admin' };
   }
 
+  cacheDb = await openCache(state.user.id);
+
   // Show/hide "All" tab based on role
   if (state.user.role === 'support' || state.user.role === 'admin') {
     document.getElementById('tab-all').style.display = '';
   }
+  if (boot) renderTabCounts(boot.counts);
 
+  if (boot?.ticket) {
+    showBootstrapTicket(boot);
+    return;
+  }
   if (startParam.startsWith('ticket_')) {
     const tid = parseInt(startParam.replace('ticket_', ''), 10);
     if (!isNaN(tid)) {
@@ -135,25 +209,93 @@ async function initAuth() {
     }
   }
 
-  await loadTicketList();
+  await loadTicketList(boot?.tab === state.currentTab ? boot.tickets : null);
+}
+
+function showBootstrapTicket(boot) {
+  const { ticket, messages } = boot;
+  state.currentTicket = ticket;
+  renderTicketDetail(ticket);
+  renderMessages(messages);
+  showScreen('detail');
+  scrollChatToBottom();
+  if (boot.has_more_messages) {
+    // Only the latest page came with bootstrap — fetch the full history.
+    loadChatMessages(ticket.id).then(scrollChatToBottom);
+  } else {
+    cachePut('messages', ticket.id, messages);
+  }
+}
+
+function renderTabCounts(counts) {
+  document.querySelectorAll('.tab-btn').forEach(btn => {
+    const count = counts[btn.dataset.tab];
+    let badge = btn.querySelector('.tab-count');
+    if (count === undefined) { badge?.remove(); return; }
+    if (!badge) {
+      badge = document.createElement('span');
+      badge.className = 'tab-count';
+      btn.appendChild(badge);
+    }
+    badge.textContent = count;
+  });
 }
 
 // ── Ticket List ────────────────────────────────────────────────
-async function loadTicketList() {
+async function loadTicketList(preview = null) {
   showScreen('list');
   const container = document.getElementById('ticket-list-content');
-  container.innerHTML = '<div class="loader"><div class="spinner"></div></div>';
+  const tab = state.currentTab;
+
+  // Render the cached tab (or the bootstrap preview page) instantly, then fetch
+  // only what changed since its watermark (the whole tab on first sync).
+  const cached = await cacheGet('lists', tab);
+  if (cached) {
+    state.tickets = cached.tickets;
+    renderTicketList(cached.tickets);
+  } else if (preview) {
+    state.tickets = preview;
+    renderTicketList(preview);
+  } else {
+    container.innerHTML = '<div class="loader"><div class="spinner"></div></div>';
+  }
 
   try {
-    const params = new URLSearchParams({ filter: state.currentTab });
-    const tickets = await apiGet(`/tickets?${params}`);
+    const params = new URLSearchParams({ filter: tab, view: 'compact' });
+    if (cached) params.set('since', cached.watermark);
+    const delta = await apiGet(`/tickets/changes?${params}`);
+    const tickets = cached ? mergeTicketChanges(cached.tickets, delta) : delta.changed;
+    cachePut('lists', tab, { tickets, watermark: delta.watermark });
+
+    if (state.currentTab !== tab) return;
+    if (cached && !delta.changed.length && !delta.removed.length) return;
     state.tickets = tickets;
     renderTicketList(tickets);
   } catch (e) {
+    if (cached) { showToast(e.message); return; }
     container.innerHTML = `<div class="empty-state"><div class="icon">⚠️</div>${e.message}</div>`;
   }
 }
 
+// Opening the chat moved the read marker, but the ticket itself didn't change,
+// so /tickets/changes won't resend it: clear its count in the cached lists.
+async function markTicketRead(id) {
+  for (const tab of ['mine', 'all', 'closed']) {
+    const cached = await cacheGet('lists', tab);
+    const row = cached?.tickets.find(t => t.id === id);
+    if (!row?.unread) continue;
+    row.unread = 0;
+    cachePut('lists', tab, cached);
+  }
+}
+
+function mergeTicketChanges(tickets, delta) {
+  const replaced = new Set([...delta.removed, ...delta.changed.map(t => t.id)]);
+  return delta.changed
+    .concat(tickets.filter(t => !replaced.has(t.id)))
+    .sort((a, b) => b.updated_at.localeCompare(a.updated_at));
+}
+
 function renderTicketList(tickets) {
   const container = document.getElementById('ticket-list-content');
   if (!tickets.length) {
@@ -169,8 +311,11 @@ function renderTicketList(tickets) {
 
     const statusBadge = `<span class="badge-status ${t.status}">${STATUS_LABELS[t.status] || t.status}</span>`;
     const urgentBadge = t.is_urgent ? '<span class="badge-urgent">🔴 СРОЧНО</span>' : '';
-    const assigneeName = (state.user.role === 'support' || state.user.role === 'admin') && t.assignee
-      ? ` · ${t.assignee.full_name}` : '';
+    const unreadBadge = t.unread ? `<span class="badge-unread" title="Непрочитанные">${t.unread}</span>` : '';
+    const assigneeName = (state.user.role === 'support' || state.user.role === 'admin') && t.assignee_name
+      ? ` · ${escHtml(t.assignee_name)}` : '';
+    const preview = t.last_message_preview
+      ? `<div class="ticket-preview">${escHtml(t.last_message_preview)}</div>` : '';
 
     return `
       <div class="${cardClass}" data-id="${t.id}">
@@ -178,10 +323,12 @@ function renderTicketList(tickets) {
           <span class="ticket-number">${t.number}</span>
           ${urgentBadge}
           ${statusBadge}
+          ${unreadBadge}
         </div>
         <div class="ticket-title">${escHtml(t.title)}</div>
+        ${preview}
         <div class="ticket-meta">
-          @${escHtml(t.author?.username || t.author?.full_name || '—')}${assigneeName}
+          @${escHtml(t.author_username || t.author_name || '—')}${assigneeName}
           · ${timeAgo(t.updated_at)}
         </div>
       </div>`;
@@ -303,17 +450,29 @@ document.getElementById('btn-submit-ticket').addEventListener('click', async ()
 
 // ── Ticket Detail ──────────────────────────────────────────────
 async function openTicketById(id) {
-  showScreen('loading');
+  const path = `/tickets/${id}`;
+  const cached = await cachedResponse(path);
+  if (cached) {
+    state.currentTicket = cached.body;
+    renderTicketDetail(cached.body);
+    showScreen('detail');
+  } else {
+    showScreen('loading');
+  }
+
   try {
-    const ticket = await apiGet(`/tickets/${id}`);
-    state.currentTicket = ticket;
-    renderTicketDetail(ticket);
+    const ticket = await apiGet(path);
+    if (ticket !== cached?.body) {
+      state.currentTicket = ticket;
+      renderTicketDetail(ticket);
+    }
     await loadChatMessages(id);
+    markTicketRead(id);
     showScreen('detail');
     scrollChatToBottom();
   } catch (e) {
     showToast(e.message);
-    loadTicketList();
+    if (!cached) loadTicketList();
   }
 }
 
@@ -451,11 +610,7 @@ function renderTicketDetail(t) {
   const filesEl = document.getElementById('d-files');
   if (t.files && t.files.length) {
     filesSec.style.display = '';
-    filesEl.innerHTML = t.files.map(f => `
-      <a class="file-chip" href="${API_BASE}/public/files/${encodeURIComponent(f.stored_path)}"
-         target="_blank" rel="noopener">
-        📎 ${escHtml(f.filename)}
-      </a>`).join('');
+    filesEl.innerHTML = t.files.map(f => fileChip(f)).join('');
   } else {
     filesSec.style.display = 'none';
   }
@@ -488,11 +643,27 @@ document.getElementById('btn-detail-back').addEventListener('click', () => {
 // ── Chat ───────────────────────────────────────────────────────
 async function loadChatMessages(ticketId) {
   const container = document.getElementById('chat-messages');
-  container.innerHTML = '<div class="loader"><div class="spinner"></div></div>';
+
+  // Messages are append-only: render the cached history, then fetch only
+  // messages newer than the last cached id.
+  let cached = await cacheGet('messages', ticketId);
+  if (cached && !fileLinksFresh(cached)) cached = undefined;  // reload to get new links
+  if (cached) {
+    renderMessages(cached);
+  } else {
+    container.innerHTML = '<div class="loader"><div class="spinner"></div></div>';
+  }
+
   try {
-    const messages = await apiGet(`/tickets/${ticketId}/messages`);
-    renderMessages(messages);
+    const lastId = cached?.length ? Math.max(...cached.map(m => m.id)) : 0;
+    const query = lastId ? `?after_id=${lastId}` : '';
+    const fresh = await apiGet(`/tickets/${ticketId}/messages${query}`);
+    if (cached && !fresh.length) return;
+    const messages = (cached || []).concat(fresh);
+    cachePut('messages', ticketId, messages);
+    if (state.currentTicket?.id === ticketId) renderMessages(messages);
   } catch (e) {
+    if (cached) { showToast(e.message); return; }
     container.innerHTML = `<div class="empty-state">${e.message}</div>`;
   }
 }
@@ -525,10 +696,7 @@ function renderMessages(messages) {
     const senderLabel = isMe ? '' :
       (isSupport ? '<div class="msg-sender">Поддержка</div>' : '<div class="msg-sender">Автор</div>');
 
-    const filesHtml = (msg.files || []).map(f =>
-      `<a class="file-chip" style="margin-top:4px" href="${API_BASE}/public/files/${encodeURIComponent(f.stored_path)}"
-          target="_blank" rel="noopener">📎 ${escHtml(f.filename)}</a>`
-    ).join('');
+    const filesHtml = (msg.files || []).map(f => fileChip(f, 'margin-top:4px')).join('');
 
     return `<div class="${wrapClass}">
       ${senderLabel}
@@ -610,6 +778,24 @@ document.getElementById('chat-input').addEventListener('input', function () {
 });
 
 // ── Utils ──────────────────────────────────────────────────────
+// Attachment links are signed URLs (/signed-files/<scope>/<expires>/…): they
+// work in plain <a> and <img> without the token until <expires>.
+const FILE_LINK_MARGIN = 3600;  // seconds; older cached links are refetched
+
+function fileChip(f, style = '') {
+  const preview = f.preview_url
+    ? `<img class="file-preview" src="${API_BASE}${escHtml(f.preview_url)}" loading="lazy" alt="">`
+    : '📎';
+  return `<a class="file-chip" style="${style}" href="${API_BASE}${escHtml(f.url)}"
+     target="_blank" rel="noopener">${preview} ${escHtml(f.filename)}</a>`;
+}
+
+function fileLinksFresh(messages) {
+  const deadline = Date.now() / 1000 + FILE_LINK_MARGIN;
+  return messages.every(m => (m.files || []).every(f =>
+    f.url && Number(f.url.split('/')[3]) > deadline));
+}
+
 function escHtml(str) {
   if (!str) return '';
   return String(str)
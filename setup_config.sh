@@ -82,10 +82,12 @@ build_yaml_list() {
 ADMIN_YAML=$(build_yaml_list "$ADMIN_IDS_RAW")
 SUPPORT_YAML=$(build_yaml_list "$SUPPORT_IDS_RAW")
 
+SECRET_KEY=$(python3 -c "import secrets; print(secrets.token_hex(32))")
+
 # ── Запись файла ───────────────────────────────────────────────────────────
 cat > "$CONFIG" <<EOF
 bot_token: "$BOT_TOKEN"
-secret_key: ""
+secret_key: "$SECRET_KEY"
 
 roles:
   admins:
@@ -97,7 +99,7 @@ EOF
 ok "Конфиг записан: $CONFIG"
 echo ""
 echo "  bot_token:  ${BOT_TOKEN:0:8}…"
-echo "  secret_key: (будет сгенерирован автоматически при первом запуске)"
+echo "  secret_key: (сгенерирован)"
 [[ -n "$ADMIN_IDS_RAW"   ]] && echo "  admins:     $ADMIN_IDS_RAW"   || warn "Список admins пуст."
 [[ -n "$SUPPORT_IDS_RAW" ]] && echo "  support:    $SUPPORT_IDS_RAW" || warn "Список support пуст."
 echo ""
@@ -7,9 +7,11 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
 from app.auth import create_jwt
+from app.config import Roles
 from app.database import Base, get_db
 import app.models  # noqa: F401 — registers all ORM models with Base.metadata
 from app.models import User
+from app.queue_index import support_queue
 
 # StaticPool forces SQLAlchemy to reuse a single connection.
 # Without it, each connection to sqlite:///:memory: gets its own empty database,
@@ -27,6 +29,7 @@ def reset_db():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    support_queue.reset()
 
 
 @pytest.fixture
@@ -53,6 +56,23 @@ def client(db) -> TestClient:
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def isolated_client(reset_db) -> TestClient:
+    """Like client, but each request gets its own session closed afterwards, as in production."""
+    from app.main import app
+
+    def own_session():
+        session = TestingSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = own_session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def make_user(
@@ -73,6 +93,11 @@ def make_user(
     return user
 
 
+def patch_roles(admins=(), support=()):
+    """Swap the config roles snapshot, as a config reload would."""
+    return patch("app.config._roles", Roles.build(admins, support))
+
+
 def auth_headers(user: User) -> dict:
     token = create_jwt(user.id, user.telegram_id, user.role)
     return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,246 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from sqlalchemy import func, select
+
+from app.archive import archive_closed_tickets, restore_ticket
+from app.models import (
+    ArchivedMessage,
+    ArchivedMessageFile,
+    ArchivedTicket,
+    ArchivedTicketFile,
+    Message,
+    MessageFile,
+    Ticket,
+    TicketFile,
+)
+from app.routers import files as files_router
+from app.routers.tickets import _generate_number, _tab_counts
+from tests.conftest import auth_headers, make_user
+
+
+def add_ticket(db, author, status="closed", age_days=100, number=None):
+    """Ticket with one message, a message attachment and a ticket attachment."""
+    stamp = datetime.now(timezone.utc) - timedelta(days=age_days)
+    ticket = Ticket(
+        number=number or f"#t-{db.scalar(select(func.count(Ticket.id))) + 1}",
+        author_id=author.id, status=status, title="Старое", description="Описание",
+        created_at=stamp, updated_at=stamp,
+    )
+    db.add(ticket)
+    db.flush()
+    db.add(TicketFile(ticket_id=ticket.id, filename="a.pdf", stored_path=f"{ticket.id}/a.pdf",
+                      filesize=1, uploaded_by=author.id, uploaded_at=stamp))
+    msg = Message(ticket_id=ticket.id, sender_id=author.id, sender_role="author",
+                  text="Привет", created_at=stamp)
+    msg.files = [MessageFile(filename="m.pdf", stored_path=f"{ticket.id}/m.pdf", filesize=1)]
+    db.add(msg)
+    db.commit()
+    return ticket.id
+
+
+def seed(db, old_closed=2):
+    """Old closed tickets plus a fresh open one that owns the newest ids."""
+    author = make_user(db, telegram_id=1)
+    old = [add_ticket(db, author) for _ in range(old_closed)]
+    fresh = add_ticket(db, author, status="in_progress", age_days=0)
+    return author, old, fresh
+
+
+def count(db, model):
+    return db.scalar(select(func.count(model.id)))
+
+
+def archive(db, **kwargs):
+    moved = archive_closed_tickets(db, older_than_days=30, pause=0, **kwargs)
+    db.expire_all()
+    return moved
+
+
+class TestArchiveJob:
+    def test_moves_ticket_with_messages_and_files(self, db):
+        author, old, fresh = seed(db)
+        assert archive(db) == 2
+
+        assert [t.id for t in db.scalars(select(Ticket))] == [fresh]
+        assert sorted(db.scalars(select(ArchivedTicket.id))) == old
+        for live, archived in ((TicketFile, ArchivedTicketFile), (Message, ArchivedMessage),
+                               (MessageFile, ArchivedMessageFile)):
+            assert count(db, live) == 1
+            assert count(db, archived) == 2
+        archived = db.get(ArchivedTicket, old[0])
+        assert archived.status == "closed"
+        assert archived.files[0].stored_path == f"{old[0]}/a.pdf"
+
+    def test_batches(self, db):
+        seed(db, old_closed=5)
+        assert archive(db, batch_size=2) == 5
+        assert count(db, ArchivedTicket) == 5
+
+    def test_keeps_recent_and_open_tickets(self, db):
+        author = make_user(db, telegram_id=1)
+        add_ticket(db, author, status="closed", age_days=5)
+        add_ticket(db, author, status="in_progress", age_days=100)
+        add_ticket(db, author, status="new", age_days=0)
+        assert archive(db) == 0
+
+    def test_ticket_owning_newest_ids_stays_live(self, db):
+        author = make_user(db, telegram_id=1)
+        old = add_ticket(db, author)
+        assert archive(db) == 0
+        assert db.get(Ticket, old) is not None
+
+    def test_restore(self, db):
+        _, old, _ = seed(db)
+        archive(db)
+        assert restore_ticket(db, old[0]) is True
+        db.commit()
+        db.expire_all()
+        ticket = db.get(Ticket, old[0])
+        assert len(ticket.messages) == 1
+        assert ticket.messages[0].files[0].stored_path == f"{old[0]}/m.pdf"
+        assert count(db, ArchivedTicket) == 1
+        assert restore_ticket(db, old[0]) is False
+
+    def test_ticket_numbers_count_archive(self, db):
+        author = make_user(db, telegram_id=1)
+        year = datetime.now(timezone.utc).year
+        add_ticket(db, author, age_days=0, number=f"#{year}-001")
+        add_ticket(db, author, status="new", age_days=0, number=f"#{year}-002")
+        db.execute(ArchivedTicket.__table__.insert().from_select(
+            [c.name for c in Ticket.__table__.columns],
+            select(*Ticket.__table__.columns).where(Ticket.id == 1),
+        ))
+        db.execute(Ticket.__table__.delete().where(Ticket.id == 1))
+        db.commit()
+        assert _generate_number(db) == f"#{year}-003"
+
+
+class TestArchivedReads:
+    def test_get_ticket(self, client, db):
+        author, old, _ = seed(db)
+        archive(db)
+        r = client.get(f"/tickets/{old[0]}", headers=auth_headers(author))
+        assert r.status_code == 200
+        assert r.json()["id"] == old[0]
+        assert r.json()["files"][0]["filename"] == "a.pdf"
+
+    def test_get_ticket_checks_access(self, client, db):
+        _, old, _ = seed(db)
+        archive(db)
+        other = make_user(db, telegram_id=2)
+        assert client.get(f"/tickets/{old[0]}", headers=auth_headers(other)).status_code == 403
+
+    def test_get_messages(self, client, db):
+        author, old, _ = seed(db)
+        archive(db)
+        r = client.get(f"/tickets/{old[0]}/messages", headers=auth_headers(author))
+        assert r.status_code == 200
+        [msg] = r.json()
+        assert msg["ticket_id"] == old[0]
+        assert msg["files"][0]["filename"] == "m.pdf"
+
+    def test_closed_tab_merges_archive(self, client, db):
+        author, old, fresh = seed(db)
+        recent = add_ticket(db, author, status="closed", age_days=1)
+        archive(db)
+        for view in ("full", "compact"):
+            r = client.get(f"/tickets?filter=closed&view={view}", headers=auth_headers(author))
+            assert r.status_code == 200
+            assert [t["id"] for t in r.json()] == [recent, old[1], old[0]]
+        mine = client.get("/tickets?filter=mine", headers=auth_headers(author)).json()
+        assert sorted(t["id"] for t in mine) == [fresh, recent]
+
+    def test_closed_tab_etag_changes_on_archival(self, client, db):
+        author, _, _ = seed(db)
+        before = client.get("/tickets?filter=closed", headers=auth_headers(author)).headers["ETag"]
+        archive(db)
+        after = client.get("/tickets?filter=closed", headers=auth_headers(author)).headers["ETag"]
+        assert before != after
+
+    def test_changes_full_sync_includes_archive(self, client, db):
+        author, old, _ = seed(db)
+        archive(db)
+        r = client.get("/tickets/changes?filter=closed", headers=auth_headers(author))
+        assert sorted(t["id"] for t in r.json()["changed"]) == old
+
+    def test_changes_report_archived_as_removed(self, client, db):
+        author, old, _ = seed(db)
+        support = make_user(db, telegram_id=2, role="support")
+        stranger = make_user(db, telegram_id=3)
+        cases = [(author, "mine", old), (support, "all", old), (stranger, "mine", [])]
+        watermarks = [
+            client.get(f"/tickets/changes?filter={tab}", headers=auth_headers(user)).json()["watermark"]
+            for user, tab, _ in cases
+        ]
+        archive(db)
+
+        for (user, tab, expected), since in zip(cases, watermarks):
+            r = client.get("/tickets/changes", params={"filter": tab, "since": since},
+                           headers=auth_headers(user))
+            assert sorted(r.json()["removed"]) == expected, (user.role, tab)
+
+    def test_tab_counts(self, db):
+        author, _, _ = seed(db)
+        archive(db)
+        assert _tab_counts(db, author) == {"mine": 1, "closed": 2}
+
+    def test_download_archived_file(self, client, db, tmp_path):
+        author, old, _ = seed(db)
+        archive(db)
+        (tmp_path / str(old[0])).mkdir()
+        (tmp_path / f"{old[0]}/m.pdf").write_bytes(b"pdf")
+        with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+            r = client.get(f"/files/{old[0]}/m.pdf", headers=auth_headers(author))
+            assert r.status_code == 200
+            other = make_user(db, telegram_id=2)
+            r = client.get(f"/files/{old[0]}/m.pdf", headers=auth_headers(other))
+            assert r.status_code == 403
+
+
+class TestArchivedWrites:
+    def test_reopen_restores(self, client, db):
+        author, old, _ = seed(db)
+        archive(db)
+        r = client.put(f"/tickets/{old[0]}/status", json={"status": "reopened"},
+                       headers=auth_headers(author))
+        assert r.status_code == 200
+        assert r.json()["status"] == "reopened"
+
+        db.expire_all()
+        assert db.get(ArchivedTicket, old[0]) is None
+        assert db.get(Ticket, old[0]).status == "reopened"
+        texts = [m["text"] for m in client.get(
+            f"/tickets/{old[0]}/messages", headers=auth_headers(author)
+        ).json()]
+        assert texts == ["Привет", "── Обращение переоткрыто"]
+
+    def test_invalid_transition_keeps_archive(self, client, db):
+        author, old, _ = seed(db)
+        archive(db)
+        r = client.put(f"/tickets/{old[0]}/status", json={"status": "in_progress"},
+                       headers=auth_headers(author))
+        assert r.status_code == 400
+        db.expire_all()
+        assert db.get(ArchivedTicket, old[0]).status == "closed"
+
+    def test_other_writes_conflict(self, client, db):
+        author, old, _ = seed(db)
+        archive(db)
+        headers = auth_headers(author)
+        assert client.put(f"/tickets/{old[0]}/urgent", json={"is_urgent": True},
+                          headers=headers).status_code == 409
+        assert client.post(f"/tickets/{old[0]}/messages", data={"text": "Ещё"},
+                           headers=headers).status_code == 409
+
+    def test_bulk_reopen(self, client, db):
+        author, old, _ = seed(db)
+        archive(db)
+        r = client.post("/tickets/bulk", headers=auth_headers(author), json={"operations": [
+            {"ticket_id": old[0], "action": "status", "status": "reopened"},
+            {"ticket_id": old[1], "action": "urgent", "is_urgent": True},
+        ]})
+        assert [item["status_code"] for item in r.json()] == [200, 409]
+        db.expire_all()
+        assert db.get(Ticket, old[0]).status == "reopened"
+        assert db.get(ArchivedTicket, old[1]) is not None
@@ -1,6 +1,7 @@
 import pytest
 from datetime import datetime, timedelta, timezone
 from app.auth import create_jwt, decode_jwt, determine_role
+from tests.conftest import patch_roles
 
 
 class TestCreateJWT:
@@ -48,23 +49,17 @@ class TestDecodeJWT:
 
 class TestDetermineRole:
     def test_role_admin(self):
-        with pytest.MonkeyPatch.context() as m:
-            m.setattr("app.auth.ADMIN_IDS", [100, 200])
-            m.setattr("app.auth.SUPPORT_IDS", [300, 400])
+        with patch_roles(admins=[100, 200], support=[300, 400]):
             assert determine_role(100) == "admin"
             assert determine_role(200) == "admin"
 
     def test_role_support(self):
-        with pytest.MonkeyPatch.context() as m:
-            m.setattr("app.auth.ADMIN_IDS", [100, 200])
-            m.setattr("app.auth.SUPPORT_IDS", [300, 400])
+        with patch_roles(admins=[100, 200], support=[300, 400]):
             assert determine_role(300) == "support"
             assert determine_role(400) == "support"
 
     def test_role_author_default(self):
-        with pytest.MonkeyPatch.context() as m:
-            m.setattr("app.auth.ADMIN_IDS", [100, 200])
-            m.setattr("app.auth.SUPPORT_IDS", [300, 400])
+        with patch_roles(admins=[100, 200], support=[300, 400]):
             assert determine_role(999) == "author"
             assert determine_role(1) == "author"
 
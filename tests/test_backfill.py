@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.backfill import backfill_last_messages
+from app.database import Base, upgrade_schema
+from app.models import ArchivedMessage, ArchivedTicket, Message, Ticket
+from tests.conftest import make_user
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+NEW_COLUMNS = ("last_message_at", "last_message_preview", "message_count")
+
+
+def add_ticket(db, author, texts, model=Ticket, message_model=Message):
+    """A ticket with messages written before the columns were maintained."""
+    ticket = model(number=f"#{len(texts)}-{model.__name__}", author_id=author.id, status="closed",
+                   title="t", description="d", created_at=T0, updated_at=T0)
+    db.add(ticket)
+    db.flush()
+    for minutes, body in enumerate(texts):
+        db.add(message_model(ticket_id=ticket.id, sender_id=author.id, sender_role="author",
+                             text=body, created_at=T0 + timedelta(minutes=minutes)))
+    db.commit()
+    return ticket
+
+
+class TestUpgradeSchema:
+    def test_adds_missing_columns(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            for column in NEW_COLUMNS:  # a database from before the columns
+                conn.execute(text(f"ALTER TABLE tickets DROP COLUMN {column}"))
+            conn.execute(text(
+                "INSERT INTO tickets (id, number, author_id, status, is_urgent, title, description,"
+                " created_at, updated_at) VALUES (1, '#1', 1, 'new', 0, 't', 'd', '2026-01-01', '2026-01-01')"
+            ))
+        with engine.begin() as conn:
+            upgrade_schema(conn)
+            upgrade_schema(conn)  # nothing left to do the second time
+
+        columns = {column["name"] for column in inspect(engine).get_columns("tickets")}
+        assert set(NEW_COLUMNS) <= columns
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT message_count FROM tickets")).scalar() == 0
+        engine.dispose()
+
+
+class TestBackfill:
+    def test_fills_live_and_archived(self, db):
+        author = make_user(db, telegram_id=1)
+        live = add_ticket(db, author, ["первое", "второе\nсообщение"])
+        empty = add_ticket(db, author, [])
+        archived = add_ticket(db, author, ["в архиве"], ArchivedTicket, ArchivedMessage)
+
+        assert backfill_last_messages(db, batch_size=1, pause=0) == 3
+
+        db.expire_all()
+        assert (live.message_count, live.last_message_preview) == (2, "второе сообщение")
+        assert live.last_message_at.replace(tzinfo=None) == (T0 + timedelta(minutes=1)).replace(tzinfo=None)
+        assert (empty.message_count, empty.last_message_at, empty.last_message_preview) == (0, None, None)
+        assert (archived.message_count, archived.last_message_preview) == (1, "в архиве")
+
+    def test_keeps_updated_at_and_is_idempotent(self, db):
+        author = make_user(db, telegram_id=1)
+        ticket = add_ticket(db, author, ["a", "b"])
+        backfill_last_messages(db, pause=0)
+        backfill_last_messages(db, pause=0)
+
+        db.expire_all()
+        assert ticket.message_count == 2
+        assert ticket.updated_at.replace(tzinfo=None) == T0.replace(tzinfo=None)
+
+    def test_repairs_counts(self, db):
+        author = make_user(db, telegram_id=1)
+        ticket = add_ticket(db, author, ["a"])
+        ticket.message_count = 7  # e.g. after messages were deleted by hand
+        db.commit()
+
+        backfill_last_messages(db, pause=0)
+        db.expire_all()
+        assert ticket.message_count == 1
+
+    def test_resets_tickets_without_messages(self, db):
+        author = make_user(db, telegram_id=1)
+        ticket = add_ticket(db, author, [])
+        ticket.message_count, ticket.last_message_at, ticket.last_message_preview = 3, T0, "удалено"
+        db.commit()
+
+        backfill_last_messages(db, pause=0)
+        db.expire_all()
+        assert (ticket.message_count, ticket.last_message_at, ticket.last_message_preview) == (0, None, None)
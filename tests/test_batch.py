@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.routers.batch import BATCH_MAX_REQUESTS
+from tests.conftest import TestingSessionLocal, auth_headers, make_user, TICKET_PAYLOAD
+
+
+def _batch(client, user, paths, **extra):
+    body = {"requests": [{"id": str(i), "path": p} for i, p in enumerate(paths)], **extra}
+    return client.post("/batch", json=body, headers=auth_headers(user))
+
+
+class TestBatch:
+    def test_ticket_detail_screen(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user)).json()
+        r = _batch(client, user, [f"/tickets/{ticket['id']}", f"/tickets/{ticket['id']}/messages"])
+        assert r.status_code == 200
+        first, second = r.json()["responses"]
+        assert first["id"] == "0" and first["status"] == 200
+        assert first["body"]["title"] == TICKET_PAYLOAD["title"]
+        assert first["etag"]
+        assert second["status"] == 200 and isinstance(second["body"], list)
+
+    def test_query_string(self, client, db):
+        user = make_user(db, telegram_id=1)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user))
+        r = _batch(client, user, ["/tickets?filter=mine&view=compact", "/tickets?filter=closed"])
+        mine, closed = r.json()["responses"]
+        assert len(mine["body"]) == 1 and "author_username" in mine["body"][0]
+        assert closed["body"] == []
+
+    def test_errors_are_per_item(self, client, db):
+        user = make_user(db, telegram_id=1)
+        r = _batch(client, user, ["/tickets/999", "/tickets?filter=all", "/auth/me"])
+        statuses = [item["status"] for item in r.json()["responses"]]
+        assert statuses == [404, 403, 200]
+
+    def test_validation_error(self, client, db):
+        user = make_user(db, telegram_id=1)
+        item = _batch(client, user, ["/tickets/abc"]).json()["responses"][0]
+        assert item["status"] == 422
+
+    def test_disallowed_paths(self, client, db):
+        user = make_user(db, telegram_id=1)
+        paths = ["/files/1", "/batch", "https://evil.example/tickets", "/tickets/../files/1"]
+        for item in _batch(client, user, paths).json()["responses"]:
+            assert item["status"] == 400
+
+    def test_unknown_route(self, client, db):
+        user = make_user(db, telegram_id=1)
+        item = _batch(client, user, ["/tickets/1/nope"]).json()["responses"][0]
+        assert item["status"] == 404
+
+    def test_etag_not_modified(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user)).json()
+        path = f"/tickets/{ticket['id']}"
+        etag = _batch(client, user, [path]).json()["responses"][0]["etag"]
+        r = client.post(
+            "/batch",
+            json={"requests": [{"id": "t", "path": path, "etag": etag}]},
+            headers=auth_headers(user),
+        )
+        item = r.json()["responses"][0]
+        assert item["status"] == 304 and item["body"] is None
+
+    def test_requires_auth(self, client, db):
+        r = client.post("/batch", json={"requests": [{"id": "a", "path": "/auth/me"}]})
+        assert r.status_code in (401, 403)
+
+    def test_limits(self, client, db):
+        user = make_user(db, telegram_id=1)
+        assert _batch(client, user, []).status_code == 422
+        assert _batch(client, user, ["/auth/me"] * (BATCH_MAX_REQUESTS + 1)).status_code == 422
+
+    def test_parallel(self, client, db):
+        from app.main import app
+
+        def own_session():
+            session = TestingSessionLocal()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = own_session
+        user = make_user(db, telegram_id=1)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user))
+        r = _batch(client, user, ["/auth/me", "/tickets", "/tickets/999"], parallel=True)
+        assert [item["status"] for item in r.json()["responses"]] == [200, 200, 404]
+
+
+    def test_metrics_per_item(self, client, db):
+        user = make_user(db, telegram_id=1)
+        labels = {"method": "GET", "route": "/tickets", "status": "200"}
+        before = REGISTRY.get_sample_value("http_requests_total", labels) or 0.0
+        _batch(client, user, ["/tickets", "/tickets?filter=mine"])
+        assert REGISTRY.get_sample_value("http_requests_total", labels) == before + 2
+
+
+class TestSharedState:
+    def test_get_db_reuses_batch_session(self):
+        shared = object()
+        request = SimpleNamespace(state=SimpleNamespace(db=shared))
+        gen = get_db(request)
+        assert next(gen) is shared
+
+    def test_user_loaded_on_own_session(self, db):
+        user = make_user(db, telegram_id=1)
+        with TestingSessionLocal() as session:
+            request = SimpleNamespace(state=SimpleNamespace(user_id=user.id))
+            loaded = get_current_user(request, None, session)
+            assert loaded.id == user.id
+            assert loaded is not user and loaded in session
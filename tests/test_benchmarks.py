@@ -0,0 +1,41 @@
+import argparse
+
+from app.auth import _validate_telegram_init_data
+from benchmarks.api import compare, median_of_rounds, run, sign_init_data, summarize
+
+
+class TestApiBenchmarkHelpers:
+    def test_signed_init_data_validates(self):
+        init_data = sign_init_data({"id": 7, "first_name": "Тест"}, bot_token="123:abc")
+        assert _validate_telegram_init_data(init_data, "123:abc")["id"] == 7
+
+    def test_summarize(self):
+        result = summarize([0.001 * i for i in range(1, 101)], wall=1.0)
+        assert result["requests"] == 100
+        assert result["throughput_rps"] == 100.0
+        assert result["p50_ms"] < result["p95_ms"] < result["p99_ms"] <= 100
+
+    def test_median_of_rounds(self):
+        rounds = [{"requests": 10, "p95_ms": p95, "throughput_rps": rps}
+                  for p95, rps in ((5.0, 100.0), (50.0, 10.0), (6.0, 90.0))]
+        result = median_of_rounds(rounds)
+        assert result == {"requests": 30, "p95_ms": 6.0, "throughput_rps": 90.0, "rounds": 3}
+
+    def test_compare(self):
+        baseline = {"scenarios": {"a": {"p95_ms": 10.0, "throughput_rps": 100.0}}}
+        same = {"scenarios": {"a": {"p95_ms": 11.0, "throughput_rps": 95.0}}}
+        slower = {"scenarios": {"a": {"p95_ms": 13.0, "throughput_rps": 70.0}},
+                  "new": {}}
+        assert compare(same, baseline, tolerance=0.2) == []
+        assert len(compare(slower, baseline, tolerance=0.2)) == 2
+
+
+class TestApiBenchmarkRun:
+    def test_whole_suite_at_small_scale(self):
+        # A third of the bench author's seeded tickets are closed; writes must skip them.
+        args = argparse.Namespace(tickets=300, messages=2, iterations=12, warmup=2, repeat=2,
+                                  only=None)
+        scenarios = run(args)["scenarios"]
+        assert {"POST /tickets/{id}/messages", "POST /tickets/{id}/files"} <= set(scenarios)
+        assert all(result["requests"] == 24 for result in scenarios.values())
+        assert all(result["rounds"] == 2 for result in scenarios.values())
@@ -0,0 +1,124 @@
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from app.routers import bootstrap as bootstrap_module
+from tests.conftest import auth_headers, engine, make_user, patch_roles, TICKET_PAYLOAD
+
+
+def _bootstrap(client, telegram_id, start_param=None):
+    with patch("app.auth._validate_telegram_init_data") as mock_validate:
+        mock_validate.return_value = {"id": telegram_id, "first_name": "Test", "username": "test"}
+        body = {"initData": "signed"}
+        if start_param is not None:
+            body["startParam"] = start_param
+        return client.post("/bootstrap", json=body)
+
+
+class TestBootstrap:
+    def test_new_user(self, client, db):
+        r = _bootstrap(client, 12345)
+        assert r.status_code == 200
+        data = r.json()
+        assert data["token"]
+        assert data["user"]["telegram_id"] == 12345
+        assert data["tab"] == "mine"
+        assert data["tickets"] == []
+        assert data["counts"] == {"mine": 0, "closed": 0}
+        assert data["ticket"] is None
+
+    def test_invalid_init_data(self, client, db):
+        with patch("app.auth._validate_telegram_init_data", side_effect=ValueError("bad")):
+            r = client.post("/bootstrap", json={"initData": "forged"})
+        assert r.status_code == 401
+
+    def test_token_works(self, client, db):
+        token = _bootstrap(client, 12345).json()["token"]
+        r = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert r.status_code == 200
+
+    def test_first_page_and_counts(self, client, db):
+        user = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        for _ in range(3):
+            client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user))
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(support))
+
+        with patch_roles(support=[2]):
+            data = _bootstrap(client, 2).json()
+        assert len(data["tickets"]) == 1
+        assert "author_username" in data["tickets"][0]
+        assert data["counts"] == {"mine": 1, "all": 4, "closed": 0}
+
+    def test_page_size(self, client, db):
+        user = make_user(db, telegram_id=1)
+        for _ in range(3):
+            client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user))
+        with patch.object(bootstrap_module, "BOOTSTRAP_PAGE_SIZE", 2):
+            data = _bootstrap(client, 1).json()
+        assert len(data["tickets"]) == 2
+        assert data["counts"]["mine"] == 3
+
+    def test_deep_link(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user)).json()
+        for text in ("Раз", "Два", "Три"):
+            client.post(
+                f"/tickets/{ticket['id']}/messages", data={"text": text}, headers=auth_headers(user)
+            )
+
+        with patch.object(bootstrap_module, "BOOTSTRAP_MESSAGES", 2):
+            data = _bootstrap(client, 1, f"ticket_{ticket['id']}").json()
+        assert data["ticket"]["id"] == ticket["id"]
+        assert [m["text"] for m in data["messages"]] == ["Два", "Три"]
+        assert data["has_more_messages"] is True
+
+    def test_deep_link_queries_dont_grow_with_messages(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+
+        def statements(replies):
+            ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+            for i in range(replies):
+                client.post(f"/tickets/{ticket['id']}/messages", data={"text": f"Ответ {i}"},
+                            headers=auth_headers(support))
+            seen = []
+            listener = lambda conn, cursor, statement, *args: seen.append(statement)
+            event.listen(engine, "before_cursor_execute", listener)
+            try:
+                data = _bootstrap(client, 1, f"ticket_{ticket['id']}").json()
+            finally:
+                event.remove(engine, "before_cursor_execute", listener)
+            assert len(data["messages"]) == replies
+            return len(seen)
+
+        _bootstrap(client, 1)  # the first login also updates the profile
+        assert statements(2) == statements(6)
+
+    def test_deep_link_foreign_ticket_hidden(self, client, db):
+        owner = make_user(db, telegram_id=1)
+        make_user(db, telegram_id=2)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(owner)).json()
+
+        data = _bootstrap(client, 2, f"ticket_{ticket['id']}").json()
+        assert data["ticket"] is None
+        assert data["messages"] is None
+
+    def test_bad_start_param(self, client, db):
+        for param in ("ticket_abc", "ticket_99999", "promo"):
+            r = _bootstrap(client, 1, param)
+            assert r.status_code == 200
+            assert r.json()["ticket"] is None
+
+    def test_unread(self, client, db):
+        user = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user)).json()
+        client.post(f"/tickets/{ticket['id']}/messages", data={"text": "Ответ"}, headers=auth_headers(support))
+
+        data = _bootstrap(client, 1).json()
+        assert data["unread"] == {"messages": 1, "tickets": 1}
+        assert data["tickets"][0]["unread"] == 1
+
+        _bootstrap(client, 1, f"ticket_{ticket['id']}")  # the deep link opens the chat
+        assert _bootstrap(client, 1).json()["unread"] == {"messages": 0, "tickets": 0}
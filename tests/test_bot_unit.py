@@ -1,20 +1,19 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from app import bot
+from tests.conftest import patch_roles
 
 
 class TestSupportRecipients:
     def test_support_recipients(self):
-        with patch("app.bot.ADMIN_IDS", [100, 200]):
-            with patch("app.bot.SUPPORT_IDS", [300, 400]):
-                recipients = bot._support_recipients()
-                assert set(recipients) == {100, 200, 300, 400}
+        with patch_roles(admins=[100, 200], support=[300, 400]):
+            recipients = bot._support_recipients()
+            assert set(recipients) == {100, 200, 300, 400}
 
     def test_support_recipients_dedup(self):
-        with patch("app.bot.ADMIN_IDS", [100, 200, 300]):
-            with patch("app.bot.SUPPORT_IDS", [300, 400]):
-                recipients = bot._support_recipients()
-                assert set(recipients) == {100, 200, 300, 400}
+        with patch_roles(admins=[100, 200, 300], support=[300, 400]):
+            recipients = bot._support_recipients()
+            assert recipients == (100, 200, 300, 400)
 
 
 class TestSend:
@@ -227,4 +226,28 @@ class TestNotifyNewMessage:
                 assert mock_send.call_count == 2
                 call_text = mock_send.call_args[0][1]
                 assert "#001" in call_text
-                assert "customer" in call_text
\ No newline at end of file
+                assert "customer" in call_text
+
+
+class TestNotifyBatch:
+    @pytest.mark.asyncio
+    async def test_runs_each_notification(self):
+        first = AsyncMock()
+        second = AsyncMock()
+        ticket = MagicMock()
+        user = MagicMock()
+
+        await bot.notify_batch([(first, ticket, user), (second, ticket, "new", user)])
+
+        first.assert_awaited_once_with(ticket, user)
+        second.assert_awaited_once_with(ticket, "new", user)
+
+    @pytest.mark.asyncio
+    async def test_failure_does_not_stop_the_batch(self):
+        broken = AsyncMock(side_effect=RuntimeError("boom"))
+        broken.__name__ = "broken"
+        second = AsyncMock()
+
+        await bot.notify_batch([(broken, MagicMock()), (second, MagicMock())])
+
+        second.assert_awaited_once()
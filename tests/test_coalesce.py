@@ -0,0 +1,148 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.coalesce import SingleFlight
+from app.models import Ticket
+from app.routers.tickets import list_flights
+from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
+
+
+def coalesced(flight: str, result: str) -> float:
+    return REGISTRY.get_sample_value(
+        "coalesced_requests_total", {"flight": flight, "result": result}
+    ) or 0.0
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        # The TTL only guards against a follower arriving after the leader is done.
+        flight = SingleFlight("test", ttl=60)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return b"body"
+
+        with ThreadPoolExecutor(4) as pool:
+            leader = pool.submit(flight.do, "k", compute)
+            started.wait(5)
+            followers = [pool.submit(flight.do, "k", compute) for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert results == [b"body"] * 4
+        assert len(calls) == 1
+
+    def test_no_ttl_recomputes_sequential_calls(self):
+        flight = SingleFlight("test", ttl=0)
+        assert flight.do("k", object) is not flight.do("k", object)
+
+    def test_ttl_reuses_result(self):
+        flight = SingleFlight("test", ttl=60)
+        first = flight.do("k", object)
+        assert flight.do("k", object) is first
+        assert flight.do("other", object) is not first
+
+    def test_errors_reach_waiters_and_are_not_kept(self):
+        flight = SingleFlight("test", ttl=60)
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            flight.do("k", fail)
+        assert flight.do("k", lambda: "ok") == "ok"
+
+    def test_result_computed_across_invalidation_is_dropped(self):
+        flight = SingleFlight("test", ttl=60)
+
+        def compute():
+            flight.invalidate()  # a write commits while we're reading
+            return "stale"
+
+        assert flight.do("k", compute) == "stale"
+        assert flight.do("k", lambda: "fresh") == "fresh"
+
+
+class TestInvalidation:
+    @pytest.fixture
+    def flight(self):
+        flight = SingleFlight("test", ttl=60)
+        flight.do("k", lambda: "cached")
+        return flight
+
+    def test_ticket_write_invalidates(self, db, flight):
+        author = make_user(db, telegram_id=1)
+        assert flight.do("k", lambda: "fresh") == "cached"  # user rows don't count
+        db.add(Ticket(number="#1", author_id=author.id, status="new", title="t", description="d"))
+        db.commit()
+        assert flight.do("k", lambda: "fresh") == "fresh"
+
+    def test_rolled_back_write_keeps_cache(self, db, flight):
+        author = make_user(db, telegram_id=1)
+        db.add(Ticket(number="#1", author_id=author.id, status="new", title="t", description="d"))
+        db.flush()
+        db.rollback()
+        db.commit()
+        assert flight.do("k", lambda: "fresh") == "cached"
+
+
+class TestTicketList:
+    @pytest.fixture(autouse=True)
+    def ttl(self, monkeypatch):
+        monkeypatch.setattr(list_flights, "ttl", 60)
+        list_flights.invalidate()
+
+    def test_staff_share_etag_and_body(self, client, db):
+        author = make_user(db, telegram_id=1)
+        first = make_user(db, telegram_id=2, role="support")
+        second = make_user(db, telegram_id=3, role="support")
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author))
+        before = coalesced("ticket_list", "shared")
+
+        a = client.get("/tickets?filter=all", headers=auth_headers(first))
+        b = client.get("/tickets?filter=all", headers=auth_headers(second))
+
+        assert a.headers["etag"] == b.headers["etag"]
+        assert a.content == b.content
+        assert coalesced("ticket_list", "shared") == before + 1  # the body; the ETag is from the queue index
+        r = client.get("/tickets?filter=all", headers={
+            **auth_headers(second), "If-None-Match": a.headers["etag"],
+        })
+        assert r.status_code == 304
+
+    def test_closed_tab_shares_validator_too(self, client, db):
+        first = make_user(db, telegram_id=2, role="support")
+        second = make_user(db, telegram_id=3, role="admin")
+        before = coalesced("ticket_list", "shared")
+
+        a = client.get("/tickets?filter=closed", headers=auth_headers(first))
+        b = client.get("/tickets?filter=closed", headers=auth_headers(second))
+
+        assert a.headers["etag"] == b.headers["etag"]
+        assert coalesced("ticket_list", "shared") == before + 2
+
+    def test_write_shows_up_immediately(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author))
+        assert len(client.get("/tickets?filter=all", headers=auth_headers(support)).json()) == 1
+
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author))
+        assert len(client.get("/tickets?filter=all", headers=auth_headers(support)).json()) == 2
+
+    def test_per_user_tabs_not_shared(self, client, db):
+        first = make_user(db, telegram_id=1)
+        second = make_user(db, telegram_id=2)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(first))
+
+        assert len(client.get("/tickets?filter=mine", headers=auth_headers(first)).json()) == 1
+        assert client.get("/tickets?filter=mine", headers=auth_headers(second)).json() == []
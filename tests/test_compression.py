@@ -0,0 +1,256 @@
+import gzip
+from io import BytesIO
+from unittest.mock import patch
+
+import anyio.to_thread
+from fastapi import FastAPI
+from fastapi.responses import FileResponse, PlainTextResponse, Response
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import CompressionMiddleware, choose_encoding
+from app.routers import files as files_router
+from app.static import PrecompressedStaticFiles, build_frontend, precompress_directory
+from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
+
+
+class TestChooseEncoding:
+    def test_prefers_brotli(self):
+        assert choose_encoding("gzip, deflate, br") == "br"
+
+    def test_gzip_only(self):
+        assert choose_encoding("gzip, deflate") == "gzip"
+
+    def test_q_values(self):
+        assert choose_encoding("br;q=0.5, gzip;q=1.0") == "gzip"
+        assert choose_encoding("br;q=0, gzip;q=0") is None
+
+    def test_wildcard_and_empty(self):
+        assert choose_encoding("*") == "br"
+        assert choose_encoding("") is None
+        assert choose_encoding("identity") is None
+
+
+class TestCompressionMiddleware:
+    def _app(self, body: str) -> FastAPI:
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+        @app.get("/text")
+        def text():
+            return PlainTextResponse(body)
+
+        return app
+
+    def test_compresses_large_body(self):
+        client = TestClient(self._app("x" * 1000))
+        r = client.get("/text", headers={"Accept-Encoding": "br"})
+        assert r.headers["content-encoding"] == "br"
+        assert "Accept-Encoding" in r.headers["vary"]
+        assert r.text == "x" * 1000
+
+    def test_gzip(self):
+        client = TestClient(self._app("y" * 1000))
+        r = client.get("/text", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert int(r.headers["content-length"]) < 1000
+
+    def test_skips_small_body(self):
+        client = TestClient(self._app("tiny"))
+        r = client.get("/text", headers={"Accept-Encoding": "br"})
+        assert "content-encoding" not in r.headers
+        assert r.text == "tiny"
+
+    def test_skips_without_accept_encoding(self):
+        client = TestClient(self._app("x" * 1000))
+        r = client.get("/text", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in r.headers
+
+    def test_vary_on_every_compressible_response(self):
+        for body, accept in (("tiny", "br"), ("x" * 1000, "identity")):
+            r = TestClient(self._app(body)).get("/text", headers={"Accept-Encoding": accept})
+            assert "content-encoding" not in r.headers
+            assert r.headers["vary"] == "Accept-Encoding"
+
+    def test_no_vary_for_binary(self):
+        app = self._app("")
+
+        @app.get("/blob")
+        def blob():
+            return Response(b"\0" * 1000, media_type="application/octet-stream")
+
+        r = TestClient(app).get("/blob", headers={"Accept-Encoding": "br"})
+        assert "content-encoding" not in r.headers
+        assert "vary" not in r.headers
+
+    def test_large_body_compressed_off_the_loop(self):
+        client = TestClient(self._app("x" * 1000))
+        with patch.object(compression, "OFFLOAD_MIN_SIZE", 500), \
+                patch.object(anyio.to_thread, "run_sync", wraps=anyio.to_thread.run_sync) as run_sync:
+            r = client.get("/text", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.text == "x" * 1000
+        assert any(call.args[0] is compression.compress for call in run_sync.call_args_list)
+
+    def test_skips_downloads(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("z" * 1000)
+        app = self._app("")
+
+        @app.get("/file")
+        def file():
+            return FileResponse(path)
+
+        @app.get("/attachment")
+        def attachment():
+            return PlainTextResponse("z" * 1000, headers={"Content-Disposition": "attachment"})
+
+        client = TestClient(app)
+        for url in ("/file", "/attachment"):
+            r = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+            assert "content-encoding" not in r.headers
+            assert r.headers["content-length"] == "1000"
+
+    def test_file_download_not_compressed(self, client, db, tmp_path):
+        user = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user)).json()
+        with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+            uploaded = client.post(
+                f"/tickets/{ticket['id']}/files",
+                files={"file": ("log.txt", BytesIO(b"line\n" * 1300), "text/plain")},
+                headers=auth_headers(user),
+            ).json()
+            full = client.get(uploaded["url"], headers={"Accept-Encoding": "gzip"})
+            part = client.get(uploaded["url"], headers={"Accept-Encoding": "gzip", "Range": "bytes=0-99"})
+        assert "content-encoding" not in full.headers
+        assert full.headers["content-length"] == "6500"
+        assert part.status_code == 206
+        assert part.headers["etag"] == full.headers["etag"]
+
+    def test_api_json_compressed(self, client, db):
+        user = make_user(db, telegram_id=1)
+        for _ in range(10):
+            client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user))
+        r = client.get("/tickets", headers={**auth_headers(user), "Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert len(r.json()) == 10
+
+
+class TestPrecompressedStatic:
+    def _setup(self, tmp_path):
+        (tmp_path / "app.js").write_text("console.log('hello');\n" * 200)
+        (tmp_path / "small.css").write_text("a{}")
+        (tmp_path / "logo.png").write_bytes(b"\x89PNG" * 500)
+        app = FastAPI()
+        app.mount("/", PrecompressedStaticFiles(directory=str(tmp_path)), name="static")
+        return TestClient(app)
+
+    def test_precompress_writes_siblings(self, tmp_path):
+        self._setup(tmp_path)
+        assert precompress_directory(tmp_path, minimum_size=1024) == 2
+        assert (tmp_path / "app.js.br").exists()
+        assert (tmp_path / "app.js.gz").exists()
+        assert not (tmp_path / "small.css.br").exists()
+        assert not (tmp_path / "logo.png.gz").exists()
+        # Second run is a no-op: siblings are fresh.
+        assert precompress_directory(tmp_path, minimum_size=1024) == 0
+
+    def test_serves_brotli_sibling(self, tmp_path):
+        client = self._setup(tmp_path)
+        precompress_directory(tmp_path, minimum_size=1024)
+        r = client.get("/app.js", headers={"Accept-Encoding": "br"})
+        assert r.status_code == 200
+        assert r.headers["content-encoding"] == "br"
+        assert r.headers["content-type"].startswith("text/javascript")
+        assert int(r.headers["content-length"]) == (tmp_path / "app.js.br").stat().st_size
+        assert r.text == (tmp_path / "app.js").read_text()
+
+    def test_serves_gzip_sibling(self, tmp_path):
+        client = self._setup(tmp_path)
+        precompress_directory(tmp_path, minimum_size=1024)
+        r = client.get("/app.js", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-encoding"] == "gzip"
+        assert gzip.decompress((tmp_path / "app.js.gz").read_bytes()) == (tmp_path / "app.js").read_bytes()
+
+    def test_identity_without_sibling(self, tmp_path):
+        client = self._setup(tmp_path)
+        r = client.get("/app.js", headers={"Accept-Encoding": "br"})
+        assert "content-encoding" not in r.headers
+        assert r.headers["vary"] == "Accept-Encoding"
+
+    def test_compressed_not_modified(self, tmp_path):
+        client = self._setup(tmp_path)
+        precompress_directory(tmp_path, minimum_size=1024)
+        etag = client.get("/app.js", headers={"Accept-Encoding": "br"}).headers["etag"]
+        r = client.get("/app.js", headers={"Accept-Encoding": "br", "If-None-Match": etag})
+        assert r.status_code == 304
+
+
+class TestFrontendBuild:
+    INDEX = (
+        '<script src="https://telegram.org/js/telegram-web-app.js"></script>\n'
+        '<link rel="stylesheet" href="style.css" />\n'
+        '<script src="app.js"></script>\n'
+    )
+
+    def _src(self, tmp_path):
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "index.html").write_text(self.INDEX)
+        (src / "app.js").write_text("console.log(1);")
+        (src / "style.css").write_text("body{}")
+        return src
+
+    def test_rewrites_references(self, tmp_path):
+        src = self._src(tmp_path)
+        out = build_frontend(src, tmp_path / "dist")
+        index = (out / "index.html").read_text()
+        assert "https://telegram.org/js/telegram-web-app.js" in index
+        assert 'src="app.js"' not in index
+        hashed_js = [p.name for p in out.glob("app.*.js")]
+        assert len(hashed_js) == 1
+        assert f'src="{hashed_js[0]}"' in index
+        assert (out / hashed_js[0]).read_text() == "console.log(1);"
+        # Originals are still copied for anything linking to them directly.
+        assert (out / "app.js").exists()
+        # Source index.html is untouched.
+        assert (src / "index.html").read_text() == self.INDEX
+
+    def test_hash_follows_content(self, tmp_path):
+        src = self._src(tmp_path)
+        out = build_frontend(src, tmp_path / "dist")
+        first = (out / "index.html").read_text()
+        assert build_frontend(src, out) and (out / "index.html").read_text() == first
+
+        (src / "app.js").write_text("console.log(2);")
+        build_frontend(src, out)
+        assert (out / "index.html").read_text() != first
+        assert len(list(out.glob("app.*.js"))) == 2  # old hash kept for stale clients
+
+    def test_cache_headers(self, tmp_path):
+        out = build_frontend(self._src(tmp_path), tmp_path / "dist")
+        app = FastAPI()
+        app.mount("/", PrecompressedStaticFiles(directory=str(out), html=True), name="static")
+        client = TestClient(app)
+
+        hashed = next(out.glob("app.*.js")).name
+        r = client.get(f"/{hashed}")
+        assert r.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+        r = client.get("/")
+        assert r.headers["cache-control"] == "no-cache"
+        r = client.get("/", headers={"If-None-Match": r.headers["etag"]})
+        assert r.status_code == 304
+
+        assert "cache-control" not in client.get("/app.js").headers
+
+    def test_use_directory(self, tmp_path):
+        src = self._src(tmp_path)
+        files = PrecompressedStaticFiles(directory=str(src), html=True)
+        app = FastAPI()
+        app.mount("/", files, name="static")
+        client = TestClient(app)
+        assert 'src="app.js"' in client.get("/").text
+
+        files.use_directory(build_frontend(src, tmp_path / "dist"))
+        assert 'src="app.js"' not in client.get("/").text
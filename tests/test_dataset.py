@@ -0,0 +1,88 @@
+import sqlite3
+
+from benchmarks.dataset import generate
+from app.routers.tickets import STATUS_LABELS
+
+
+def _generate(path, seed=1, uploads=None):
+    return generate(path, users=80, tickets=300, messages=6, seed=seed,
+                    uploads=uploads, log=lambda *_: None)
+
+
+def _dump(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in ("users", "tickets", "messages", "ticket_files", "message_files")
+        }
+    finally:
+        conn.close()
+
+
+class TestDatasetGenerator:
+    def test_counts(self, tmp_path):
+        counts = _generate(tmp_path / "a.db")
+        assert counts["users"] == 80
+        assert counts["tickets"] == 300
+        assert counts["messages"] > 300
+        data = _dump(tmp_path / "a.db")
+        assert len(data["messages"]) == counts["messages"]
+
+    def test_deterministic_by_seed(self, tmp_path):
+        _generate(tmp_path / "a.db", seed=7)
+        _generate(tmp_path / "b.db", seed=7)
+        _generate(tmp_path / "c.db", seed=8)
+        assert _dump(tmp_path / "a.db") == _dump(tmp_path / "b.db")
+        assert _dump(tmp_path / "a.db") != _dump(tmp_path / "c.db")
+
+    def test_status_matches_history(self, tmp_path):
+        _generate(tmp_path / "a.db")
+        conn = sqlite3.connect(tmp_path / "a.db")
+        final_text = {
+            "closed": "── Обращение закрыто",
+            "reopened": "── Обращение переоткрыто",
+        }
+        for ticket_id, status, assigned in conn.execute(
+            "SELECT id, status, assigned_to FROM tickets"
+        ):
+            last = conn.execute(
+                "SELECT text FROM messages WHERE ticket_id = ? AND text LIKE '── Статус%' "
+                "OR ticket_id = ? AND text IN (?, ?) ORDER BY id DESC LIMIT 1",
+                (ticket_id, ticket_id, *final_text.values()),
+            ).fetchone()
+            if status == "new":
+                assert last is None and assigned is None
+                continue
+            expected = final_text.get(status, f"→ {STATUS_LABELS[status]}")
+            assert last[0].endswith(expected)
+            assert assigned is not None
+        conn.close()
+
+    def test_last_message_columns_match_messages(self, tmp_path):
+        _generate(tmp_path / "a.db")
+        conn = sqlite3.connect(tmp_path / "a.db")
+        mismatched = conn.execute(
+            "SELECT count(*) FROM tickets t WHERE message_count != "
+            "(SELECT count(*) FROM messages m WHERE m.ticket_id = t.id) "
+            "OR last_message_at IS NOT (SELECT max(created_at) FROM messages m WHERE m.ticket_id = t.id)"
+        ).fetchone()[0]
+        conn.close()
+        assert mismatched == 0
+
+    def test_indexes_and_uniques(self, tmp_path):
+        _generate(tmp_path / "a.db")
+        conn = sqlite3.connect(tmp_path / "a.db")
+        indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert "ix_tickets_number" in indexes
+        numbers = [n for (n,) in conn.execute("SELECT number FROM tickets")]
+        assert len(set(numbers)) == len(numbers)
+        conn.close()
+
+    def test_sparse_files(self, tmp_path):
+        uploads = tmp_path / "uploads"
+        _generate(tmp_path / "a.db", uploads=uploads)
+        conn = sqlite3.connect(tmp_path / "a.db")
+        path, size = conn.execute("SELECT stored_path, filesize FROM ticket_files LIMIT 1").fetchone()
+        conn.close()
+        assert (uploads / path).stat().st_size == size
@@ -1,5 +1,8 @@
 import pytest
 from io import BytesIO
+from unittest.mock import patch
+
+from app.routers import files as files_router
 from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
 
 
@@ -162,4 +165,96 @@ class TestDownloadFile:
         stored_path = upload_r.json()["stored_path"]
 
         r = client.get(f"/files/{stored_path}", headers=auth_headers(admin))
-        assert r.status_code == 200
\ No newline at end of file
+        assert r.status_code == 200
+
+
+class TestProxyOffload:
+    @pytest.fixture
+    def uploaded(self, client, db, tmp_path):
+        owner = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(owner)).json()
+        with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+            r = client.post(
+                f"/tickets/{ticket['id']}/files",
+                files={"file": ("report 1.txt", BytesIO(b"content"), "text/plain")},
+                headers=auth_headers(owner),
+            )
+            yield owner, r.json()["stored_path"], tmp_path
+
+    def test_x_accel_redirect(self, client, uploaded):
+        owner, stored_path, _ = uploaded
+        with patch.object(files_router, "FILE_SERVING_MODE", "x-accel"):
+            r = client.get(f"/files/{stored_path}", headers=auth_headers(owner))
+        assert r.status_code == 200
+        assert r.content == b""
+        redirect = r.headers["x-accel-redirect"]
+        assert redirect.startswith("/protected-uploads/")
+        assert "%20" in redirect and " " not in redirect
+        assert r.headers["content-disposition"].startswith("attachment; filename*=utf-8''")
+
+    def test_x_sendfile(self, client, uploaded):
+        owner, stored_path, upload_dir = uploaded
+        with patch.object(files_router, "FILE_SERVING_MODE", "x-sendfile"):
+            r = client.get(f"/files/{stored_path}", headers=auth_headers(owner))
+        assert r.status_code == 200
+        raw = dict(r.headers.raw)[b"x-sendfile"]
+        assert raw == str((upload_dir / stored_path).resolve()).encode()
+
+    def test_access_still_checked(self, client, db, uploaded):
+        _, stored_path, _ = uploaded
+        other = make_user(db, telegram_id=2)
+        with patch.object(files_router, "FILE_SERVING_MODE", "x-accel"):
+            r = client.get(f"/files/{stored_path}", headers=auth_headers(other))
+        assert r.status_code == 403
+        assert "x-accel-redirect" not in r.headers
+
+
+class TestSignedDownload:
+    def upload(self, client, db, tmp_path, name, content=b"content"):
+        owner = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(owner)).json()
+        r = client.post(
+            f"/tickets/{ticket['id']}/files",
+            files={"file": (name, BytesIO(content), "application/octet-stream")},
+            headers=auth_headers(owner),
+        )
+        return owner, ticket, r.json()
+
+    def test_download_without_token(self, client, db, tmp_path):
+        with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+            _, _, uploaded = self.upload(client, db, tmp_path, "report.pdf")
+            assert uploaded["preview_url"] is None
+            r = client.get(uploaded["url"])
+        assert r.status_code == 200
+        assert r.content == b"content"
+        assert r.headers["content-disposition"].startswith("attachment")
+        assert r.headers["cache-control"].startswith("public, max-age=")
+
+    def test_image_preview_inline(self, client, db, tmp_path):
+        with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+            _, _, uploaded = self.upload(client, db, tmp_path, "shot.png", b"\x89PNG")
+            r = client.get(uploaded["preview_url"])
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "image/png"
+        assert r.headers["content-disposition"].startswith("inline")
+        assert r.headers["x-content-type-options"] == "nosniff"
+
+    def test_links_in_ticket(self, client, db, tmp_path):
+        with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+            owner, ticket, uploaded = self.upload(client, db, tmp_path, "report.pdf")
+            r = client.get(f"/tickets/{ticket['id']}", headers=auth_headers(owner))
+            assert r.json()["files"][0]["url"] == uploaded["url"]
+
+    def test_tampered_link(self, client, db, tmp_path):
+        with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+            _, _, uploaded = self.upload(client, db, tmp_path, "report.pdf")
+            assert client.get(uploaded["url"][:-1] + "x").status_code == 403
+            inline = uploaded["url"].replace("/download/", "/inline/")
+            assert client.get(inline).status_code == 403
+
+    def test_missing_file_is_404(self, client, db, tmp_path):
+        with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+            _, _, uploaded = self.upload(client, db, tmp_path, "report.pdf")
+            (tmp_path / uploaded["stored_path"]).unlink()
+            r = client.get(uploaded["url"])
+        assert r.status_code == 404
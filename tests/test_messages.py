@@ -1,4 +1,5 @@
 from io import BytesIO
+from unittest.mock import AsyncMock, patch
 
 from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
 
@@ -218,3 +219,65 @@ class TestMessages:
         r = client.get(f"/tickets/{ticket['id']}/messages", headers=auth_headers(admin))
         assert r.status_code == 200
         assert len(r.json()) == 1
+
+
+class TestMessagesAfterId:
+    def _send(self, client, user, ticket, text):
+        return client.post(
+            f"/tickets/{ticket['id']}/messages",
+            data={"text": text},
+            headers=auth_headers(user),
+        ).json()
+
+    def test_after_id_returns_only_newer(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = _create_ticket(client, user)
+        first = self._send(client, user, ticket, "Первое")
+        self._send(client, user, ticket, "Второе")
+        self._send(client, user, ticket, "Третье")
+
+        r = client.get(
+            f"/tickets/{ticket['id']}/messages?after_id={first['id']}",
+            headers=auth_headers(user),
+        )
+        assert r.status_code == 200
+        assert [m["text"] for m in r.json()] == ["Второе", "Третье"]
+
+    def test_after_latest_id_is_empty(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = _create_ticket(client, user)
+        last = self._send(client, user, ticket, "Единственное")
+
+        r = client.get(
+            f"/tickets/{ticket['id']}/messages?after_id={last['id']}",
+            headers=auth_headers(user),
+        )
+        assert r.json() == []
+
+    def test_after_id_zero_returns_all(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = _create_ticket(client, user)
+        self._send(client, user, ticket, "Раз")
+        self._send(client, user, ticket, "Два")
+
+        r = client.get(f"/tickets/{ticket['id']}/messages?after_id=0", headers=auth_headers(user))
+        assert len(r.json()) == 2
+
+    def test_after_id_negative_rejected(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = _create_ticket(client, user)
+        r = client.get(f"/tickets/{ticket['id']}/messages?after_id=-1", headers=auth_headers(user))
+        assert r.status_code == 422
+
+
+class TestMessageNotification:
+    def test_sent_after_session_close(self, isolated_client, db):
+        # The sender isn't the ticket author, so nothing else reloads it after commit.
+        author = make_user(db, telegram_id=1, username="author")
+        agent = make_user(db, telegram_id=2, role="support", username="agent")
+        ticket = isolated_client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        with patch("app.bot._send", new_callable=AsyncMock) as mock_send:
+            r = isolated_client.post(f"/tickets/{ticket['id']}/messages",
+                                     data={"text": "Привет"}, headers=auth_headers(agent))
+        assert r.status_code == 201
+        assert "Поддержка: Привет" in mock_send.await_args.args[1]
@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from prometheus_client import REGISTRY
+
+from app import bot
+from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetricsEndpoint:
+    def test_exposition_format(self, client, db):
+        r = client.get("/metrics")
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        assert "http_requests_total" in r.text
+        assert "threadpool_max_threads" in r.text
+
+    def test_route_template_label(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user)).json()
+        labels = {"method": "GET", "route": "/tickets/{ticket_id}", "status": "200"}
+        before = _sample("http_requests_total", **labels)
+        client.get(f"/tickets/{ticket['id']}", headers=auth_headers(user))
+        assert _sample("http_requests_total", **labels) == before + 1
+        assert 'route="/tickets/1"' not in client.get("/metrics").text
+
+    def test_db_queries_counted(self, client, db):
+        user = make_user(db, telegram_id=1)
+        labels = {"route": "/tickets"}
+        count = _sample("db_queries_per_request_count", **labels)
+        total = _sample("db_queries_per_request_sum", **labels)
+        client.get("/tickets", headers=auth_headers(user))
+        assert _sample("db_queries_per_request_count", **labels) == count + 1
+        assert _sample("db_queries_per_request_sum", **labels) > total
+
+    def test_static_paths_share_a_label(self, client, db):
+        # Everything outside the API falls through to the frontend mount.
+        before = _sample("http_requests_total", method="GET", route="static", status="403")
+        client.get("/nope/1")
+        client.get("/nope/2")
+        assert _sample(
+            "http_requests_total", method="GET", route="static", status="403"
+        ) == before + 2
+
+    def test_upload_bytes(self, client, db):
+        user = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user)).json()
+        before = _sample("upload_bytes_total", kind="ticket")
+        client.post(
+            f"/tickets/{ticket['id']}/files",
+            files={"file": ("a.txt", b"12345", "text/plain")},
+            headers=auth_headers(user),
+        )
+        assert _sample("upload_bytes_total", kind="ticket") == before + 5
+
+    def test_in_progress_returns_to_zero(self, client, db):
+        client.get("/metrics")
+        assert _sample("http_requests_in_progress") == 0
+
+
+class TestTelegramMetrics:
+    @pytest.mark.asyncio
+    async def test_send_results(self):
+        ok, error = _sample("telegram_send_total", result="ok"), _sample("telegram_send_total", result="error")
+        with patch("app.bot._get_bot") as mock_get_bot:
+            mock_get_bot.return_value.send_message = AsyncMock()
+            await bot._send(1, "hi")
+            mock_get_bot.return_value.send_message = AsyncMock(side_effect=RuntimeError("down"))
+            await bot._send(1, "hi")
+        assert _sample("telegram_send_total", result="ok") == ok + 1
+        assert _sample("telegram_send_total", result="error") == error + 1
+        assert _sample("telegram_send_duration_seconds_count") >= 2
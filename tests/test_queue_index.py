@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.models import Ticket
+from app.queue_index import Entry, QueueIndex, support_queue
+from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
+
+T0 = datetime(2026, 1, 1, 12, 0)
+
+
+def entry(ticket_id, minutes, status="new", urgent=False):
+    return Entry((T0 + timedelta(minutes=minutes), ticket_id), status, urgent)
+
+
+@pytest.fixture
+def index():
+    queue = QueueIndex(resync=60)
+    queue.apply({
+        1: entry(1, 1),
+        2: entry(2, 2, "in_progress", urgent=True),
+        3: entry(3, 3, "closed"),
+        4: entry(4, 4, "in_progress"),
+    })
+    return queue
+
+
+class TestIndex:
+    def test_newest_first(self, index):
+        assert index.page() == [4, 3, 2, 1]
+        assert index.page(status="in_progress") == [4, 2]
+        assert index.page(urgent=True) == [2]
+        assert index.page(status="in_progress", urgent=False) == [4]
+        assert index.page(status="on_pause") == []
+
+    def test_paging(self, index):
+        assert index.page(limit=2) == [4, 3]
+        assert index.page(before=entry(3, 3).key, limit=2) == [2, 1]
+        assert index.page(status="in_progress", before=entry(4, 4).key) == [2]
+
+    def test_update_moves_ticket(self, index):
+        index.apply({1: entry(1, 5, "in_progress")})
+        assert index.page() == [1, 4, 3, 2]
+        assert index.page(status="new") == []
+        assert index.page(status="in_progress") == [1, 4, 2]
+
+    def test_older_state_is_ignored(self, index):
+        index.apply({4: entry(4, 0, "closed")})
+        assert index.page(status="in_progress") == [4, 2]
+
+    def test_remove(self, index):
+        index.apply({2: None})
+        assert index.page() == [4, 3, 1]
+        assert index.page(urgent=True) == []
+
+    def test_stats_and_changes(self, index):
+        assert index.stats() == (4, entry(4, 4).key)
+        assert index.stats(status="in_progress", urgent=True) == (1, entry(2, 2).key)
+        assert index.stats(status="on_pause") == (0, None)
+        assert [ticket_id for ticket_id, _ in index.changed_since(T0 + timedelta(minutes=2))] == [4, 3]
+
+
+class TestFollowsCommits:
+    def test_commit_and_rollback(self, db):
+        author = make_user(db, telegram_id=1)
+        support_queue.refresh(db)
+        ticket = Ticket(number="#1", author_id=author.id, status="new", title="t", description="d")
+        db.add(ticket)
+        db.commit()
+        assert support_queue.page() == [ticket.id]
+
+        ticket.status = "in_progress"
+        db.flush()
+        db.rollback()
+        assert support_queue.page(status="new") == [ticket.id]
+
+    def test_statements_trigger_rebuild(self, db):
+        author = make_user(db, telegram_id=1)
+        ticket = Ticket(number="#1", author_id=author.id, status="new", title="t", description="d")
+        db.add(ticket)
+        db.commit()
+        support_queue.refresh(db)
+
+        db.execute(update(Ticket).values(status="closed"))
+        db.commit()
+        assert support_queue.loaded_at is None
+        assert support_queue.refresh(db).page(status="closed") == [ticket.id]
+
+    def test_rebuild_keeps_newer_commits(self, db):
+        author = make_user(db, telegram_id=1)
+        support_queue.refresh(db)
+        # Committed after the snapshot was read, but before it was swapped in.
+        support_queue.apply({99: Entry((datetime.utcnow(), 99), "new", False)})
+        support_queue.load(db)
+        assert support_queue.page() == [99]
+
+
+class TestTicketList:
+    @pytest.fixture
+    def queue(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ids = [
+            client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()["id"]
+            for _ in range(5)
+        ]
+        return author, support, ids
+
+    def cursor(self, row):
+        return f"{row['updated_at']},{row['id']}"
+
+    @pytest.mark.parametrize("filter, user", [("all", 1), ("mine", 0)])
+    def test_paging(self, client, queue, filter, user):
+        headers = auth_headers(queue[user])
+        ids = queue[2]
+        first = client.get(f"/tickets?filter={filter}&limit=2", headers=headers).json()
+        second = client.get(
+            f"/tickets?filter={filter}&limit=2", params={"cursor": self.cursor(first[-1])}, headers=headers
+        ).json()
+        rest = client.get(
+            f"/tickets?filter={filter}", params={"cursor": self.cursor(second[-1])}, headers=headers
+        ).json()
+        assert [t["id"] for t in first + second + rest] == ids[::-1]
+
+    def test_status_filter_follows_writes(self, client, queue):
+        _, support, ids = queue
+        headers = auth_headers(support)
+        client.put(f"/tickets/{ids[1]}/status", json={"status": "in_progress"}, headers=headers)
+
+        r = client.get("/tickets?filter=all&status=in_progress&view=compact", headers=headers)
+        assert [t["id"] for t in r.json()] == [ids[1]]
+        assert client.get("/tickets?filter=all", headers=headers).json()[0]["id"] == ids[1]
+
+    def test_invalid_cursor(self, client, queue):
+        r = client.get("/tickets?filter=all&cursor=yesterday", headers=auth_headers(queue[1]))
+        assert r.status_code == 400
+
+    def test_changes_from_index(self, client, queue):
+        _, support, ids = queue
+        headers = auth_headers(support)
+        since = client.get("/tickets?filter=all&limit=1", headers=headers).json()[0]["updated_at"]
+        client.put(f"/tickets/{ids[0]}/urgent", json={"is_urgent": True}, headers=headers)
+
+        r = client.get("/tickets/changes", params={"filter": "all", "since": since}, headers=headers)
+        assert [t["id"] for t in r.json()["changed"]] == [ids[0]]
+        r = client.get(
+            "/tickets/changes", params={"filter": "all", "urgent": "false", "since": since}, headers=headers
+        )
+        assert r.json()["changed"] == []
+        assert r.json()["removed"] == [ids[0]]
+
+    def test_rows_gone_elsewhere_trigger_rebuild(self, client, db, queue):
+        _, support, ids = queue
+        support_queue.refresh(db)
+        # Another process (the archive job) removes a ticket behind our back.
+        db.connection().execute(delete(Ticket.__table__).where(Ticket.id == ids[0]))
+        db.commit()
+        assert support_queue.loaded_at is not None
+
+        r = client.get("/tickets?filter=all", headers=auth_headers(support))
+        assert ids[0] not in [t["id"] for t in r.json()]
+        assert support_queue.loaded_at is None
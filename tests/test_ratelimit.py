@@ -0,0 +1,127 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.ratelimit import Budget, RateLimiter, RateLimitMiddleware, client_key, parse_limits
+from tests.conftest import auth_headers, make_user
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def rejected(route: str) -> float:
+    return REGISTRY.get_sample_value("ratelimit_rejected_total", {"route": route}) or 0.0
+
+
+def scope_with(headers=(), client=("10.0.0.1", 5000)):
+    return {"type": "http", "headers": list(headers), "client": client}
+
+
+class TestConfig:
+    def test_parse(self):
+        default, routes = parse_limits({
+            "default": {"rate": 10, "burst": 30},
+            "routes": {"get /tickets/{ticket_id}": {"rate": 1}},
+        })
+        assert default == Budget(10, 30)
+        [route] = routes
+        assert route.method == "GET"
+        assert route.budget == Budget(1, 1)
+        assert route.pattern.match("/tickets/42")
+        assert not route.pattern.match("/tickets/42/messages")
+
+    def test_no_default(self):
+        assert parse_limits({}) == (None, [])
+
+    @pytest.mark.parametrize("section", [{"rate": 0}, {"rate": 1, "burst": 0.5}])
+    def test_invalid_budget(self, section):
+        with pytest.raises(ValueError):
+            Budget.from_config(section)
+
+
+class TestTokenBucket:
+    def test_burst_then_refill(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock)
+        budget = Budget(rate=2, burst=3)
+        assert [limiter.acquire("r", "c", budget) for _ in range(3)] == [0, 0, 0]
+        assert limiter.acquire("r", "c", budget) == pytest.approx(0.5)
+        clock.now += 0.5
+        assert limiter.acquire("r", "c", budget) == 0
+
+    def test_buckets_are_per_route_and_client(self):
+        limiter = RateLimiter(FakeClock())
+        budget = Budget(rate=1, burst=1)
+        assert limiter.acquire("r", "a", budget) == 0
+        assert limiter.acquire("r", "b", budget) == 0
+        assert limiter.acquire("other", "a", budget) == 0
+        assert limiter.acquire("r", "a", budget) > 0
+
+    def test_sweep_forgets_refilled_buckets(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock)
+        limiter.acquire("slow", "a", Budget(rate=1, burst=10))
+        limiter.acquire("fast", "a", Budget(rate=10, burst=10))
+        clock.now += 2
+        limiter.sweep(clock.now)
+        assert list(limiter.buckets) == [("slow", "a")]
+
+
+class TestClientKey:
+    def test_user_from_token(self, db):
+        user = make_user(db, telegram_id=1)
+        token = auth_headers(user)["Authorization"].encode()
+        assert client_key(scope_with([(b"authorization", token)])) == f"user:{user.id}"
+
+    def test_invalid_token_falls_back_to_ip(self):
+        scope = scope_with([(b"authorization", b"Bearer forged")])
+        assert client_key(scope) == "ip:10.0.0.1"
+
+    def test_anonymous(self):
+        assert client_key(scope_with(client=None)) == "ip:unknown"
+
+
+class TestMiddleware:
+    LIMITS = {"routes": {"GET /tickets": {"rate": 0.01, "burst": 2}}}
+
+    @pytest.fixture
+    def limited(self, client):
+        from app.main import app
+        return TestClient(RateLimitMiddleware(app, self.LIMITS))
+
+    def test_rejects_with_retry_after(self, limited, db):
+        user = make_user(db, telegram_id=1)
+        headers = auth_headers(user)
+        before = rejected("GET /tickets")
+
+        assert [limited.get("/tickets", headers=headers).status_code for _ in range(2)] == [200, 200]
+        r = limited.get("/tickets", headers=headers)
+        assert r.status_code == 429
+        assert r.json() == {"detail": "Too many requests"}
+        assert int(r.headers["retry-after"]) == 100
+        assert rejected("GET /tickets") == before + 1
+
+    def test_other_users_and_routes_unaffected(self, limited, db):
+        first = make_user(db, telegram_id=1)
+        second = make_user(db, telegram_id=2)
+        for _ in range(3):
+            limited.get("/tickets", headers=auth_headers(first))
+        assert limited.get("/tickets", headers=auth_headers(second)).status_code == 200
+        assert limited.get("/tickets/changes", headers=auth_headers(first)).status_code == 200
+        assert limited.get("/auth/me", headers=auth_headers(first)).status_code == 200
+
+    def test_batch_items_charged_per_route(self, limited, db):
+        user = make_user(db, telegram_id=1)
+        headers = auth_headers(user)
+        requests = [{"id": str(i), "path": "/tickets"} for i in range(4)] + [{"id": "me", "path": "/auth/me"}]
+
+        r = limited.post("/batch", json={"requests": requests}, headers=headers)
+        statuses = [item["status"] for item in r.json()["responses"]]
+        assert statuses == [200, 200, 429, 429, 200]
+        assert r.json()["responses"][2]["body"]["retry_after"] == 100
+        assert limited.get("/tickets", headers=headers).status_code == 429
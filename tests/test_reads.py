@@ -0,0 +1,126 @@
+from sqlalchemy import event
+
+from app.reads import mark_read, unread_counts
+from tests.conftest import auth_headers, engine, make_user, TICKET_PAYLOAD
+
+
+def send(client, ticket_id, user, text="Сообщение"):
+    return client.post(f"/tickets/{ticket_id}/messages", data={"text": text}, headers=auth_headers(user))
+
+
+def unread_of(client, user, ticket_id, filter="mine"):
+    rows = client.get(f"/tickets?filter={filter}&view=compact", headers=auth_headers(user)).json()
+    return next(row["unread"] for row in rows if row["id"] == ticket_id)
+
+
+class TestUnreadCounts:
+    def test_messages_from_others_until_read(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        send(client, ticket["id"], author)
+        send(client, ticket["id"], support)
+        send(client, ticket["id"], support)
+
+        assert unread_of(client, author, ticket["id"]) == 2
+        assert unread_of(client, support, ticket["id"], "all") == 0  # their reply marked it read
+
+        client.get(f"/tickets/{ticket['id']}/messages", headers=auth_headers(author))
+        assert unread_of(client, author, ticket["id"]) == 0
+
+    def test_system_messages_not_counted(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        client.put(f"/tickets/{ticket['id']}/assign", headers=auth_headers(support))
+        assert unread_of(client, author, ticket["id"]) == 0
+
+    def test_reading_changes_etag(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        send(client, ticket["id"], support)
+        etag = client.get("/tickets", headers=auth_headers(author)).headers["etag"]
+
+        client.get(f"/tickets/{ticket['id']}/messages", headers=auth_headers(author))
+        r = client.get("/tickets", headers={**auth_headers(author), "If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.json()[0]["unread"] == 0
+
+    def test_shared_rows_carry_each_callers_counts(self, client, db):
+        author = make_user(db, telegram_id=1)
+        first = make_user(db, telegram_id=2, role="support")
+        second = make_user(db, telegram_id=3, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        send(client, ticket["id"], author)
+        client.get(f"/tickets/{ticket['id']}/messages", headers=auth_headers(first))
+
+        assert unread_of(client, first, ticket["id"], "all") == 0
+        assert unread_of(client, second, ticket["id"], "all") == 1
+
+    def test_changes_and_single_ticket(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        send(client, ticket["id"], support)
+
+        changes = client.get("/tickets/changes", headers=auth_headers(author)).json()
+        assert changes["changed"][0]["unread"] == 1
+        assert client.get(f"/tickets/{ticket['id']}", headers=auth_headers(author)).json()["unread"] is None
+
+
+class TestMarkers:
+    def test_marker_never_moves_back(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        ids = [send(client, ticket["id"], support).json()["id"] for _ in range(3)]
+
+        assert mark_read(db, author.id, ticket["id"], ids[2])
+        assert not mark_read(db, author.id, ticket["id"], ids[0])
+        db.commit()
+        assert unread_counts(db, author.id, [ticket["id"]]) == {}
+
+    def test_polling_without_new_messages_writes_nothing(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        last = send(client, ticket["id"], support).json()["id"]
+        client.get(f"/tickets/{ticket['id']}/messages", headers=auth_headers(author))
+
+        assert not mark_read(db, author.id, ticket["id"], last)
+
+    def test_reading_doesnt_reload_each_message(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        for _ in range(5):
+            send(client, ticket["id"], support)
+
+        seen = []
+        listener = lambda conn, cursor, statement, *args: seen.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            r = client.get(f"/tickets/{ticket['id']}/messages", headers=auth_headers(author))
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert len(r.json()) == 5
+        assert sum("FROM messages" in statement for statement in seen) == 1
+
+
+class TestBadge:
+    def test_author_and_assignee(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        other = make_user(db, telegram_id=3, role="support")
+        first = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        second = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        client.put(f"/tickets/{first['id']}/assign", headers=auth_headers(support))
+        for ticket in (first, second):
+            send(client, ticket["id"], other)
+        send(client, first["id"], author)
+
+        badge = client.get("/tickets/unread", headers=auth_headers(author)).json()
+        assert badge == {"messages": 1, "tickets": 1}  # replying marked the first one read
+        badge = client.get("/tickets/unread", headers=auth_headers(support)).json()
+        assert badge == {"messages": 2, "tickets": 1}  # only the ticket assigned to them
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+from unittest.mock import patch
+
+from app import config, reload
+from app.auth import determine_role
+from app.config import Roles
+from app.models import User
+from tests.conftest import TestingSessionLocal, auth_headers, make_user
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "config.yaml"
+
+    def write(admins=(), support=()):
+        path.write_text(
+            'bot_token: "123:abc"\nsecret_key: "s"\nroles:\n'
+            f"  admins: {list(admins)}\n  support: {list(support)}\n",
+            encoding="utf-8",
+        )
+        # Make sure the mtime moves even on coarse-grained filesystems.
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    write()
+    with patch.object(config, "_CONFIG_PATH", path), \
+            patch.object(config, "_roles", Roles.build()), \
+            patch.object(config, "_loaded_mtime_ns", 0), \
+            patch.object(reload, "SessionLocal", TestingSessionLocal):
+        config.reload_config()
+        yield write
+
+
+class TestRolesSnapshot:
+    def test_lookup(self):
+        roles = Roles.build(admins=[1, 2], support=[2, 3])
+        assert roles.role_of(1) == "admin"
+        assert roles.role_of(2) == "admin"
+        assert roles.role_of(3) == "support"
+        assert roles.role_of(4) == "author"
+        assert roles.recipients == (1, 2, 3)
+        assert isinstance(roles.admins, frozenset)
+
+    def test_empty_sections(self):
+        roles = Roles.from_config({"roles": {"admins": None}})
+        assert roles == Roles.build()
+
+
+class TestReloadConfig:
+    def test_unchanged_file_is_skipped(self, config_file):
+        assert config.reload_config() is None
+
+    def test_swaps_snapshot(self, config_file):
+        config_file(support=[42])
+        snapshot = config.reload_config()
+        assert snapshot is not None and snapshot.support == {42}
+        assert determine_role(42) == "support"
+
+    def test_broken_file_keeps_snapshot(self, config_file, tmp_path):
+        config_file(admins=[7])
+        config.reload_config()
+        (tmp_path / "config.yaml").write_text("roles: [", encoding="utf-8")
+        assert reload.reload_roles(force=True) is False
+        assert determine_role(7) == "admin"
+
+
+class TestApplyRoles:
+    def test_logged_in_user_gets_new_role(self, client, db, config_file):
+        agent = make_user(db, telegram_id=42)
+        headers = auth_headers(agent)
+        assert client.get("/tickets?filter=all", headers=headers).status_code == 403
+
+        config_file(support=[42])
+        assert reload.reload_roles() is True
+        db.expire_all()  # the test client shares one session across requests
+        assert client.get("/tickets?filter=all", headers=headers).status_code == 200
+
+        config_file()
+        assert reload.reload_roles() is True
+        db.expire_all()
+        assert client.get("/tickets?filter=all", headers=headers).status_code == 403
+
+    def test_apply_roles_counts_changes(self, db):
+        make_user(db, telegram_id=1, role="support")
+        make_user(db, telegram_id=2)
+        make_user(db, telegram_id=3, role="admin")
+        changed = reload.apply_roles(db, Roles.build(admins=[1], support=[3]))
+        assert changed == 2
+        roles = {u.telegram_id: u.role for u in db.query(User)}
+        assert roles == {1: "admin", 2: "author", 3: "support"}
@@ -0,0 +1,42 @@
+import json
+
+from app.routers.tickets import UserShort
+from app.serialization import dump_json, json_response
+from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
+
+
+class TestDumpJson:
+    def test_dump_orm_object(self, db):
+        user = make_user(db, telegram_id=1, username="алиса")
+        data = json.loads(dump_json(UserShort, user))
+        assert data == {
+            "id": user.id,
+            "telegram_id": 1,
+            "username": "алиса",
+            "full_name": "User 1",
+            "role": "author",
+        }
+
+    def test_dump_list(self, db):
+        users = [make_user(db, telegram_id=i) for i in (1, 2)]
+        data = json.loads(dump_json(list[UserShort], users))
+        assert [u["telegram_id"] for u in data] == [1, 2]
+
+    def test_json_response_headers(self, db):
+        user = make_user(db, telegram_id=1)
+        r = json_response(UserShort, user, status_code=201, headers={"ETag": 'W/"x"'})
+        assert r.status_code == 201
+        assert r.media_type == "application/json"
+        assert r.headers["etag"] == 'W/"x"'
+
+
+class TestFastPathEndpoints:
+    def test_list_matches_schema(self, client, db):
+        user = make_user(db, telegram_id=1)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user))
+        r = client.get("/tickets?filter=mine", headers=auth_headers(user))
+        assert r.headers["content-type"] == "application/json"
+        ticket = r.json()[0]
+        assert ticket["author"]["telegram_id"] == 1
+        assert ticket["assignee"] is None
+        assert ticket["files"] == []
@@ -0,0 +1,60 @@
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.models import TicketFile
+from app.sqltrace import SQLTrace, SQLTraceMiddleware, _current_trace, install
+from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
+
+
+def _traced_client():
+    return TestClient(SQLTraceMiddleware(app, n_plus_one_threshold=5))
+
+
+class TestSQLTrace:
+    def test_repeated_shapes(self, db):
+        install()
+        trace = SQLTrace({"type": "http", "method": "GET"})
+        token = _current_trace.set(trace)
+        try:
+            for ticket_id in range(6):
+                db.execute(select(TicketFile).where(TicketFile.ticket_id == ticket_id)).all()
+        finally:
+            _current_trace.reset(token)
+        assert trace.queries == 6
+        ((statement, count),) = trace.repeated(5)
+        assert count == 6 and "ticket_files" in statement
+
+    def test_no_trace_outside_requests(self, db):
+        install()
+        db.execute(select(TicketFile)).all()  # must not raise without a trace
+
+
+class TestSQLTraceMiddleware:
+    def test_server_timing_header(self, client, db):
+        user = make_user(db, telegram_id=1)
+        r = _traced_client().get("/tickets", headers=auth_headers(user))
+        assert r.status_code == 200
+        timing = r.headers["server-timing"]
+        assert timing.startswith("db;dur=")
+        assert 'queries"' in timing
+
+    def test_ticket_list_has_no_n_plus_one(self, client, db, caplog):
+        user = make_user(db, telegram_id=1)
+        for _ in range(6):
+            client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user))
+        db.expire_all()
+        with caplog.at_level(logging.WARNING, logger="app.sqltrace"):
+            r = _traced_client().get("/tickets", headers=auth_headers(user))
+        assert r.status_code == 200 and len(r.json()) == 6
+        assert "N+1" not in caplog.text
+
+    def test_slow_query_logged_with_route(self, client, db, caplog, monkeypatch):
+        monkeypatch.setattr("app.sqltrace.SLOW_QUERY_MS", 0)
+        user = make_user(db, telegram_id=1)
+        with caplog.at_level(logging.WARNING, logger="app.sqltrace"):
+            _traced_client().get("/tickets", headers=auth_headers(user))
+        assert "Slow query" in caplog.text
+        assert "GET /tickets" in caplog.text
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from app.config import _secret_key
+
+ROOT = Path(__file__).parent.parent
+
+# Cumulative `import app.main` time; ~0.7 s on a dev laptop. Generous enough
+# for slow CI, tight enough to catch a heavy dependency creeping back in.
+IMPORT_BUDGET_US = 2_000_000
+
+# Imported on first use only (see app.bot).
+LAZY_MODULES = ("telegram", "httpx")
+
+
+def _import_app(*flags: str) -> subprocess.CompletedProcess:
+    code = (
+        "import sys, app.main; "
+        "print(','.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    )
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+
+class TestImportTime:
+    def test_within_budget(self):
+        stderr = _import_app("-X", "importtime").stderr
+        line = next(l for l in stderr.splitlines() if l.rstrip().endswith("| app.main"))
+        cumulative_us = int(line.split("|")[1])
+        assert cumulative_us < IMPORT_BUDGET_US, f"import app.main took {cumulative_us} us"
+
+    def test_heavy_modules_are_lazy(self):
+        loaded = set(_import_app().stdout.strip().split(","))
+        assert loaded.isdisjoint(LAZY_MODULES)
+
+
+class TestSecretKey:
+    def test_explicit_key(self):
+        assert _secret_key({"secret_key": "abc", "bot_token": "t"}) == "abc"
+
+    def test_derived_key_is_stable(self):
+        first = _secret_key({"secret_key": "", "bot_token": "123:token"})
+        assert first == _secret_key({"bot_token": "123:token"})
+        assert first != _secret_key({"bot_token": "456:token"})
+        assert len(first) == 64
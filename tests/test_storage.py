@@ -0,0 +1,203 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import func, select
+
+from app import storage
+from app.models import Message, MessageFile, Ticket, TicketFile
+from app.routers import files as files_router
+from app.storage import locate, migrate_uploads, migrated_path, new_stored_path, sharded_path
+from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    with patch.object(files_router, "UPLOAD_DIR", tmp_path):
+        yield tmp_path
+
+
+def add_file(db, upload_dir, author, ticket_id, name, content=b"data", on_disk=True):
+    stored_path = f"{ticket_id}/{name}"
+    if on_disk:
+        (upload_dir / str(ticket_id)).mkdir(exist_ok=True)
+        (upload_dir / stored_path).write_bytes(content)
+    tf = TicketFile(ticket_id=ticket_id, filename=name, stored_path=stored_path,
+                    filesize=len(content), uploaded_by=author.id)
+    db.add(tf)
+    db.commit()
+    return tf
+
+
+def add_ticket(db, author):
+    number = f"#t-{db.scalar(select(func.count(Ticket.id))) + 1}"
+    ticket = Ticket(number=number, author_id=author.id, status="new", title="t", description="d")
+    db.add(ticket)
+    db.commit()
+    return ticket.id
+
+
+class TestLayout:
+    def test_new_path_is_sharded(self):
+        path = new_stored_path("../report.pdf")
+        shard_a, shard_b, name = path.split("/")
+        assert len(shard_a) == len(shard_b) == 2
+        assert name.endswith("_report.pdf")
+        assert path == sharded_path(name)
+
+    def test_migrated_path(self):
+        assert migrated_path("42/abc_report.pdf") == sharded_path("abc_report.pdf")
+        assert migrated_path(sharded_path("abc_report.pdf")) is None
+
+    def test_save_creates_shard_dirs(self, tmp_path):
+        path = new_stored_path("a.txt")
+        storage.save(tmp_path, path, b"x")
+        assert (tmp_path / path).read_bytes() == b"x"
+
+    def test_save_recreates_removed_dir(self, tmp_path):
+        path = new_stored_path("a.txt")
+        storage.save(tmp_path, path, b"x")
+        (tmp_path / path).unlink()
+        (tmp_path / path).parent.rmdir()
+        storage.save(tmp_path, path, b"y")
+        assert (tmp_path / path).read_bytes() == b"y"
+
+    def test_locate_falls_back_to_sharded(self, tmp_path):
+        storage.save(tmp_path, sharded_path("abc_a.txt"), b"x")
+        assert locate(tmp_path, "7/abc_a.txt") == tmp_path / sharded_path("abc_a.txt")
+        assert locate(tmp_path, "7/missing.txt") is None
+
+
+class TestMigration:
+    def test_moves_files_and_rewrites_paths(self, db, upload_dir):
+        author = make_user(db, telegram_id=1)
+        ticket_id = add_ticket(db, author)
+        files = [add_file(db, upload_dir, author, ticket_id, f"{i}_f.txt", f"{i}".encode())
+                 for i in range(3)]
+
+        stats = migrate_uploads(db, upload_dir, batch_size=2, pause=0)
+
+        assert stats["moved"] == 3
+        for i, tf in enumerate(files):
+            db.refresh(tf)
+            assert tf.stored_path == sharded_path(f"{i}_f.txt")
+            assert (upload_dir / tf.stored_path).read_bytes() == f"{i}".encode()
+        assert not (upload_dir / str(ticket_id)).exists()
+
+    def test_rewrites_shared_paths_in_all_tables(self, db, upload_dir):
+        author = make_user(db, telegram_id=1)
+        ticket_id = add_ticket(db, author)
+        tf = add_file(db, upload_dir, author, ticket_id, "shared.txt")
+        msg = Message(ticket_id=ticket_id, sender_id=author.id, sender_role="author", text="m")
+        msg.files = [MessageFile(filename="shared.txt", stored_path=tf.stored_path, filesize=4)]
+        db.add(msg)
+        db.commit()
+
+        migrate_uploads(db, upload_dir, pause=0)
+
+        db.expire_all()
+        assert tf.stored_path == msg.files[0].stored_path == sharded_path("shared.txt")
+
+    def test_missing_and_conflicting_files(self, db, upload_dir):
+        author = make_user(db, telegram_id=1)
+        first, second = add_ticket(db, author), add_ticket(db, author)
+        missing = add_file(db, upload_dir, author, first, "gone.txt", on_disk=False)
+        kept = add_file(db, upload_dir, author, first, "same.txt", b"first")
+        clash = add_file(db, upload_dir, author, second, "same.txt", b"second")
+
+        stats = migrate_uploads(db, upload_dir, pause=0)
+
+        assert stats == {"moved": 1, "done": 0, "missing": 1, "conflict": 1}
+        db.expire_all()
+        assert missing.stored_path == sharded_path("gone.txt")
+        assert kept.stored_path == sharded_path("same.txt")
+        assert clash.stored_path == f"{second}/same.txt"
+        assert (upload_dir / clash.stored_path).read_bytes() == b"second"
+
+    def test_resumes_after_interruption(self, db, upload_dir):
+        author = make_user(db, telegram_id=1)
+        ticket_id = add_ticket(db, author)
+        tf = add_file(db, upload_dir, author, ticket_id, "a.txt")
+        # Crash between the rename and the commit: file moved, row not rewritten.
+        (upload_dir / sharded_path("a.txt")).parent.mkdir(parents=True)
+        (upload_dir / tf.stored_path).rename(upload_dir / sharded_path("a.txt"))
+
+        stats = migrate_uploads(db, upload_dir, pause=0)
+
+        assert stats["done"] == 1
+        db.refresh(tf)
+        assert tf.stored_path == sharded_path("a.txt")
+        assert migrate_uploads(db, upload_dir, pause=0)["moved"] == 0
+
+
+class TestDownloadsDuringMigration:
+    def test_upload_uses_sharded_layout(self, client, db, upload_dir):
+        user = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user)).json()
+        r = client.post(
+            f"/tickets/{ticket['id']}/files",
+            files={"file": ("a.txt", BytesIO(b"content"), "text/plain")},
+            headers=auth_headers(user),
+        )
+        stored_path = r.json()["stored_path"]
+        assert migrated_path(stored_path) is None
+        assert (upload_dir / stored_path).read_bytes() == b"content"
+
+    def test_old_link_works_after_migration(self, client, db, upload_dir):
+        owner = make_user(db, telegram_id=1)
+        other = make_user(db, telegram_id=2)
+        ticket_id = add_ticket(db, owner)
+        tf = add_file(db, upload_dir, owner, ticket_id, "abc_a.txt", b"content")
+        old_path = tf.stored_path
+
+        migrate_uploads(db, upload_dir, pause=0)
+
+        r = client.get(f"/files/{old_path}", headers=auth_headers(owner))
+        assert r.status_code == 200
+        assert r.content == b"content"
+        assert client.get(f"/files/{old_path}", headers=auth_headers(other)).status_code == 403
+
+    def test_file_moved_before_row_rewritten(self, client, db, upload_dir):
+        owner = make_user(db, telegram_id=1)
+        ticket_id = add_ticket(db, owner)
+        tf = add_file(db, upload_dir, owner, ticket_id, "abc_a.txt", b"content")
+        (upload_dir / sharded_path("abc_a.txt")).parent.mkdir(parents=True)
+        (upload_dir / tf.stored_path).rename(upload_dir / sharded_path("abc_a.txt"))
+
+        r = client.get(f"/files/{tf.stored_path}", headers=auth_headers(owner))
+        assert r.status_code == 200
+        assert r.content == b"content"
+
+
+class TestSignedUrls:
+    NOW = 1_700_000_000
+
+    def parts(self, url):
+        _, _, scope, expires, signature, path = url.split("/", 5)
+        return scope, int(expires), signature, path
+
+    def test_round_trip(self):
+        scope, expires, signature, path = self.parts(storage.signed_url("ab/cd/x_a.pdf", now=self.NOW))
+        assert (scope, path) == ("download", "ab/cd/x_a.pdf")
+        assert expires > self.NOW
+        assert storage.verify_signature(scope, expires, signature, path, now=self.NOW)
+
+    def test_stable_within_window(self):
+        window_start = storage.url_window(self.NOW) * storage.FILE_URL_WINDOW
+        first = storage.signed_url("p/a.pdf", now=window_start)
+        assert storage.signed_url("p/a.pdf", now=window_start + storage.FILE_URL_WINDOW - 1) == first
+        assert storage.signed_url("p/a.pdf", now=window_start + storage.FILE_URL_WINDOW) != first
+
+    def test_rejects_expired_and_tampered(self):
+        scope, expires, signature, path = self.parts(storage.signed_url("p/a.pdf", now=self.NOW))
+        assert not storage.verify_signature(scope, expires, signature, path, now=expires + 1)
+        assert not storage.verify_signature(scope, expires, signature, "p/b.pdf", now=self.NOW)
+        assert not storage.verify_signature(scope, expires + 1, signature, path, now=self.NOW)
+        assert not storage.verify_signature("inline", expires, signature, path, now=self.NOW)
+
+    def test_preview_only_for_images(self):
+        assert storage.preview_url("p/a.pdf") is None
+        assert storage.preview_url("p/a.html") is None
+        scope, expires, signature, path = self.parts(storage.preview_url("p/a.PNG", now=self.NOW))
+        assert scope == "inline"
+        assert storage.verify_signature(scope, expires, signature, path, now=self.NOW)
@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import AsyncMock, patch
 from tests.conftest import auth_headers, make_user, TICKET_PAYLOAD
 
 
@@ -549,3 +550,393 @@ class TestUrgentToggle:
             headers=auth_headers(other),
         )
         assert r.status_code == 403
+
+
+class TestConditionalGet:
+    def test_ticket_etag_304(self, client, db):
+        user = make_user(db, telegram_id=1)
+        hdrs = auth_headers(user)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=hdrs).json()
+
+        r = client.get(f"/tickets/{ticket['id']}", headers=hdrs)
+        etag = r.headers["etag"]
+        assert etag.startswith('W/"')
+
+        r = client.get(f"/tickets/{ticket['id']}", headers={**hdrs, "If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.content == b""
+
+    def test_ticket_etag_changes_on_update(self, client, db):
+        user = make_user(db, telegram_id=1)
+        hdrs = auth_headers(user)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=hdrs).json()
+        etag = client.get(f"/tickets/{ticket['id']}", headers=hdrs).headers["etag"]
+
+        client.put(f"/tickets/{ticket['id']}/urgent", json={"is_urgent": True}, headers=hdrs)
+
+        r = client.get(f"/tickets/{ticket['id']}", headers={**hdrs, "If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.json()["is_urgent"] is True
+        assert r.headers["etag"] != etag
+
+    def test_ticket_304_still_checks_access(self, client, db):
+        owner = make_user(db, telegram_id=1)
+        other = make_user(db, telegram_id=2)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(owner)).json()
+        etag = client.get(f"/tickets/{ticket['id']}", headers=auth_headers(owner)).headers["etag"]
+
+        r = client.get(
+            f"/tickets/{ticket['id']}",
+            headers={**auth_headers(other), "If-None-Match": etag},
+        )
+        assert r.status_code == 403
+
+    def test_list_etag_304(self, client, db):
+        user = make_user(db, telegram_id=1)
+        hdrs = auth_headers(user)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=hdrs)
+
+        etag = client.get("/tickets?filter=mine", headers=hdrs).headers["etag"]
+        r = client.get("/tickets?filter=mine", headers={**hdrs, "If-None-Match": etag})
+        assert r.status_code == 304
+
+    def test_list_etag_changes_on_new_ticket(self, client, db):
+        user = make_user(db, telegram_id=1)
+        hdrs = auth_headers(user)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=hdrs)
+        etag = client.get("/tickets?filter=mine", headers=hdrs).headers["etag"]
+
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=hdrs)
+
+        r = client.get("/tickets?filter=mine", headers={**hdrs, "If-None-Match": etag})
+        assert r.status_code == 200
+        assert len(r.json()) == 2
+
+    def test_list_etag_differs_per_filter(self, client, db):
+        support = make_user(db, telegram_id=1, role="support")
+        hdrs = auth_headers(support)
+        mine = client.get("/tickets?filter=mine", headers=hdrs).headers["etag"]
+        closed = client.get("/tickets?filter=closed", headers=hdrs).headers["etag"]
+        assert mine != closed
+
+
+class TestCompactList:
+    def test_compact_fields(self, client, db):
+        author = make_user(db, telegram_id=1, username="author")
+        support = make_user(db, telegram_id=2, role="support")
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        client.put(f"/tickets/{ticket['id']}/assign", headers=auth_headers(support))
+
+        r = client.get("/tickets?filter=all&view=compact", headers=auth_headers(support))
+        assert r.status_code == 200
+        row = r.json()[0]
+        assert set(row) == {
+            "id", "number", "status", "is_urgent", "title", "assigned_to",
+            "author_username", "author_name", "assignee_name", "updated_at",
+            "last_message_at", "last_message_preview", "message_count", "unread",
+        }
+        assert row["author_username"] == "author"
+        assert row["assignee_name"] == support.full_name
+        assert row["assigned_to"] == support.id
+        assert row["status"] == "in_progress"
+
+    def test_compact_unassigned(self, client, db):
+        user = make_user(db, telegram_id=1)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(user))
+        row = client.get("/tickets?view=compact", headers=auth_headers(user)).json()[0]
+        assert row["assignee_name"] is None
+        assert row["assigned_to"] is None
+
+    def test_compact_respects_filters(self, client, db):
+        owner = make_user(db, telegram_id=1)
+        other = make_user(db, telegram_id=2)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(owner))
+        client.post("/tickets", json={**TICKET_PAYLOAD, "is_urgent": True}, headers=auth_headers(owner))
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(other))
+
+        r = client.get("/tickets?filter=mine&view=compact&urgent=true", headers=auth_headers(owner))
+        assert len(r.json()) == 1
+        assert r.json()[0]["is_urgent"] is True
+
+    def test_compact_all_forbidden_for_author(self, client, db):
+        user = make_user(db, telegram_id=1)
+        r = client.get("/tickets?filter=all&view=compact", headers=auth_headers(user))
+        assert r.status_code == 403
+
+    def test_invalid_view(self, client, db):
+        user = make_user(db, telegram_id=1)
+        r = client.get("/tickets?view=tiny", headers=auth_headers(user))
+        assert r.status_code == 422
+
+
+class TestTicketChanges:
+    def test_snapshot_without_since(self, client, db):
+        user = make_user(db, telegram_id=1)
+        hdrs = auth_headers(user)
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=hdrs)
+
+        r = client.get("/tickets/changes?filter=mine&view=compact", headers=hdrs)
+        assert r.status_code == 200
+        data = r.json()
+        assert len(data["changed"]) == 1
+        assert data["removed"] == []
+        assert "author_username" in data["changed"][0]
+        assert data["watermark"]
+
+    def test_only_changes_after_watermark(self, client, db):
+        user = make_user(db, telegram_id=1)
+        hdrs = auth_headers(user)
+        old = client.post("/tickets", json=TICKET_PAYLOAD, headers=hdrs).json()
+        since = old["updated_at"]
+        new = client.post("/tickets", json=TICKET_PAYLOAD, headers=hdrs).json()
+
+        r = client.get("/tickets/changes", params={"since": since}, headers=hdrs)
+        data = r.json()
+        assert [t["id"] for t in data["changed"]] == [new["id"]]
+        assert "description" in data["changed"][0]
+
+    def test_tombstone_when_ticket_leaves_view(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        hdrs = auth_headers(support)
+        ticket = client.post(
+            "/tickets", json={**TICKET_PAYLOAD, "is_urgent": True}, headers=auth_headers(author)
+        ).json()
+        since = ticket["updated_at"]
+
+        client.put(f"/tickets/{ticket['id']}/urgent", json={"is_urgent": False}, headers=hdrs)
+
+        r = client.get(
+            "/tickets/changes",
+            params={"since": since, "filter": "all", "urgent": "true"},
+            headers=hdrs,
+        )
+        data = r.json()
+        assert data["changed"] == []
+        assert data["removed"] == [ticket["id"]]
+
+    def test_tombstones_respect_read_access(self, client, db):
+        owner = make_user(db, telegram_id=1)
+        other = make_user(db, telegram_id=2)
+        since = "2000-01-01T00:00:00Z"
+        client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(owner))
+
+        r = client.get(
+            "/tickets/changes",
+            params={"since": since, "filter": "closed"},
+            headers=auth_headers(other),
+        )
+        data = r.json()
+        assert data["changed"] == []
+        assert data["removed"] == []
+
+    def test_tombstones_only_for_tickets_of_the_tab(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        other = make_user(db, telegram_id=3, role="support")
+        hdrs = auth_headers(support)
+        own = client.post(
+            "/tickets", json={**TICKET_PAYLOAD, "is_urgent": True}, headers=hdrs
+        ).json()
+        closed = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        for target in ("in_progress", "closed"):
+            client.put(f"/tickets/{closed['id']}/status", json={"status": target}, headers=hdrs)
+        unrelated = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        since = client.get("/tickets/changes", headers=hdrs).json()["watermark"]
+
+        client.put(f"/tickets/{own['id']}/urgent", json={"is_urgent": False}, headers=hdrs)
+        client.put(f"/tickets/{closed['id']}/status", json={"status": "reopened"},
+                   headers=auth_headers(author))
+        client.put(f"/tickets/{unrelated['id']}/status", json={"status": "in_progress"},
+                   headers=auth_headers(other))
+
+        def removed(**params):
+            r = client.get("/tickets/changes", params={"since": since, **params}, headers=hdrs)
+            return r.json()["removed"]
+
+        assert removed(filter="mine") == []
+        assert removed(filter="mine", urgent="true") == [own["id"]]
+        assert removed(filter="closed") == [closed["id"]]
+
+    def test_watermark_never_goes_backwards(self, client, db):
+        user = make_user(db, telegram_id=1)
+        since = "2999-01-01T00:00:00Z"
+        r = client.get("/tickets/changes", params={"since": since}, headers=auth_headers(user))
+        assert r.json()["watermark"].startswith("2999-01-01T00:00:00")
+
+    def test_all_forbidden_for_author(self, client, db):
+        user = make_user(db, telegram_id=1)
+        r = client.get("/tickets/changes?filter=all", headers=auth_headers(user))
+        assert r.status_code == 403
+
+
+class TestBulkUpdate:
+    def _tickets(self, client, author, n):
+        return [
+            client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+            for _ in range(n)
+        ]
+
+    def test_bulk_assign_and_urgent(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        t1, t2 = self._tickets(client, author, 2)
+
+        r = client.post(
+            "/tickets/bulk",
+            json={"operations": [
+                {"ticket_id": t1["id"], "action": "assign"},
+                {"ticket_id": t2["id"], "action": "urgent", "is_urgent": True},
+            ]},
+            headers=auth_headers(support),
+        )
+        assert r.status_code == 200
+        assert [item["ok"] for item in r.json()] == [True, True]
+
+        hdrs = auth_headers(support)
+        assert client.get(f"/tickets/{t1['id']}", headers=hdrs).json()["status"] == "in_progress"
+        assert client.get(f"/tickets/{t2['id']}", headers=hdrs).json()["is_urgent"] is True
+
+        msgs = client.get(f"/tickets/{t1['id']}/messages", headers=hdrs).json()
+        assert [m["sender_role"] for m in msgs] == ["system"]
+
+    def test_partial_failure(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        (t1,) = self._tickets(client, author, 1)
+
+        r = client.post(
+            "/tickets/bulk",
+            json={"operations": [
+                {"ticket_id": t1["id"], "action": "status", "status": "closed"},
+                {"ticket_id": 99999, "action": "assign"},
+                {"ticket_id": t1["id"], "action": "status", "status": "in_progress"},
+                {"ticket_id": t1["id"], "action": "status"},
+            ]},
+            headers=auth_headers(support),
+        )
+        results = r.json()
+        assert [(i["ok"], i["status_code"]) for i in results] == [
+            (False, 400), (False, 404), (True, 200), (False, 422),
+        ]
+        assert "not allowed" in results[0]["detail"]
+        ticket = client.get(f"/tickets/{t1['id']}", headers=auth_headers(support)).json()
+        assert ticket["status"] == "in_progress"
+
+    def test_operations_on_same_ticket_apply_in_order(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        (t1,) = self._tickets(client, author, 1)
+
+        r = client.post(
+            "/tickets/bulk",
+            json={"operations": [
+                {"ticket_id": t1["id"], "action": "assign"},
+                {"ticket_id": t1["id"], "action": "status", "status": "biz_review"},
+                {"ticket_id": t1["id"], "action": "status", "status": "closed"},
+            ]},
+            headers=auth_headers(support),
+        )
+        assert all(item["ok"] for item in r.json())
+        msgs = client.get(f"/tickets/{t1['id']}/messages", headers=auth_headers(support)).json()
+        assert len(msgs) == 3
+
+    def test_author_role_checks(self, client, db):
+        author = make_user(db, telegram_id=1)
+        (t1,) = self._tickets(client, author, 1)
+
+        r = client.post(
+            "/tickets/bulk",
+            json={"operations": [
+                {"ticket_id": t1["id"], "action": "assign"},
+                {"ticket_id": t1["id"], "action": "urgent", "is_urgent": True},
+            ]},
+            headers=auth_headers(author),
+        )
+        assert [(i["ok"], i["status_code"]) for i in r.json()] == [(False, 403), (True, 200)]
+
+    def test_notifications_batched(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        t1, t2 = self._tickets(client, author, 2)
+
+        with patch("app.routers.tickets.notify_batch") as mock_batch:
+            client.post(
+                "/tickets/bulk",
+                json={"operations": [
+                    {"ticket_id": t1["id"], "action": "assign"},
+                    {"ticket_id": t2["id"], "action": "assign"},
+                ]},
+                headers=auth_headers(support),
+            )
+        mock_batch.assert_called_once()
+        (notifications,) = mock_batch.call_args.args
+        assert len(notifications) == 2
+
+    def test_notifications_sent_after_session_close(self, isolated_client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support", username="agent")
+        t1, t2 = self._tickets(isolated_client, author, 2)
+
+        with patch("app.bot._send", new_callable=AsyncMock) as mock_send:
+            r = isolated_client.post(
+                "/tickets/bulk",
+                json={"operations": [
+                    {"ticket_id": t1["id"], "action": "assign"},
+                    {"ticket_id": t2["id"], "action": "assign"},
+                ]},
+                headers=auth_headers(support),
+            )
+        assert all(item["ok"] for item in r.json())
+        texts = [call.args[1] for call in mock_send.await_args_list]
+        assert len(texts) == 2
+        assert all(support.full_name in text for text in texts)
+
+    def test_empty_operations_rejected(self, client, db):
+        support = make_user(db, telegram_id=2, role="support")
+        r = client.post("/tickets/bulk", json={"operations": []}, headers=auth_headers(support))
+        assert r.status_code == 422
+
+
+class TestLastMessage:
+    def test_new_ticket_has_none(self, client, db):
+        author = make_user(db, telegram_id=1)
+        ticket = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()
+        assert (ticket["last_message_at"], ticket["last_message_preview"], ticket["message_count"]) == (None, None, 0)
+
+    def test_follows_messages_and_system_messages(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket_id = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()["id"]
+
+        client.post(f"/tickets/{ticket_id}/messages", data={"text": "Первое\n\n  сообщение"},
+                    headers=auth_headers(author))
+        row = client.get("/tickets?filter=mine", headers=auth_headers(author)).json()[0]
+        assert (row["last_message_preview"], row["message_count"]) == ("Первое сообщение", 1)
+
+        client.put(f"/tickets/{ticket_id}/assign", headers=auth_headers(support))
+        client.post(f"/tickets/{ticket_id}/messages", data={"text": "x" * 300}, headers=auth_headers(support))
+        ticket = client.get(f"/tickets/{ticket_id}", headers=auth_headers(support)).json()
+        assert ticket["message_count"] == 3
+        assert len(ticket["last_message_preview"]) == 100
+        assert ticket["last_message_preview"].endswith("…")
+        messages = client.get(f"/tickets/{ticket_id}/messages", headers=auth_headers(support)).json()
+        assert ticket["last_message_at"][:19] == messages[-1]["created_at"][:19]
+
+    def test_bulk_counts_every_system_message(self, client, db):
+        author = make_user(db, telegram_id=1)
+        support = make_user(db, telegram_id=2, role="support")
+        ticket_id = client.post("/tickets", json=TICKET_PAYLOAD, headers=auth_headers(author)).json()["id"]
+
+        client.post(
+            "/tickets/bulk",
+            json={"operations": [
+                {"ticket_id": ticket_id, "action": "assign"},
+                {"ticket_id": ticket_id, "action": "status", "status": "on_pause"},
+            ]},
+            headers=auth_headers(support),
+        )
+        ticket = client.get(f"/tickets/{ticket_id}", headers=auth_headers(support)).json()
+        messages = client.get(f"/tickets/{ticket_id}/messages", headers=auth_headers(support)).json()
+        assert ticket["message_count"] == len(messages) == 2
+        assert ticket["last_message_preview"] == messages[-1]["text"]
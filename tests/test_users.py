@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch
-from tests.conftest import make_user
+from tests.conftest import make_user, patch_roles
 
 
 class TestTelegramAuth:
@@ -47,7 +47,7 @@ class TestTelegramAuth:
         with patch("app.auth._validate_telegram_init_data") as mock_validate:
             mock_validate.return_value = {"id": 99999, "first_name": "Support"}
 
-            with patch("app.auth.SUPPORT_IDS", [99999]):
+            with patch_roles(support=[99999]):
                 r = client.post("/auth/telegram", json={"initData": "user=...&hash=..."})
                 assert r.status_code == 200
                 assert r.json()["user"]["role"] == "support"
@@ -56,7 +56,7 @@ class TestTelegramAuth:
         with patch("app.auth._validate_telegram_init_data") as mock_validate:
             mock_validate.return_value = {"id": 88888, "first_name": "Admin"}
 
-            with patch("app.auth.ADMIN_IDS", [88888]):
+            with patch_roles(admins=[88888]):
                 r = client.post("/auth/telegram", json={"initData": "user=...&hash=..."})
                 assert r.status_code == 200
                 assert r.json()["user"]["role"] == "admin"